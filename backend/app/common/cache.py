@@ -0,0 +1,145 @@
+"""
+路由级响应缓存
+职责: 读多写少的 GET 接口结果缓存（Redis）、按标签失效、并发未命中合并
+技术方案:
+- 缓存键 = 接口函数 + 路径/查询参数，值为 JSON
+- 每个标签对应一个 Redis 集合，记录挂在该标签下的缓存键，失效时整体删除
+- 同一进程内并发未命中共享同一次计算；跨进程通过 SET NX 短锁让其余进程等待结果
+Redis 未初始化或不可用时直接执行原函数，不影响业务
+"""
+import asyncio
+import functools
+import json
+import logging
+from urllib.parse import urlencode
+
+from fastapi.encoders import jsonable_encoder
+
+logger = logging.getLogger("cache")
+
+
+class ResponseCache:
+    """基于 Redis 的响应缓存，在 FastAPI lifespan 中初始化"""
+
+    PREFIX = "cache:"
+    LOCK_TTL_MS = 5000       # 重算锁超时，避免持锁进程崩溃后长期阻塞
+    WAIT_INTERVAL = 0.05     # 未抢到锁时轮询缓存的间隔（秒）
+
+    _redis = None
+    _inflight: dict[str, asyncio.Future] = {}
+
+    @classmethod
+    def init(cls, redis) -> None:
+        cls._redis = redis
+
+    @classmethod
+    def close(cls) -> None:
+        cls._redis = None
+        cls._inflight.clear()
+
+    @classmethod
+    def cached(cls, ttl: int = 60, tags: tuple[str, ...] = ()):
+        """
+        路由缓存装饰器，放在 @router.get 之下
+        :param ttl: 过期时间（秒）
+        :param tags: 失效标签，写操作通过 ResponseCache.invalidate(tag) 清除
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            async def wrapper(*args, **kwargs):
+                if cls._redis is None:
+                    return await func(*args, **kwargs)
+
+                key = cls._make_key(func, kwargs)
+                hit = await cls._get(key)
+                if hit is not None:
+                    return hit
+
+                # 同进程内已有相同键在计算，直接等待其结果
+                inflight = cls._inflight.get(key)
+                if inflight is not None:
+                    return await asyncio.shield(inflight)
+
+                future = asyncio.get_running_loop().create_future()
+                cls._inflight[key] = future
+                try:
+                    value = await cls._load(key, ttl, tags, func, args, kwargs)
+                    future.set_result(value)
+                    return value
+                except BaseException as exc:
+                    future.set_exception(exc)
+                    future.exception()  # 标记已读取，避免无人等待时的告警
+                    raise
+                finally:
+                    cls._inflight.pop(key, None)
+
+            return wrapper
+        return decorator
+
+    @classmethod
+    async def invalidate(cls, *tags: str) -> None:
+        """按标签清除缓存"""
+        if cls._redis is None:
+            return
+        for tag in tags:
+            tag_key = f"{cls.PREFIX}tag:{tag}"
+            try:
+                keys = await cls._redis.smembers(tag_key)
+                await cls._redis.delete(tag_key, *keys)
+            except Exception as e:
+                logger.warning("缓存失效失败 tag=%s: %s", tag, e)
+
+    @classmethod
+    def _make_key(cls, func, kwargs: dict) -> str:
+        params = urlencode(sorted((k, "" if v is None else v) for k, v in kwargs.items()))
+        return f"{cls.PREFIX}{func.__module__}.{func.__qualname__}?{params}"
+
+    @classmethod
+    async def _get(cls, key: str):
+        try:
+            raw = await cls._redis.get(key)
+        except Exception as e:
+            logger.warning("读取缓存失败 key=%s: %s", key, e)
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    @classmethod
+    async def _set(cls, key: str, value, ttl: int, tags: tuple[str, ...]) -> None:
+        try:
+            await cls._redis.set(key, json.dumps(value, ensure_ascii=False), ex=ttl)
+            for tag in tags:
+                tag_key = f"{cls.PREFIX}tag:{tag}"
+                await cls._redis.sadd(tag_key, key)
+                await cls._redis.expire(tag_key, ttl)
+        except Exception as e:
+            logger.warning("写入缓存失败 key=%s: %s", key, e)
+
+    @classmethod
+    async def _load(cls, key: str, ttl: int, tags: tuple[str, ...], func, args, kwargs):
+        """未命中时重算；跨进程只有抢到锁的一方执行，其余等待其写入结果"""
+        lock_key = f"{key}:lock"
+        try:
+            locked = await cls._redis.set(lock_key, "1", nx=True, px=cls.LOCK_TTL_MS)
+        except Exception as e:
+            logger.warning("获取缓存锁失败 key=%s: %s", key, e)
+            locked = True
+
+        if not locked:
+            waited = 0.0
+            while waited * 1000 < cls.LOCK_TTL_MS:
+                await asyncio.sleep(cls.WAIT_INTERVAL)
+                waited += cls.WAIT_INTERVAL
+                hit = await cls._get(key)
+                if hit is not None:
+                    return hit
+
+        try:
+            value = jsonable_encoder(await func(*args, **kwargs))
+            await cls._set(key, value, ttl, tags)
+            return value
+        finally:
+            if locked:
+                try:
+                    await cls._redis.delete(lock_key)
+                except Exception:
+                    pass
@@ -0,0 +1,110 @@
+"""
+Geohash 网格工具
+职责: 坐标编码为 geohash、计算覆盖某圆形区域的网格前缀，以及前缀对应的字符串区间
+用途: geohash 列上建 B-Tree 索引，"附近"查询转化为少量索引区间扫描，
+     扫描量只与附近记录数相关，与全城数据量无关
+"""
+import math
+
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+EARTH_RADIUS_KM = 6371.0  # 与 haversine_km 使用同一地球半径
+KM_PER_DEG_LAT = EARTH_RADIUS_KM * math.pi / 180  # 每纬度对应的公里数（约 111.195）
+
+PRECISION = 9  # 入库精度（约 4.8m × 4.8m）
+
+
+def encode(lat: float, lon: float, precision: int = PRECISION) -> str:
+    """坐标 → geohash"""
+    lat_lo, lat_hi = -90.0, 90.0
+    lon_lo, lon_hi = -180.0, 180.0
+    chars = []
+    bits, ch, even = 0, 0, True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_lo + lon_hi) / 2
+            if lon >= mid:
+                ch = (ch << 1) | 1
+                lon_lo = mid
+            else:
+                ch <<= 1
+                lon_hi = mid
+        else:
+            mid = (lat_lo + lat_hi) / 2
+            if lat >= mid:
+                ch = (ch << 1) | 1
+                lat_lo = mid
+            else:
+                ch <<= 1
+                lat_hi = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[ch])
+            bits, ch = 0, 0
+    return "".join(chars)
+
+
+def cell_size(precision: int) -> tuple[float, float]:
+    """指定精度下单个网格的 (纬度跨度, 经度跨度)，单位: 度"""
+    total_bits = precision * 5
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lon_bits)
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> tuple[float, float, float, float]:
+    """圆形区域的外接矩形 (min_lat, max_lat, min_lon, max_lon)"""
+    d_lat = radius_km / KM_PER_DEG_LAT
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    d_lon = min(radius_km / (KM_PER_DEG_LAT * cos_lat), 180.0)
+    return (
+        max(lat - d_lat, -90.0), min(lat + d_lat, 90.0),
+        max(lon - d_lon, -180.0), min(lon + d_lon, 180.0),
+    )
+
+
+def covering_cells(lat: float, lon: float, radius_km: float, max_cells: int = 16) -> set[str]:
+    """
+    覆盖圆形区域外接矩形的 geohash 前缀集合
+    选取网格数不超过 max_cells 的最高精度，前缀越长，索引区间越窄
+    """
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+    precision = 1
+    for p in range(PRECISION, 0, -1):
+        h, w = cell_size(p)
+        rows = math.floor(max_lat / h) - math.floor(min_lat / h) + 1
+        cols = math.floor(max_lon / w) - math.floor(min_lon / w) + 1
+        if rows * cols <= max_cells:
+            precision = p
+            break
+
+    h, w = cell_size(precision)
+    cells = set()
+    y = min_lat
+    while True:
+        x = min_lon
+        while True:
+            cells.add(encode(y, x, precision))
+            if x >= max_lon:
+                break
+            x = min(x + w, max_lon)
+        if y >= max_lat:
+            break
+        y = min(y + h, max_lat)
+    return cells
+
+
+def prefix_range(prefix: str) -> tuple[str, str | None]:
+    """
+    前缀 → 等价的字符串半开区间 [lower, upper)，可直接用 B-Tree 索引做范围扫描
+    upper 为按 base32 字母表进位后的下一个前缀；前缀全为 'z' 时无上界（返回 None）
+    """
+    chars = list(prefix)
+    while chars:
+        idx = _BASE32.index(chars[-1])
+        if idx + 1 < len(_BASE32):
+            chars[-1] = _BASE32[idx + 1]
+            return prefix, "".join(chars)
+        chars.pop()
+    return prefix, None
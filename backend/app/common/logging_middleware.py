@@ -1,37 +1,46 @@
 """
 统一请求/响应日志中间件
 记录每个 API 请求的方法、路径、状态码、耗时
+纯 ASGI 实现（不继承 BaseHTTPMiddleware），响应体原样透传，不影响 SSE 等流式响应
 """
 import logging
 import time
 
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.requests import Request
-from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 logger = logging.getLogger("ecoloop.api")
 
 
-class RequestLoggingMiddleware(BaseHTTPMiddleware):
+class RequestLoggingMiddleware:
     """结构化请求日志中间件"""
 
-    async def dispatch(self, request: Request, call_next) -> Response:
-        start = time.perf_counter()
-        method = request.method
-        path = request.url.path
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        path = scope["path"]
 
         # 跳过静态资源和健康检查
         if path.startswith("/admin/statics") or path == "/":
-            return await call_next(request)
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
 
         try:
-            response = await call_next(request)
-            elapsed_ms = (time.perf_counter() - start) * 1000
-            logger.info(
-                "[%s] %s → %d (%.1fms)",
-                method, path, response.status_code, elapsed_ms,
-            )
-            return response
+            await self.app(scope, receive, send_wrapper)
         except Exception as exc:
             elapsed_ms = (time.perf_counter() - start) * 1000
             logger.error(
@@ -39,3 +48,8 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
                 method, path, elapsed_ms, str(exc),
             )
             raise
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        logger.info(
+            "[%s] %s → %d (%.1fms)",
+            method, path, status_code, elapsed_ms,
+        )
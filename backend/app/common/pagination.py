@@ -0,0 +1,43 @@
+"""
+游标（keyset）分页工具
+职责: 对 (时间, id) 组合排序键编码/解码不透明游标，并生成"排在游标之后"的过滤条件
+相比 limit/offset，深页查询同样走索引范围扫描，耗时不随页码增长
+"""
+import base64
+import json
+from datetime import datetime
+
+from fastapi import HTTPException
+from tortoise.expressions import Q
+
+
+def encode_cursor(ts: datetime, pk: int) -> str:
+    """将排序键编码为不透明游标"""
+    raw = json.dumps({"t": ts.isoformat(), "i": pk}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """解析游标，格式非法时返回 400"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(data["t"]), int(data["i"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def after_cursor(field: str, cursor: str) -> Q:
+    """按 (field DESC, id DESC) 排序时，位于游标之后的记录条件"""
+    ts, pk = decode_cursor(cursor)
+    return Q(**{f"{field}__lt": ts}) | Q(**{field: ts, "id__lt": pk})
+
+
+def next_cursor(rows: list, field: str, limit: int) -> str | None:
+    """本页已取满时返回下一页游标，否则返回 None 表示没有更多数据"""
+    if len(rows) < limit or not rows:
+        return None
+    last = rows[-1]
+    if isinstance(last, dict):
+        return encode_cursor(last[field], last["id"])
+    return encode_cursor(getattr(last, field), last.id)
@@ -0,0 +1,88 @@
+"""
+列投影查询工具 — 列表接口快速路径
+职责: 只查询响应需要的列（关联字段通过 LEFT JOIN 在同一条 SQL 中取回），
+按元组取数后直接转换为响应字典并输出 JSON，不实例化 ORM 模型，也不经过 jsonable_encoder
+"""
+from typing import Any, Callable
+
+from fastapi.responses import JSONResponse
+from tortoise.queryset import QuerySet
+
+from app.common.pagination import encode_cursor
+
+
+class Projection:
+    """
+    响应列定义，每个输出字段可写为:
+    - "orm_path"                         原样输出
+    - ("orm_path", 转换函数)               转换单列
+    - (("path_a", "path_b"), 转换函数)     多列合成一个字段，转换函数按顺序接收各列值
+    ORM 路径支持关联字段，如 "user__full_name"
+    """
+
+    def __init__(self, **columns):
+        self.paths: list[str] = []
+        self._getters: list[tuple[str, Callable[[tuple], Any]]] = []
+        for name, spec in columns.items():
+            path, conv = (spec, None) if isinstance(spec, str) else spec
+            if isinstance(path, tuple):
+                idxs = [self._index(p) for p in path]
+                self._getters.append((name, self._multi_getter(idxs, conv)))
+            else:
+                self._getters.append((name, self._single_getter(self._index(path), conv)))
+
+    def _index(self, path: str) -> int:
+        if path not in self.paths:
+            self.paths.append(path)
+        return self.paths.index(path)
+
+    @staticmethod
+    def _single_getter(idx: int, conv: Callable | None):
+        if conv is None:
+            return lambda row: row[idx]
+        return lambda row: conv(row[idx])
+
+    @staticmethod
+    def _multi_getter(idxs: list[int], conv: Callable):
+        return lambda row: conv(*[row[i] for i in idxs])
+
+    async def fetch_raw(self, queryset: QuerySet) -> list[tuple]:
+        """单条 SQL 取回所需列（元组形式）"""
+        return await queryset.values_list(*self.paths)
+
+    def serialize(self, rows: list[tuple]) -> list[dict]:
+        getters = self._getters
+        return [{name: get(row) for name, get in getters} for row in rows]
+
+    async def fetch(self, queryset: QuerySet) -> list[dict]:
+        return self.serialize(await self.fetch_raw(queryset))
+
+    def value(self, row: tuple, path: str) -> Any:
+        """从原始元组中取某个 ORM 路径的值"""
+        return row[self.paths.index(path)]
+
+    def next_cursor(self, rows: list[tuple], field: str, limit: int) -> str | None:
+        """游标分页: 本页取满时按最后一行的 (field, id) 生成下一页游标"""
+        if len(rows) < limit or not rows:
+            return None
+        last = rows[-1]
+        return encode_cursor(self.value(last, field), self.value(last, "id"))
+
+
+def json_response(content) -> JSONResponse:
+    """直接输出 JSON，跳过 FastAPI 的逐字段编码"""
+    return JSONResponse(content=content)
+
+
+def fmt_datetime(fmt: str) -> Callable:
+    """日期时间格式化转换函数，空值输出 None"""
+    return lambda v: v.strftime(fmt) if v else None
+
+
+def to_float(v) -> float:
+    """Decimal/空值 → float，空值输出 0"""
+    return float(v) if v else 0
+
+
+def to_str_or_none(v) -> str | None:
+    return str(v) if v else None
@@ -1,40 +1,213 @@
 """
 T1: 定时任务调度器
-职责: 管理后台周期性任务（订单超时取消、提现超时拒绝等）
+职责: 管理后台周期性任务（订单超时取消、提现超时拒绝、自动派单等）
 技术方案: asyncio 原生定时任务，无额外依赖
-在 FastAPI lifespan 中启动/停止
+在 FastAPI lifespan 中启动/停止，也可作为独立进程运行（python -m app.scheduler）
+多进程部署: 各进程通过 Redis 租约选主，只有持有租约的进程执行任务；
+主进程退出或失联后租约过期，其余进程在一个续约周期内接管
+超时处理: 订单/提现创建时按到期时间写入 Redis 延时队列（有序集合），调度器睡眠到最早到期项
+即处理对应 id，误差在秒级；低频全表扫描仅作兜底（Redis 数据丢失、上线前的存量数据）
 """
 import asyncio
 import logging
+import os
+import socket
+import time
+import uuid
 from datetime import datetime, timedelta
 
+from app.core.config import settings
+
 logger = logging.getLogger("scheduler")
 
+ORDER_EXPIRE_AFTER = timedelta(hours=24)       # 待接订单超时时长
+WITHDRAWAL_EXPIRE_AFTER = timedelta(hours=72)  # 待审核提现超时时长
+ORDER_EXPIRY_QUEUE = "order_expiry"
+WITHDRAWAL_EXPIRY_QUEUE = "withdrawal_expiry"
+
+
+class DelayedQueue:
+    """
+    基于 Redis 有序集合的延时队列，score 为到期时间戳（秒）
+    - 入队/撤销: ZADD / ZREM，O(log n)
+    - 出队: Lua 脚本原子地取出并删除已到期的前 N 项，多进程不会重复领取
+    Redis 未初始化或异常时各操作降级为空操作，由兜底扫描保证最终处理
+    """
+
+    PREFIX = "delay:"
+
+    _POP_SCRIPT = """
+local ids = redis.call("ZRANGEBYSCORE", KEYS[1], "-inf", ARGV[1], "LIMIT", 0, ARGV[2])
+if #ids > 0 then
+    redis.call("ZREM", KEYS[1], unpack(ids))
+end
+return ids
+"""
+
+    _redis = None
+
+    @classmethod
+    def init(cls, redis) -> None:
+        cls._redis = redis
+
+    @classmethod
+    def close(cls) -> None:
+        cls._redis = None
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls._redis is not None
+
+    @classmethod
+    async def schedule(cls, kind: str, entity_id: int, delay: timedelta) -> None:
+        """登记 entity_id 在 delay 之后到期"""
+        if cls._redis is None:
+            return
+        try:
+            await cls._redis.zadd(f"{cls.PREFIX}{kind}", {str(entity_id): time.time() + delay.total_seconds()})
+        except Exception as e:
+            logger.warning(f"延时任务入队失败 {kind}#{entity_id}: {e}")
+
+    @classmethod
+    async def cancel(cls, kind: str, *entity_ids: int) -> None:
+        """撤销尚未到期的任务（已接单/已审核等），不存在时忽略"""
+        if cls._redis is None or not entity_ids:
+            return
+        try:
+            await cls._redis.zrem(f"{cls.PREFIX}{kind}", *[str(i) for i in entity_ids])
+        except Exception as e:
+            logger.warning(f"延时任务撤销失败 {kind}: {e}")
+
+    @classmethod
+    async def pop_due(cls, kind: str, limit: int) -> list[int]:
+        """原子地取出最多 limit 个已到期的 id"""
+        ids = await cls._redis.eval(cls._POP_SCRIPT, 1, f"{cls.PREFIX}{kind}", time.time(), limit)
+        return [int(i) for i in ids]
+
+    @classmethod
+    async def seconds_until_next(cls, *kinds: str) -> float | None:
+        """距最早到期项的秒数，队列全空时返回 None"""
+        heads = []
+        for kind in kinds:
+            head = await cls._redis.zrange(f"{cls.PREFIX}{kind}", 0, 0, withscores=True)
+            if head:
+                heads.append(head[0][1])
+        if not heads:
+            return None
+        return max(0.0, min(heads) - time.time())
+
+
+class LeaderLease:
+    """
+    基于 Redis 的主节点租约
+    - 获取: SET key <owner> NX PX ttl
+    - 续约/释放: Lua 脚本比较持有者后 PEXPIRE/DEL，不会误续或误删他人的租约
+    """
+
+    KEY = "scheduler:leader"
+
+    _RENEW_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("PEXPIRE", KEYS[1], ARGV[2])
+end
+return 0
+"""
+    _RELEASE_SCRIPT = """
+if redis.call("GET", KEYS[1]) == ARGV[1] then
+    return redis.call("DEL", KEYS[1])
+end
+return 0
+"""
+
+    def __init__(self, redis, ttl: int):
+        self.redis = redis
+        self.ttl_ms = ttl * 1000
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.held = False
+
+    async def refresh(self) -> bool:
+        """持有时续约，未持有时尝试获取；Redis 异常按未持有处理，宁可漏跑一轮也不重复执行"""
+        try:
+            if self.held:
+                self.held = bool(await self.redis.eval(
+                    self._RENEW_SCRIPT, 1, self.KEY, self.owner, self.ttl_ms,
+                ))
+            else:
+                self.held = bool(await self.redis.set(self.KEY, self.owner, nx=True, px=self.ttl_ms))
+        except Exception as e:
+            logger.warning(f"调度租约刷新失败: {e}")
+            self.held = False
+        return self.held
+
+    async def release(self) -> None:
+        if not self.held:
+            return
+        self.held = False
+        try:
+            await self.redis.eval(self._RELEASE_SCRIPT, 1, self.KEY, self.owner)
+        except Exception as e:
+            logger.warning(f"调度租约释放失败: {e}")
+
 
 class SchedulerService:
     """轻量级异步定时任务调度器"""
 
     _tasks: list[asyncio.Task] = []
+    _lease: LeaderLease | None = None
 
     @classmethod
-    async def start(cls) -> None:
-        """启动所有定时任务"""
+    async def start(cls, redis=None) -> None:
+        """
+        启动所有定时任务
+        :param redis: 传入时启用租约选主；为 None 时（单进程/开发环境）直接执行
+        """
         logger.info("定时任务调度器启动")
-        cls._tasks = [
-            asyncio.create_task(cls._run_periodic("订单超时取消", cls.cancel_expired_orders, interval=300)),
-            asyncio.create_task(cls._run_periodic("提现超时拒绝", cls.reject_expired_withdrawals, interval=600)),
+        cls._tasks = []
+        if redis is not None:
+            cls._lease = LeaderLease(redis, ttl=settings.SCHEDULER_LEASE_TTL)
+            await cls._lease.refresh()
+            cls._tasks.append(asyncio.create_task(cls._keep_lease()))
+        # 启用延时队列后，超时扫描退为低频兜底
+        sweep = DelayedQueue.enabled()
+        if sweep:
+            cls._tasks.append(asyncio.create_task(cls._run_delayed()))
+        cls._tasks += [
+            asyncio.create_task(cls._run_periodic("订单超时取消", cls.cancel_expired_orders, interval=3600 if sweep else 300)),
+            asyncio.create_task(cls._run_periodic("提现超时拒绝", cls.reject_expired_withdrawals, interval=3600 if sweep else 600)),
+            asyncio.create_task(cls._run_periodic("自动派单", cls.dispatch_pending_orders, interval=settings.DISPATCH_INTERVAL)),
+            asyncio.create_task(cls._run_periodic("未读数校准", cls.reconcile_unread_counts, interval=86400)),
+            asyncio.create_task(cls._run_periodic("通知清理", cls.purge_notifications, interval=3600)),
+            asyncio.create_task(cls._run_periodic("余额快照", cls.snapshot_balances, interval=600)),
+            asyncio.create_task(cls._run_periodic("评价汇总校准", cls.rebuild_review_stats, interval=86400)),
         ]
 
     @classmethod
     async def stop(cls) -> None:
-        """停止所有定时任务"""
+        """停止所有定时任务，并主动释放租约以便其他进程立即接管"""
         for task in cls._tasks:
             task.cancel()
         if cls._tasks:
             await asyncio.gather(*cls._tasks, return_exceptions=True)
         cls._tasks.clear()
+        if cls._lease is not None:
+            await cls._lease.release()
+            cls._lease = None
         logger.info("定时任务调度器已停止")
 
+    @classmethod
+    def is_leader(cls) -> bool:
+        return cls._lease is None or cls._lease.held
+
+    @classmethod
+    async def _keep_lease(cls) -> None:
+        """按 TTL 的 1/3 周期续约；未持有租约时同周期尝试接管"""
+        interval = settings.SCHEDULER_LEASE_TTL / 3
+        while True:
+            await asyncio.sleep(interval)
+            was_leader = cls._lease.held
+            if await cls._lease.refresh() != was_leader:
+                logger.info("本进程成为调度主节点" if cls._lease.held else "本进程失去调度主节点身份")
+
     @classmethod
     async def _run_periodic(cls, name: str, func, interval: int) -> None:
         """
@@ -46,6 +219,10 @@ class SchedulerService:
         # 首次启动延迟 10 秒，等待 ORM 初始化完成
         await asyncio.sleep(10)
         while True:
+            if not cls.is_leader():
+                # 非主节点按续约周期检查，接管后尽快开始执行
+                await asyncio.sleep(min(interval, settings.SCHEDULER_LEASE_TTL / 3))
+                continue
             try:
                 count = await func()
                 if count > 0:
@@ -56,76 +233,220 @@ class SchedulerService:
                 logger.error(f"[{name}] 执行失败: {e}")
             await asyncio.sleep(interval)
 
+    # 延时队列名 → 到期处理函数（接收 ids 参数，只处理这些记录）
+    DELAYED_JOBS = {
+        ORDER_EXPIRY_QUEUE: "cancel_expired_orders",
+        WITHDRAWAL_EXPIRY_QUEUE: "reject_expired_withdrawals",
+    }
+    # 队列为空或最早到期项较远时的最长睡眠（秒），用于感知其他进程新入队的任务
+    DELAYED_MAX_SLEEP = 60
+
+    @classmethod
+    async def _run_delayed(cls) -> None:
+        """延时队列消费循环: 处理所有已到期项后，睡眠到下一个到期时间"""
+        await asyncio.sleep(10)
+        while True:
+            if not cls.is_leader():
+                await asyncio.sleep(settings.SCHEDULER_LEASE_TTL / 3)
+                continue
+            wait = cls.DELAYED_MAX_SLEEP
+            try:
+                count = await cls.run_delayed_jobs()
+                if count > 0:
+                    logger.info(f"[延时队列] 处理了 {count} 条到期记录")
+                until = await DelayedQueue.seconds_until_next(*cls.DELAYED_JOBS)
+                if until is not None:
+                    wait = min(until, cls.DELAYED_MAX_SLEEP)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"[延时队列] 执行失败: {e}")
+            await asyncio.sleep(wait)
+
+    @classmethod
+    async def run_delayed_jobs(cls) -> int:
+        """取出所有已到期项并交给对应处理函数，返回处理条数"""
+        count = 0
+        for kind, handler in cls.DELAYED_JOBS.items():
+            while ids := await DelayedQueue.pop_due(kind, settings.SCHEDULER_BATCH_SIZE):
+                count += await getattr(cls, handler)(ids=ids)
+        return count
+
     @staticmethod
-    async def cancel_expired_orders() -> int:
+    async def cancel_expired_orders(batch_size: int | None = None, ids: list[int] | None = None) -> int:
         """
         取消超时未被接单的订单
         规则: pending 状态超过 24 小时 → cancelled
+        按批处理: 每批一个事务，锁定一批 (id, user_id) → 一条 UPDATE → 一条批量 INSERT 通知
+        :param ids: 仅处理这些订单（延时队列到期项）；为空时全表扫描（兜底）
         """
+        from app.common.transactions import in_transaction
+
         from app.modules.orders.model import Order
         from app.modules.notifications.service import NotificationService
 
-        cutoff = datetime.utcnow() - timedelta(hours=24)
-        expired_orders = await Order.filter(
-            status="pending",
-            date__lt=cutoff,
-        )
+        batch_size = batch_size or settings.SCHEDULER_BATCH_SIZE
+        # 留 1 秒余量，抵消延时队列时间戳与数据库时间的精度差
+        cutoff = datetime.utcnow() - ORDER_EXPIRE_AFTER + timedelta(seconds=1)
+        scope = {"id__in": ids} if ids is not None else {}
 
         count = 0
-        for order in expired_orders:
-            order.status = "cancelled"
-            await order.save()
-            count += 1
-
-            # 通知用户订单已自动取消
-            await NotificationService.send(
-                user_id=order.user_id,
-                title="订单已自动取消",
-                content=f"您的回收订单#{order.id}因超过24小时未被接单，已自动取消。您可以重新预约。",
-                type="order",
-                related_entity_type="order",
-                related_entity_id=order.id,
-            )
+        while True:
+            async with in_transaction():
+                # SKIP LOCKED: 正被抢单事务锁住的行留给下一轮，避免互相等待
+                rows = await (
+                    Order.filter(status="pending", date__lt=cutoff, **scope)
+                    .order_by("id")
+                    .limit(batch_size)
+                    .select_for_update(skip_locked=True)
+                    .values_list("id", "user_id")
+                )
+                if not rows:
+                    break
+                await Order.filter(id__in=[oid for oid, _ in rows]).update(status="cancelled")
+
+                # 通知用户订单已自动取消
+                await NotificationService.send_many([
+                    {
+                        "user_id": user_id,
+                        "title": "订单已自动取消",
+                        "content": f"您的回收订单#{oid}因超过24小时未被接单，已自动取消。您可以重新预约。",
+                        "type": "order",
+                        "related_entity_type": "order",
+                        "related_entity_id": oid,
+                    }
+                    for oid, user_id in rows
+                ])
+            count += len(rows)
+            if len(rows) < batch_size:
+                break
 
         return count
 
     @staticmethod
-    async def reject_expired_withdrawals() -> int:
+    async def dispatch_pending_orders() -> int:
+        """
+        自动派单
+        规则: 在抢单大厅等待超过 DISPATCH_MIN_WAIT_MINUTES 仍无人接的订单，
+        批量指派给派单半径内、近期上报过位置且仍有接单余量的回收员
+        """
+        from app.modules.orders.dispatch import DispatchService
+
+        return await DispatchService.run()
+
+    @staticmethod
+    async def reconcile_unread_counts() -> int:
+        """
+        校准用户未读通知计数
+        规则: 以通知表实际未读条数为准，修正因异常中断等原因产生的偏差
+        """
+        from app.modules.notifications.service import NotificationService
+
+        return await NotificationService.rebuild_unread_counts()
+
+    @staticmethod
+    async def snapshot_balances() -> int:
+        """
+        余额快照
+        规则: 把上次快照之后的账本流水按账户汇总滚入快照，余额查询只需累加快照之后的少量流水
+        """
+        from app.modules.ledger.service import LedgerService
+
+        return await LedgerService.take_snapshots()
+
+    @staticmethod
+    async def rebuild_review_stats() -> int:
+        """
+        校准回收员评价汇总
+        规则: 以 reviews 表为准重建评分总和、星级分布与标签频次，并同步回收员评分
+        """
+        from app.modules.reviews.service import ReviewStatsService
+
+        return await ReviewStatsService.rebuild()
+
+    @staticmethod
+    async def purge_notifications(batch_size: int | None = None) -> int:
+        """
+        通知保留策略
+        规则: 已读且超过 NOTIFICATION_RETENTION_DAYS 天的通知删除；
+        每个用户最多保留 NOTIFICATION_MAX_PER_USER 条，超出的最旧记录删除
+        小批量按主键删除，不长时间持有锁
+        """
+        from app.modules.notifications.service import NotificationService
+
+        batch_size = batch_size or settings.SCHEDULER_BATCH_SIZE
+        start = time.perf_counter()
+        cutoff = datetime.utcnow() - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+        expired = await NotificationService.purge_read_before(cutoff, batch_size)
+        capped = await NotificationService.purge_over_cap(settings.NOTIFICATION_MAX_PER_USER, batch_size)
+        if expired or capped:
+            logger.info(
+                f"[通知清理] 删除 {expired + capped} 条（过期已读 {expired}，超出上限 {capped}），"
+                f"耗时 {time.perf_counter() - start:.2f}s"
+            )
+        return expired + capped
+
+    @staticmethod
+    async def reject_expired_withdrawals(batch_size: int | None = None, ids: list[int] | None = None) -> int:
         """
         拒绝超时未审核的提现申请
         规则: pending 状态超过 72 小时 → rejected
         同时退还用户余额
+        按批处理，每批一个事务: 锁定一批 → 一条 UPDATE 改状态 → 一次批量写入退款流水
+        → 批量写入审计日志与通知；进程中途退出时已提交的批次完整，未提交的批次整体回滚
+        :param ids: 仅处理这些提现（延时队列到期项）；为空时全表扫描（兜底）
         """
+        from app.common.transactions import in_transaction
+
+        from app.common.audit_log import AuditLog
         from app.modules.withdrawals.model import Withdrawal
-        from app.modules.users.model import User
+        from app.modules.withdrawals.service import WithdrawalService
         from app.modules.notifications.service import NotificationService
 
-        cutoff = datetime.utcnow() - timedelta(hours=72)
-        expired_withdrawals = await Withdrawal.filter(
-            status="pending",
-            request_date__lt=cutoff,
-        )
+        batch_size = batch_size or settings.SCHEDULER_BATCH_SIZE
+        cutoff = datetime.utcnow() - WITHDRAWAL_EXPIRE_AFTER + timedelta(seconds=1)
+        scope = {"id__in": ids} if ids is not None else {}
 
         count = 0
-        for w in expired_withdrawals:
-            w.status = "rejected"
-            await w.save()
-
-            # 退还用户余额
-            user = await User.get(id=w.user_id)
-            user.balance += w.amount
-            await user.save()
-
-            count += 1
-
-            # 通知用户提现已自动拒绝
-            await NotificationService.send(
-                user_id=w.user_id,
-                title="提现申请已过期",
-                content=f"您的提现申请（¥{float(w.amount):.2f}）因超过72小时未审核，已自动退回。金额已返还至您的账户余额。",
-                type="withdrawal",
-                related_entity_type="withdrawal",
-                related_entity_id=w.id,
-            )
+        while True:
+            async with in_transaction():
+                # 行锁防止与管理员审批并发时重复处理；正在审批的行留给下一轮
+                rows = await (
+                    Withdrawal.filter(status="pending", request_date__lt=cutoff, **scope)
+                    .order_by("id")
+                    .limit(batch_size)
+                    .select_for_update(skip_locked=True)
+                    .values_list("id", "user_id", "amount")
+                )
+                if not rows:
+                    break
+                await Withdrawal.filter(id__in=[wid for wid, _, _ in rows]).update(status="rejected")
+
+                # 退还用户余额（每笔一条流水，批量写入）
+                await WithdrawalService.refund_balances(rows)
+
+                await AuditLog.bulk_create([
+                    AuditLog(
+                        entity_type="withdrawal", entity_id=wid,
+                        action="rejected", new_value="超时未审核，自动拒绝",
+                        operator_type="system",
+                    )
+                    for wid, _, _ in rows
+                ])
+                # 通知用户提现已自动拒绝
+                await NotificationService.send_many([
+                    {
+                        "user_id": user_id,
+                        "title": "提现申请已过期",
+                        "content": f"您的提现申请（¥{float(amount):.2f}）因超过72小时未审核，已自动退回。金额已返还至您的账户余额。",
+                        "type": "withdrawal",
+                        "related_entity_type": "withdrawal",
+                        "related_entity_id": wid,
+                    }
+                    for wid, user_id, amount in rows
+                ])
+            count += len(rows)
+            if len(rows) < batch_size:
+                break
 
         return count
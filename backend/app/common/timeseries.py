@@ -0,0 +1,65 @@
+"""
+时间序列聚合工具
+职责: 将查询集按日期分桶做一次 GROUP BY，并补齐没有数据的日期
+供管理后台大屏等按天统计的场景复用，避免逐天循环查询
+"""
+from datetime import date, datetime, timedelta
+
+from tortoise import fields
+from tortoise.expressions import RawSQL
+from tortoise.queryset import QuerySet
+
+
+def date_range(start: date, days: int) -> list[date]:
+    """返回从 start 开始的连续 days 天"""
+    return [start + timedelta(days=i) for i in range(days)]
+
+
+def day_bucket(field: str) -> RawSQL:
+    """按天分桶表达式，SQLite / PostgreSQL 通用"""
+    return RawSQL(f'DATE("{field}")')
+
+
+def bucket_key(value) -> str:
+    """统一分桶键: PostgreSQL 返回 date 对象，SQLite 返回 'YYYY-MM-DD' 字符串"""
+    if hasattr(value, "isoformat"):
+        return value.isoformat()[:10]
+    return str(value)[:10]
+
+
+async def aggregate_by_day(
+    queryset: QuerySet,
+    field: str,
+    start: date,
+    days: int,
+    **aggregates,
+) -> list[dict]:
+    """
+    按天分桶聚合（单条 GROUP BY 查询）
+    :param queryset: 基础查询集（可预先附加过滤条件）
+    :param field: 用于分桶的日期时间字段名
+    :param start: 起始日期（含）
+    :param days: 天数
+    :param aggregates: 聚合表达式，如 total=Count("id")
+    :return: 每天一条 {"date": "YYYY-MM-DD", <聚合名>: 值}，无数据的日期补 0
+    """
+    lower, upper = start, start + timedelta(days=days)
+    # DatetimeField 需以 datetime 作边界，DateField 直接使用 date
+    if isinstance(queryset.model._meta.fields_map[field], fields.DatetimeField):
+        lower = datetime.combine(lower, datetime.min.time())
+        upper = datetime.combine(upper, datetime.min.time())
+
+    rows = (
+        await queryset.filter(**{f"{field}__gte": lower, f"{field}__lt": upper})
+        .annotate(bucket=day_bucket(field), **aggregates)
+        .group_by("bucket")
+        .values("bucket", *aggregates)
+    )
+    by_day = {bucket_key(r["bucket"]): r for r in rows}
+
+    result = []
+    for day in date_range(start, days):
+        key = day.isoformat()
+        row = by_day.get(key, {})
+        result.append({"date": key, **{name: row.get(name) or 0 for name in aggregates}})
+    return result
@@ -0,0 +1,55 @@
+"""
+事务与提交后回调
+职责: 缓存失效、实时推送等外部副作用推迟到最外层事务提交之后执行
+技术方案:
+- in_transaction / atomic 与 tortoise 同名同参，业务代码统一从这里导入
+- 每层事务持有一个回调列表（ContextVar），嵌套事务（savepoint）成功退出时并入外层，
+  回滚则整体丢弃；最外层提交后按登记顺序执行
+- 不在事务内调用 after_commit 时立即执行
+"""
+import functools
+from collections.abc import Awaitable, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+
+from tortoise.transactions import in_transaction as _in_transaction
+
+_hooks: ContextVar[list | None] = ContextVar("after_commit_hooks", default=None)
+
+
+@asynccontextmanager
+async def in_transaction(connection_name: str | None = None):
+    """开启事务（嵌套时为 savepoint），最外层提交后执行期间登记的回调"""
+    parent = _hooks.get()
+    hooks: list = []
+    token = _hooks.set(hooks)
+    try:
+        async with _in_transaction(connection_name) as connection:
+            yield connection
+    finally:
+        _hooks.reset(token)
+    if parent is not None:
+        parent.extend(hooks)
+        return
+    for callback, args in hooks:
+        await callback(*args)
+
+
+def atomic(connection_name: str | None = None):
+    """事务装饰器，语义同 in_transaction"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            async with in_transaction(connection_name):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def after_commit(callback: Callable[..., Awaitable], *args) -> None:
+    """登记提交后回调；当前不在事务内时立即执行"""
+    hooks = _hooks.get()
+    if hooks is None:
+        await callback(*args)
+    else:
+        hooks.append((callback, args))
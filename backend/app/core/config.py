@@ -15,6 +15,23 @@ class Settings(BaseSettings):
     ADMIN_PASSWORD: str = "admin"
     # ⚠️3修复: 单笔提现上限（元）
     MAX_WITHDRAWAL_AMOUNT: float = 5000.0
+    # 自动派单: 执行间隔（秒）、订单进入派单前在抢单大厅的等待时间（分钟）、
+    # 最大派单距离（公里）、每个在手订单折算的距离惩罚（公里）
+    DISPATCH_INTERVAL: int = 60
+    DISPATCH_MIN_WAIT_MINUTES: int = 10
+    DISPATCH_MAX_DISTANCE_KM: float = 10.0
+    DISPATCH_LOAD_PENALTY_KM: float = 1.0
+    # 回收员位置有效期（分钟），超过该时长未上报位置的回收员不参与自动派单
+    DISPATCH_LOCATION_MAX_AGE_MINUTES: int = 30
+    # 定时任务批处理: 每个事务处理的记录数上限，积压再多内存占用也保持恒定
+    SCHEDULER_BATCH_SIZE: int = 500
+    # 定时任务是否随 API 进程启动；独立部署调度进程（python -m app.scheduler）时设为 False
+    SCHEDULER_ENABLED: bool = True
+    # 调度主节点租约时长（秒），主节点失联后最多经过该时长由其他进程接管
+    SCHEDULER_LEASE_TTL: int = 30
+    # 通知保留策略: 已读通知保留天数、每个用户最多保留的通知条数
+    NOTIFICATION_RETENTION_DAYS: int = 90
+    NOTIFICATION_MAX_PER_USER: int = 500
     
     class Config:
         env_file = ".env"
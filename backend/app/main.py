@@ -11,9 +11,13 @@ from fastapi_admin.app import app as admin_app
 from fastapi_admin.providers.login import UsernamePasswordProvider
 from tortoise.contrib.fastapi import register_tortoise
 
+from app.common.cache import ResponseCache
 from app.common.logging_middleware import RequestLoggingMiddleware
-from app.common.scheduler import SchedulerService
+from app.common.scheduler import DelayedQueue, SchedulerService
 from app.core.config import settings
+from app.modules.collectors.service import CollectorEarningsService
+from app.modules.notifications.stream import NotificationHub
+from app.modules.recycle_points.index import RecyclePointIndex
 # 使用新的模块化路由注册
 from app.registry import router as api_router
 # 导入统一模型（确保 Tortoise ORM 能发现所有模型）
@@ -55,13 +59,30 @@ async def lifespan(app: FastAPI):
         redis=redis,
     )
 
-    # T1: 启动定时任务调度器（订单超时取消、提现超时拒绝）
-    await SchedulerService.start()
+    # 路由级响应缓存复用同一 Redis 连接
+    ResponseCache.init(redis)
+    # 订单/提现超时的延时队列
+    DelayedQueue.init(redis)
+    # 回收员收入统计的已结束周期缓存
+    CollectorEarningsService.init(redis)
+    # 通知实时推送: 订阅 Redis 频道，分发到本进程的 SSE 连接
+    await NotificationHub.start(redis)
+    # 回收点空间索引（附近回收点查询）
+    await RecyclePointIndex.load()
+
+    # T1: 启动定时任务调度器（订单超时取消、提现超时拒绝），多 worker 间通过 Redis 租约选主
+    if settings.SCHEDULER_ENABLED:
+        await SchedulerService.start(redis)
 
     yield
 
     # T1: 停止定时任务调度器
-    await SchedulerService.stop()
+    if settings.SCHEDULER_ENABLED:
+        await SchedulerService.stop()
+    ResponseCache.close()
+    DelayedQueue.close()
+    CollectorEarningsService.close()
+    await NotificationHub.stop()
     await redis.close()
 
 
@@ -3,13 +3,13 @@
 所有模块的 model 在此集中导出，确保 ForeignKey 字符串引用能正确解析
 """
 # 用户模块
-from app.modules.users.model import User
+from app.modules.users.model import User, UserStats
 # 物料模块（含 Material, MaterialHistory, PricingRule）
 from app.modules.materials.model import Material, MaterialHistory, PricingRule
 # 回收员模块
 from app.modules.collectors.model import Collector
-# 订单模块
-from app.modules.orders.model import Order
+# 订单模块（含 Order, OrderDailyRollup）
+from app.modules.orders.model import Order, OrderDailyRollup
 # 提现模块
 from app.modules.withdrawals.model import Withdrawal
 # 地址模块
@@ -21,11 +21,13 @@ from app.modules.recycle_points.model import RecyclePoint
 # 系统配置模块
 from app.modules.config.model import SystemConfig
 # 通知模块
-from app.modules.notifications.model import Notification
+from app.modules.notifications.model import BroadcastNotification, Notification, NotificationCounter
 # 评价模块
-from app.modules.reviews.model import Review
+from app.modules.reviews.model import CollectorReviewStats, Review
 # 积分商城模块
 from app.modules.shop.model import ShopProduct, PointsExchange
+# 账本模块
+from app.modules.ledger.model import BalanceSnapshot, LedgerEntry
 # 公共模块
 from app.common.audit_log import AuditLog
 # 反馈模块
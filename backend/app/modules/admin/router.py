@@ -2,15 +2,15 @@
 from datetime import date, datetime, timedelta
 
 from fastapi import APIRouter, Depends
-from tortoise.functions import Sum
 
 from app.common.audit_log import AuditLog
+from app.common.cache import ResponseCache
 from app.core.config import settings
-from app.modules.orders.model import Order
 from app.modules.withdrawals.model import Withdrawal
 
 from .dependencies import _generate_admin_token, require_admin
 from .schemas import AdminLoginSchema
+from .service import AdminStatsService
 
 router = APIRouter(tags=["admin"])
 
@@ -45,23 +45,10 @@ async def get_audit_logs(limit: int = 200, offset: int = 0):
 
 @router.get("/admin/stats", dependencies=[Depends(require_admin)])
 async def get_admin_stats():
-    """管理后台统计数据"""
-    today_start = datetime.combine(date.today(), datetime.min.time())
-    today_end = today_start + timedelta(days=1)
-
-    revenue_data = (
-        await Order.filter(status="completed", date__gte=today_start, date__lt=today_end)
-        .annotate(total=Sum("amount_final"))
-        .values("total")
-    )
-    revenue_total = revenue_data[0]["total"] if revenue_data and revenue_data[0]["total"] else 0
-
-    weight_data = (
-        await Order.filter(status="completed", date__gte=today_start, date__lt=today_end)
-        .annotate(total=Sum("weight_actual"))
-        .values("total")
-    )
-    weight_total = weight_data[0]["total"] if weight_data and weight_data[0]["total"] else 0
+    """管理后台统计数据（金额/重量读日汇总表）"""
+    today = date.today()
+    totals = await AdminStatsService.get_completed_totals(since=today)
+    revenue_total, weight_total = totals["revenue"], totals["weight"]
 
     pending_withdrawals = await Withdrawal.filter(status="pending").count()
 
@@ -69,26 +56,15 @@ async def get_admin_stats():
     weight_label = "今日回收重量"
     # 今日无数据时回退到近 7 日
     if not revenue_total and not weight_total:
-        fallback_start = datetime.now() - timedelta(days=7)
-        revenue_7d = (
-            await Order.filter(status="completed", date__gte=fallback_start)
-            .annotate(total=Sum("amount_final"))
-            .values("total")
-        )
-        weight_7d = (
-            await Order.filter(status="completed", date__gte=fallback_start)
-            .annotate(total=Sum("weight_actual"))
-            .values("total")
-        )
-        revenue_total = revenue_7d[0]["total"] if revenue_7d and revenue_7d[0]["total"] else 0
-        weight_total = weight_7d[0]["total"] if weight_7d and weight_7d[0]["total"] else 0
+        totals = await AdminStatsService.get_completed_totals(since=today - timedelta(days=7))
+        revenue_total, weight_total = totals["revenue"], totals["weight"]
         revenue_label = "近7日成交额"
         weight_label = "近7日回收重量"
 
     return {
-        "revenue": float(revenue_total),
+        "revenue": revenue_total,
         "revenueLabel": revenue_label,
-        "weight": float(weight_total),
+        "weight": weight_total,
         "weightLabel": weight_label,
         "pendingCount": pending_withdrawals,
         "pendingLabel": "待审核提现",
@@ -96,14 +72,10 @@ async def get_admin_stats():
 
 
 @router.get("/admin/chart", dependencies=[Depends(require_admin)])
+@ResponseCache.cached(ttl=300, tags=("orders",))
 async def get_admin_chart():
-    """管理后台图表数据 — 按物料类别统计回收重量"""
-    data = (
-        await Order.filter(status="completed")
-        .annotate(total_weight=Sum("weight_actual"))
-        .group_by("material__category")
-        .values("material__category", "total_weight")
-    )
+    """管理后台图表数据 — 按物料类别统计回收重量（读日汇总表）"""
+    data = await AdminStatsService.get_category_weights()
 
     cat_map = {
         "Paper": "废纸", "Plastic": "塑料", "Metal": "金属",
@@ -111,7 +83,7 @@ async def get_admin_chart():
     }
 
     return [
-        {"name": cat_map.get(d["material__category"], d["material__category"]), "weight": float(d["total_weight"] or 0)}
+        {"name": cat_map.get(d["category"], d["category"]), "weight": float(d["weight"] or 0)}
         for d in data
     ]
 
@@ -124,103 +96,25 @@ async def get_dashboard_data():
     T4: 综合数据大屏 — 一次请求返回所有统计数据
     包含: 概览指标、订单趋势、收入趋势、用户增长、物料分布
     """
-    from app.modules.users.model import User
-    from app.modules.collectors.model import Collector
-    from app.modules.materials.model import Material
-
     now = datetime.now()
-    days_30 = now - timedelta(days=30)
     days_7 = now - timedelta(days=7)
 
-    # 1. 概览指标
-    total_users = await User.all().count()
-    total_collectors = await Collector.all().count()
-    total_orders = await Order.all().count()
-    completed_orders = await Order.filter(status="completed").count()
-    pending_orders = await Order.filter(status="pending").count()
-    pending_withdrawals = await Withdrawal.filter(status="pending").count()
+    # 1. 概览指标（单条条件聚合查询）
+    overview = await AdminStatsService.get_overview(new_user_since=days_7)
 
-    total_revenue_data = (
-        await Order.filter(status="completed")
-        .annotate(total=Sum("amount_final"))
-        .values("total")
-    )
-    total_revenue = float(total_revenue_data[0]["total"] or 0) if total_revenue_data else 0
-
-    total_weight_data = (
-        await Order.filter(status="completed")
-        .annotate(total=Sum("weight_actual"))
-        .values("total")
-    )
-    total_weight = float(total_weight_data[0]["total"] or 0) if total_weight_data else 0
-
-    # 2. 近 30 天订单趋势（按天分组）
-    order_trend = []
-    for i in range(30):
-        day = (now - timedelta(days=29 - i)).date()
-        day_start = datetime.combine(day, datetime.min.time())
-        day_end = day_start + timedelta(days=1)
-        count = await Order.filter(date__gte=day_start, date__lt=day_end).count()
-        completed = await Order.filter(
-            status="completed", date__gte=day_start, date__lt=day_end
-        ).count()
-        order_trend.append({
-            "date": day.isoformat(),
-            "total": count,
-            "completed": completed,
-        })
-
-    # 3. 近 30 天收入趋势
-    revenue_trend = []
-    for i in range(30):
-        day = (now - timedelta(days=29 - i)).date()
-        day_start = datetime.combine(day, datetime.min.time())
-        day_end = day_start + timedelta(days=1)
-        rev = (
-            await Order.filter(status="completed", date__gte=day_start, date__lt=day_end)
-            .annotate(total=Sum("amount_final"))
-            .values("total")
-        )
-        revenue_trend.append({
-            "date": day.isoformat(),
-            "revenue": float(rev[0]["total"] or 0) if rev else 0,
-        })
-
-    # 4. 近 7 天新增用户
-    new_users_7d = await User.filter(created_at__gte=days_7).count()
-
-    # 5. 物料分布（按类别统计已完成订单重量）
-    material_dist = (
-        await Order.filter(status="completed")
-        .prefetch_related("material")
-        .annotate(total_weight=Sum("weight_actual"))
-        .group_by("material_id")
-        .values("material_id", "total_weight")
-    )
-    # 获取物料名称映射
-    materials = await Material.all()
-    mat_map = {m.id: m.name for m in materials}
-    material_distribution = [
-        {
-            "name": mat_map.get(d["material_id"], f"物料#{d['material_id']}"),
-            "weight": float(d["total_weight"] or 0),
-        }
-        for d in material_dist
-        if d["total_weight"]
+    # 2/3. 近 30 天订单与收入趋势（按天 GROUP BY）
+    trend = await AdminStatsService.get_order_trend(start=(now - timedelta(days=29)).date(), days=30)
+    order_trend = [
+        {"date": t["date"], "total": t["total"], "completed": t["completed"]}
+        for t in trend
     ]
+    revenue_trend = [{"date": t["date"], "revenue": float(t["revenue"])} for t in trend]
+
+    # 4. 物料分布（按物料统计已完成订单重量，读日汇总表）
+    material_distribution = await AdminStatsService.get_material_weights()
 
     return {
-        "overview": {
-            "total_users": total_users,
-            "total_collectors": total_collectors,
-            "total_orders": total_orders,
-            "completed_orders": completed_orders,
-            "pending_orders": pending_orders,
-            "pending_withdrawals": pending_withdrawals,
-            "total_revenue": total_revenue,
-            "total_weight": total_weight,
-            "new_users_7d": new_users_7d,
-        },
+        "overview": overview,
         "order_trend": order_trend,
         "revenue_trend": revenue_trend,
         "material_distribution": material_distribution,
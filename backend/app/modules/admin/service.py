@@ -0,0 +1,115 @@
+"""
+管理后台统计 Service — 集合式聚合查询，避免逐天/逐项往返数据库
+金额、重量类统计读取日汇总表 order_daily_rollups，开销取决于天数而非订单数
+"""
+from datetime import date, datetime
+
+from tortoise.expressions import Q, Subquery
+from tortoise.functions import Count, Sum
+
+from app.common.timeseries import aggregate_by_day
+from app.modules.collectors.model import Collector
+from app.modules.materials.model import Material
+from app.modules.orders.model import Order, OrderDailyRollup
+from app.modules.users.model import User
+from app.modules.withdrawals.model import Withdrawal
+
+
+class AdminStatsService:
+
+    @staticmethod
+    async def get_overview(new_user_since: datetime) -> dict:
+        """
+        概览指标 — 一条 SQL 完成:
+        订单计数使用条件聚合，金额/重量取自日汇总，其余表计数使用标量子查询
+        """
+        row = await (
+            Order.annotate(
+                total_orders=Count("id"),
+                completed_orders=Count("id", _filter=Q(status="completed")),
+                pending_orders=Count("id", _filter=Q(status="pending")),
+                total_revenue=Subquery(OrderDailyRollup.annotate(s=Sum("total_amount")).values("s")),
+                total_weight=Subquery(OrderDailyRollup.annotate(s=Sum("total_weight")).values("s")),
+                total_users=Subquery(User.annotate(c=Count("id")).values("c")),
+                total_collectors=Subquery(Collector.annotate(c=Count("id")).values("c")),
+                pending_withdrawals=Subquery(
+                    Withdrawal.filter(status="pending").annotate(c=Count("id")).values("c")
+                ),
+                new_users_7d=Subquery(
+                    User.filter(created_at__gte=new_user_since).annotate(c=Count("id")).values("c")
+                ),
+            )
+            .first()
+            .values(
+                "total_users", "total_collectors", "total_orders", "completed_orders",
+                "pending_orders", "pending_withdrawals", "total_revenue", "total_weight",
+                "new_users_7d",
+            )
+        )
+        return {
+            "total_users": row["total_users"] or 0,
+            "total_collectors": row["total_collectors"] or 0,
+            "total_orders": row["total_orders"] or 0,
+            "completed_orders": row["completed_orders"] or 0,
+            "pending_orders": row["pending_orders"] or 0,
+            "pending_withdrawals": row["pending_withdrawals"] or 0,
+            "total_revenue": float(row["total_revenue"] or 0),
+            "total_weight": float(row["total_weight"] or 0),
+            "new_users_7d": row["new_users_7d"] or 0,
+        }
+
+    @staticmethod
+    async def get_completed_totals(since: date | None = None) -> dict:
+        """已完成订单成交额与回收重量合计（读日汇总）"""
+        qs = OrderDailyRollup.all()
+        if since is not None:
+            qs = qs.filter(day__gte=since)
+        row = await (
+            qs.annotate(revenue=Sum("total_amount"), weight=Sum("total_weight"))
+            .first()
+            .values("revenue", "weight")
+        )
+        return {
+            "revenue": float((row or {}).get("revenue") or 0),
+            "weight": float((row or {}).get("weight") or 0),
+        }
+
+    @staticmethod
+    async def get_order_trend(start: date, days: int) -> list[dict]:
+        """
+        按天统计订单总数、完成数、成交额（空白日期补 0）
+        订单总数按订单表 date 索引范围 GROUP BY，完成数与成交额读日汇总
+        """
+        created = await aggregate_by_day(Order.all(), "date", start, days, total=Count("id"))
+        completed = await aggregate_by_day(
+            OrderDailyRollup.all(), "day", start, days,
+            completed=Sum("order_count"),
+            revenue=Sum("total_amount"),
+        )
+        return [{**c, **d} for c, d in zip(created, completed)]
+
+    @staticmethod
+    async def get_category_weights() -> list[dict]:
+        """按物料类别汇总回收重量（读日汇总）"""
+        return await (
+            OrderDailyRollup.annotate(weight=Sum("total_weight"))
+            .group_by("category")
+            .values("category", "weight")
+        )
+
+    @staticmethod
+    async def get_material_weights() -> list[dict]:
+        """按物料汇总回收重量（读日汇总），附带物料名称"""
+        rows = await (
+            OrderDailyRollup.annotate(weight=Sum("total_weight"))
+            .group_by("material_id")
+            .values("material_id", "weight")
+        )
+        names = dict(
+            await Material.filter(id__in=[r["material_id"] for r in rows]).values_list("id", "name")
+        )
+        return [
+            {"name": names.get(r["material_id"], f"物料#{r['material_id']}"), "weight": float(r["weight"] or 0)}
+            for r in rows
+            if r["weight"]
+        ]
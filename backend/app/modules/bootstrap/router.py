@@ -0,0 +1,46 @@
+"""
+启动聚合路由
+小程序冷启动时用一次请求代替用户信息、统计、积分、未读数、首页配置、物料列表等多次串行请求
+登录仍需单独调用 /auth/login（需要微信临时 code）
+"""
+from fastapi import APIRouter, Header
+
+from app.modules.collectors.router import get_collector_stats
+from app.modules.config.router import get_config
+from app.modules.materials.router import get_materials
+from app.modules.notifications.router import get_unread_count
+from app.modules.orders.model import Order
+from app.modules.orders.router import ORDER_LIST_COLUMNS
+from app.modules.users.router import get_user, get_user_points, get_user_stats
+
+from .service import BootstrapService
+
+router = APIRouter(tags=["bootstrap"])
+
+
+@router.get("/bootstrap")
+async def bootstrap_user(user_id: int, if_none_match: str | None = Header(None)):
+    """用户端启动数据"""
+    return await BootstrapService.gather({
+        "user": get_user(user_id),
+        "stats": get_user_stats(user_id),
+        "points": get_user_points(user_id),
+        "unread_count": get_unread_count(user_id),
+        "home_config": get_config(key="home_page"),
+        # 参数与 GET /materials 默认值一致，共用同一份响应缓存
+        "materials": get_materials(limit=100, offset=0),
+    }, if_none_match)
+
+
+@router.get("/bootstrap/collector")
+async def bootstrap_collector(
+    collector_id: int, order_limit: int = 20, if_none_match: str | None = Header(None),
+):
+    """回收员端启动数据: 统计、抢单大厅首屏订单、回收员首页配置"""
+    return await BootstrapService.gather({
+        "stats": get_collector_stats(collector_id),
+        "pending_orders": ORDER_LIST_COLUMNS.fetch(
+            Order.filter(status="pending").order_by("-date", "-id").limit(order_limit)
+        ),
+        "home_config": get_config(key="collector_home"),
+    }, if_none_match)
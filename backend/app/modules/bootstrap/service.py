@@ -0,0 +1,57 @@
+"""
+启动聚合 Service
+职责: 把小程序启动时串行调用的多个接口合并为一次请求
+技术方案:
+- 各分区的取数协程用 asyncio.gather 并发执行，耗时取决于最慢的分区而不是总和
+- 每个分区按内容计算 ETag；客户端在 If-None-Match 中带上已缓存分区的 ETag，
+  未变化的分区只返回 ETag 不返回数据，全部未变化时整体返回 304
+"""
+import asyncio
+import hashlib
+import json
+from typing import Awaitable
+
+from fastapi import Response
+from fastapi.encoders import jsonable_encoder
+
+from app.common.projection import json_response
+
+
+class BootstrapService:
+
+    @staticmethod
+    def section_etag(name: str, data) -> str:
+        """分区 ETag: 分区名 + 内容摘要，不同分区的 ETag 不会相同"""
+        raw = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+        return f'"{name}-{hashlib.sha1(raw.encode()).hexdigest()[:16]}"'
+
+    @staticmethod
+    def parse_if_none_match(header: str | None) -> set[str]:
+        if not header:
+            return set()
+        return {tag.strip().removeprefix("W/") for tag in header.split(",") if tag.strip()}
+
+    @staticmethod
+    async def gather(sections: dict[str, Awaitable], if_none_match: str | None = None) -> Response:
+        """
+        并发取回各分区并组装响应
+        :param sections: 分区名 → 取数协程
+        :param if_none_match: 客户端已缓存分区的 ETag 列表（逗号分隔）
+        :return: {"sections": {名称: {"etag": ..., "data": ...} | {"etag": ..., "not_modified": true}}}
+        """
+        values = await asyncio.gather(*sections.values())
+        known = BootstrapService.parse_if_none_match(if_none_match)
+
+        payload, etags = {}, []
+        for name, value in zip(sections, values):
+            data = jsonable_encoder(value)
+            etag = BootstrapService.section_etag(name, data)
+            etags.append(etag)
+            payload[name] = {"etag": etag, "not_modified": True} if etag in known else {"etag": etag, "data": data}
+
+        overall = f'"{hashlib.sha1(",".join(etags).encode()).hexdigest()[:16]}"'
+        if all(section.get("not_modified") for section in payload.values()) or overall in known:
+            return Response(status_code=304, headers={"ETag": overall})
+        response = json_response({"sections": payload})
+        response.headers["ETag"] = overall
+        return response
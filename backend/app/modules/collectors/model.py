@@ -10,6 +10,12 @@ class Collector(models.Model):
     balance = fields.DecimalField(max_digits=10, decimal_places=2, default=0.00)
     rating = fields.FloatField(default=5.0)
     status = fields.CharField(max_length=20, default="active")
+    # 最近上报位置（自动派单使用）
+    latitude = fields.FloatField(null=True)
+    longitude = fields.FloatField(null=True)
+    location_updated_at = fields.DatetimeField(null=True)
+    # 同时在手（已接未完成）订单上限
+    capacity = fields.IntField(default=5)
 
     class Meta:
         table = "collectors"
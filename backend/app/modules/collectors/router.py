@@ -1,9 +1,12 @@
 """回收员路由"""
 import datetime
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query
 
 from .model import Collector
+from .schemas import CollectorLocationSchema
+from .service import CollectorEarningsService
+from app.modules.ledger.service import LedgerService
 from app.modules.orders.model import Order
 
 router = APIRouter(tags=["collectors"])
@@ -15,19 +18,44 @@ async def get_collector_stats(collector_id: int):
     if not collector:
         raise HTTPException(status_code=404, detail="Collector not found")
 
-    now = datetime.datetime.now()
+    # 本月按 date 区间过滤，命中 (collector_id, status, date) 索引
+    month_start = datetime.datetime.combine(datetime.date.today().replace(day=1), datetime.time.min)
     month_orders = await Order.filter(
-        collector_id=collector_id, status="completed",
-        date__year=now.year, date__month=now.month,
+        collector_id=collector_id, status="completed", date__gte=month_start,
     ).count()
 
     return {
-        "balance": float(collector.balance),
+        "balance": float(await LedgerService.balance("collector", collector_id, "balance")),
         "rating": collector.rating,
         "month_count": month_orders,
     }
 
 
+@router.get("/collectors/{collector_id}/earnings")
+async def get_collector_earnings(
+    collector_id: int,
+    granularity: str = "day",
+    start: datetime.date | None = Query(None, alias="from"),
+    end: datetime.date | None = Query(None, alias="to"),
+):
+    """回收员收入统计: 按日/周/月的完成单量、回收重量与佣金收入序列"""
+    if not await Collector.exists(id=collector_id):
+        raise HTTPException(status_code=404, detail="Collector not found")
+    return await CollectorEarningsService.get_series(collector_id, granularity, start, end)
+
+
+@router.put("/collectors/{collector_id}/location")
+async def update_collector_location(collector_id: int, data: CollectorLocationSchema):
+    """回收员 App 上报当前位置，供自动派单使用"""
+    updated = await Collector.filter(id=collector_id).update(
+        latitude=data.latitude, longitude=data.longitude,
+        location_updated_at=datetime.datetime.utcnow(),
+    )
+    if not updated:
+        raise HTTPException(status_code=404, detail="Collector not found")
+    return {"message": "位置已更新"}
+
+
 @router.get("/collectors")
 async def get_collectors(limit: int = 200, offset: int = 0):
     collectors = await Collector.all().order_by("id").limit(limit).offset(offset)
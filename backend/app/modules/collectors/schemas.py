@@ -0,0 +1,7 @@
+"""回收员 Schema"""
+from pydantic import BaseModel, Field
+
+
+class CollectorLocationSchema(BaseModel):
+    latitude: float = Field(..., ge=-90.0, le=90.0, description="纬度")
+    longitude: float = Field(..., ge=-180.0, le=180.0, description="经度")
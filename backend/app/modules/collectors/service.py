@@ -0,0 +1,190 @@
+"""
+回收员收入统计 Service
+职责: 按日/周/月输出回收员的完成单量、回收重量与佣金收入序列
+技术方案:
+- 命中 (collector_id, status, date) 索引的一次按天 GROUP BY，佣金在 SQL 中逐单 ROUND 后求和
+  （与账本入账的逐单舍入口径一致），再在内存中合并到日/周/月周期
+- 已结束的周期结果写入 Redis 哈希长期缓存，只有当前周期和缓存缺失的周期参与查询
+- 订单结算事务提交后按订单日期清除其所属周期的缓存，迟到结算的历史订单同样能反映到统计中
+Redis 未初始化时每次直接查询
+"""
+import json
+import logging
+from datetime import date, datetime, timedelta
+from decimal import ROUND_HALF_UP, Decimal
+
+from fastapi import HTTPException
+from tortoise.expressions import RawSQL
+from tortoise.functions import Count, Sum
+
+from app.common.timeseries import bucket_key, day_bucket
+from app.modules.orders.model import Order
+
+logger = logging.getLogger("collectors")
+
+COMMISSION_RATE = Decimal("0.1")   # 回收员佣金比例（占订单成交额）
+GRANULARITIES = ("day", "week", "month")
+MAX_PERIODS = 400                  # 单次查询最多返回的周期数
+DEFAULT_PERIODS = {"day": 30, "week": 12, "month": 12}
+
+
+def commission_for(amount: Decimal) -> Decimal:
+    """单笔订单的回收员佣金，四舍五入到分，与收入统计中的 SQL ROUND 口径一致"""
+    return (amount * COMMISSION_RATE).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def period_start(day: date, granularity: str) -> date:
+    """所属周期的第一天: 日 → 当天，周 → 周一，月 → 1 号"""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def next_period(start: date, granularity: str) -> date:
+    if granularity == "week":
+        return start + timedelta(days=7)
+    if granularity == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def period_key(start: date, granularity: str) -> str:
+    return start.strftime("%Y-%m") if granularity == "month" else start.isoformat()
+
+
+class CollectorEarningsService:
+
+    PREFIX = "earnings:"
+    CACHE_TTL = 90 * 86400   # 长期不查询的回收员缓存自动过期
+
+    _redis = None
+
+    @classmethod
+    def init(cls, redis) -> None:
+        cls._redis = redis
+
+    @classmethod
+    def close(cls) -> None:
+        cls._redis = None
+
+    @classmethod
+    async def get_series(
+        cls, collector_id: int, granularity: str, start: date | None = None, end: date | None = None,
+    ) -> dict:
+        """
+        收入统计序列
+        :param start: 起始日期（含），默认最近 DEFAULT_PERIODS 个周期
+        :param end: 结束日期（含），默认今天
+        :return: {"granularity", "from", "to", "series": [{"period", "orders", "weight", "income"}], "total"}
+        """
+        if granularity not in GRANULARITIES:
+            raise HTTPException(status_code=400, detail="granularity 仅支持 day / week / month")
+        today = date.today()
+        end = end or today
+        if start is None:
+            start = period_start(end, granularity)
+            for _ in range(DEFAULT_PERIODS[granularity] - 1):
+                start = period_start(start - timedelta(days=1), granularity)
+        if start > end:
+            raise HTTPException(status_code=400, detail="起始日期不能晚于结束日期")
+
+        periods = []
+        cursor = period_start(start, granularity)
+        while cursor <= end:
+            periods.append(cursor)
+            cursor = next_period(cursor, granularity)
+        if len(periods) > MAX_PERIODS:
+            raise HTTPException(status_code=400, detail=f"单次最多查询 {MAX_PERIODS} 个周期")
+
+        current = period_start(today, granularity)
+        closed = [p for p in periods if p < current]
+        results = await cls._get_cached(collector_id, granularity, closed)
+
+        missing = [p for p in periods if p not in results]
+        if missing:
+            computed = await cls._compute(collector_id, granularity, missing[0], next_period(missing[-1], granularity))
+            for p in missing:
+                results[p] = computed.get(p, {"orders": 0, "weight": 0.0, "income": 0.0})
+            await cls._set_cached(collector_id, granularity, {p: results[p] for p in missing if p < current})
+
+        series = [{"period": period_key(p, granularity), **results[p]} for p in periods]
+        return {
+            "granularity": granularity,
+            "from": periods[0].isoformat(),
+            "to": (next_period(periods[-1], granularity) - timedelta(days=1)).isoformat(),
+            "series": series,
+            "total": {
+                "orders": sum(s["orders"] for s in series),
+                "weight": round(sum(s["weight"] for s in series), 2),
+                "income": round(sum(s["income"] for s in series), 2),
+            },
+        }
+
+    @staticmethod
+    async def _compute(collector_id: int, granularity: str, lower: date, upper: date) -> dict[date, dict]:
+        """[lower, upper) 区间内按天 GROUP BY 一次（佣金逐单舍入后求和），再合并到周期"""
+        rows = await (
+            Order.filter(
+                collector_id=collector_id, status="completed",
+                date__gte=datetime.combine(lower, datetime.min.time()),
+                date__lt=datetime.combine(upper, datetime.min.time()),
+            )
+            .annotate(
+                day=day_bucket("date"), orders=Count("id"), weight=Sum("weight_actual"),
+                income=Sum(RawSQL(f'ROUND("amount_final" * {COMMISSION_RATE}, 2)')),
+            )
+            .group_by("day")
+            .values_list("day", "orders", "weight", "income")
+        )
+        merged: dict[date, list] = {}
+        for day, orders, weight, income in rows:
+            acc = merged.setdefault(period_start(date.fromisoformat(bucket_key(day)), granularity), [0, Decimal("0"), Decimal("0")])
+            acc[0] += orders
+            acc[1] += Decimal(str(weight or 0))
+            acc[2] += Decimal(str(income or 0))
+        return {
+            p: {"orders": orders, "weight": float(weight), "income": float(income.quantize(Decimal("0.01")))}
+            for p, (orders, weight, income) in merged.items()
+        }
+
+    @classmethod
+    async def _get_cached(cls, collector_id: int, granularity: str, periods: list[date]) -> dict[date, dict]:
+        if cls._redis is None or not periods:
+            return {}
+        try:
+            values = await cls._redis.hmget(
+                f"{cls.PREFIX}{collector_id}", *[f"{granularity}:{p.isoformat()}" for p in periods],
+            )
+        except Exception as e:
+            logger.warning("读取收入统计缓存失败 collector=%s: %s", collector_id, e)
+            return {}
+        return {p: json.loads(v) for p, v in zip(periods, values) if v is not None}
+
+    @classmethod
+    async def _set_cached(cls, collector_id: int, granularity: str, results: dict[date, dict]) -> None:
+        if cls._redis is None or not results:
+            return
+        key = f"{cls.PREFIX}{collector_id}"
+        try:
+            await cls._redis.hset(key, mapping={
+                f"{granularity}:{p.isoformat()}": json.dumps(v) for p, v in results.items()
+            })
+            await cls._redis.expire(key, cls.CACHE_TTL)
+        except Exception as e:
+            logger.warning("写入收入统计缓存失败 collector=%s: %s", collector_id, e)
+
+    @classmethod
+    async def invalidate(cls, collector_id: int, order_date: datetime) -> None:
+        """订单结算后清除其所属各周期的缓存"""
+        if cls._redis is None:
+            return
+        day = order_date.date()
+        try:
+            await cls._redis.hdel(
+                f"{cls.PREFIX}{collector_id}",
+                *[f"{g}:{period_start(day, g).isoformat()}" for g in GRANULARITIES],
+            )
+        except Exception as e:
+            logger.warning("清除收入统计缓存失败 collector=%s: %s", collector_id, e)
@@ -1,5 +1,9 @@
 """系统配置路由"""
 from fastapi import APIRouter, HTTPException
+from tortoise.signals import post_delete, post_save
+
+from app.common.cache import ResponseCache
+from app.common.transactions import after_commit
 
 from .model import SystemConfig
 
@@ -55,6 +59,7 @@ DEFAULT_CONFIGS = {
 
 
 @router.get("/config/{key}")
+@ResponseCache.cached(ttl=600, tags=("config",))
 async def get_config(key: str):
     config = await SystemConfig.get_or_none(key=key)
     if config:
@@ -68,6 +73,7 @@ async def get_config(key: str):
 
 
 @router.get("/config")
+@ResponseCache.cached(ttl=600, tags=("config",))
 async def get_all_configs():
     configs = await SystemConfig.all()
     result = {c.key: c.value for c in configs}
@@ -78,3 +84,14 @@ async def get_all_configs():
             result[k] = v
 
     return result
+
+
+# 配置只通过 fastapi-admin 后台维护，绕过路由层；由模型信号在提交后清除缓存
+@post_save(SystemConfig)
+async def _on_config_saved(sender, instance: SystemConfig, created, using_db, update_fields) -> None:
+    await after_commit(ResponseCache.invalidate, "config")
+
+
+@post_delete(SystemConfig)
+async def _on_config_deleted(sender, instance: SystemConfig, using_db) -> None:
+    await after_commit(ResponseCache.invalidate, "config")
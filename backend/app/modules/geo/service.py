@@ -1,12 +1,25 @@
 """地理编码服务 — 使用 Nominatim (OpenStreetMap)"""
 import logging
+import math
 from typing import Optional, Dict
 
 import httpx
 
+from app.common.geohash import EARTH_RADIUS_KM
+
 logger = logging.getLogger(__name__)
 
 
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """计算两点间的球面距离（公里）"""
+    d_lat = math.radians(lat2 - lat1)
+    d_lon = math.radians(lon2 - lon1)
+    a = (math.sin(d_lat / 2) ** 2
+         + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2))
+         * math.sin(d_lon / 2) ** 2)
+    return EARTH_RADIUS_KM * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
 class GeoService:
     BASE_URL = "https://nominatim.openstreetmap.org"
     USER_AGENT = "EcoLoopApp/1.0"
@@ -4,9 +4,9 @@ from decimal import Decimal
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
-from tortoise.transactions import atomic
 
 from app.common.audit_log import AuditLog
+from app.common.transactions import atomic
 from app.modules.admin.dependencies import require_admin
 
 from .model import Inventory
@@ -0,0 +1,41 @@
+"""资金/积分流水模型"""
+from tortoise import fields, models
+
+
+class LedgerEntry(models.Model):
+    """
+    余额/积分流水 — 只追加不修改，每笔入账/出账一行
+    account_type + account_id 标识账户（user / collector），asset 区分余额与积分
+    """
+    id = fields.BigIntField(pk=True)
+    account_type = fields.CharField(max_length=20)   # user, collector
+    account_id = fields.IntField()
+    asset = fields.CharField(max_length=20)          # balance(余额), points(积分)
+    amount = fields.DecimalField(max_digits=14, decimal_places=2)  # 正数入账，负数出账
+    # 来源业务实体，如 order / withdrawal / points_exchange / referral
+    source_type = fields.CharField(max_length=50)
+    source_id = fields.IntField(null=True)
+    memo = fields.CharField(max_length=200, null=True)
+    created_at = fields.DatetimeField(auto_now_add=True, index=True)
+
+    class Meta:
+        table = "ledger_entries"
+        indexes = [
+            # 账户余额 = 快照 + 快照之后的流水；账户流水按 id 倒序翻页
+            ("account_type", "account_id", "asset", "id"),
+        ]
+
+
+class BalanceSnapshot(models.Model):
+    """账户余额快照: 截至 last_entry_id（含）的流水累计值"""
+    id = fields.IntField(pk=True)
+    account_type = fields.CharField(max_length=20)
+    account_id = fields.IntField()
+    asset = fields.CharField(max_length=20)
+    amount = fields.DecimalField(max_digits=14, decimal_places=2)
+    last_entry_id = fields.BigIntField(default=0)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "balance_snapshots"
+        unique_together = (("account_type", "account_id", "asset"),)
@@ -0,0 +1,176 @@
+"""
+余额/积分账本 Service
+技术方案:
+- 入账（结算收益、佣金、退款、奖励）只 INSERT 流水，不更新账户行，并发写同一账户互不阻塞
+- 出账（提现、积分兑换）需校验余额: 锁定该账户的快照行后计算余额再写流水，只有出账之间串行
+- 余额 = 快照 + 快照之后的流水合计；定时任务把流水滚入快照，单次查询的流水量保持很小
+- 尚无快照的账户以 User/Collector 表上的余额列作为期初值；生成快照时同步回写该列，
+  余额列因此是定期物化的只读副本，业务读取一律经过本 Service
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from tortoise.expressions import F, Q
+from tortoise.functions import Max, Sum
+
+from app.common.transactions import in_transaction
+from app.modules.collectors.model import Collector
+from app.modules.users.model import User
+
+from .model import BalanceSnapshot, LedgerEntry
+
+# 生成快照时只滚入该时长之前的流水，避免漏掉 id 已分配但尚未提交的事务
+SNAPSHOT_LAG = timedelta(minutes=1)
+
+# 账户类型 → (模型, 支持的资产)
+_ACCOUNTS = {
+    "user": (User, ("balance", "points")),
+    "collector": (Collector, ("balance",)),
+}
+
+
+class LedgerService:
+
+    @staticmethod
+    def entry(
+        account_type: str, account_id: int, asset: str, amount,
+        source_type: str, source_id: int | None = None, memo: str | None = None,
+    ) -> LedgerEntry:
+        """构造一条流水（未保存），配合 record 批量写入"""
+        return LedgerEntry(
+            account_type=account_type, account_id=account_id, asset=asset,
+            amount=Decimal(str(amount)), source_type=source_type, source_id=source_id, memo=memo,
+        )
+
+    @staticmethod
+    async def record(entries: list[LedgerEntry]) -> None:
+        """批量写入入账流水（一条 INSERT）"""
+        if entries:
+            await LedgerEntry.bulk_create(entries)
+
+    @staticmethod
+    async def debit(
+        account_type: str, account_id: int, asset: str, amount,
+        source_type: str, source_id: int | None = None, memo: str | None = None,
+    ) -> Decimal | None:
+        """
+        出账: 余额充足时写入一条负数流水并返回扣减后的余额，不足时返回 None
+        同一账户的出账在快照行上串行，入账不受影响
+        """
+        amount = Decimal(str(amount))
+        async with in_transaction():
+            snapshot = await LedgerService._lock_snapshot(account_type, account_id, asset)
+            current = snapshot.amount + await LedgerService._delta(
+                account_type, account_id, asset, snapshot.last_entry_id,
+            )
+            if current < amount:
+                return None
+            await LedgerEntry.create(
+                account_type=account_type, account_id=account_id, asset=asset,
+                amount=-amount, source_type=source_type, source_id=source_id, memo=memo,
+            )
+        return current - amount
+
+    @staticmethod
+    async def balances(account_type: str, account_id: int) -> dict[str, Decimal]:
+        """账户各资产当前余额: 快照 + 快照之后的流水（一次快照查询 + 一次聚合）"""
+        model, assets = _ACCOUNTS[account_type]
+        snapshots = {
+            asset: (amount, last_id)
+            for asset, amount, last_id in await BalanceSnapshot.filter(
+                account_type=account_type, account_id=account_id,
+            ).values_list("asset", "amount", "last_entry_id")
+        }
+        missing = [a for a in assets if a not in snapshots]
+        if missing:
+            opening = await model.filter(id=account_id).first().values(*missing)
+            for asset in missing:
+                snapshots[asset] = (Decimal(str((opening or {}).get(asset) or 0)), 0)
+
+        deltas = await LedgerEntry.filter(account_type=account_type, account_id=account_id).annotate(**{
+            asset: Sum("amount", _filter=Q(asset=asset, id__gt=snapshots[asset][1])) for asset in assets
+        }).first().values(*assets)
+        return {
+            asset: snapshots[asset][0] + Decimal(str((deltas or {}).get(asset) or 0))
+            for asset in assets
+        }
+
+    @staticmethod
+    async def balance(account_type: str, account_id: int, asset: str) -> Decimal:
+        return (await LedgerService.balances(account_type, account_id))[asset]
+
+    @staticmethod
+    async def _delta(account_type: str, account_id: int, asset: str, after_id: int) -> Decimal:
+        total = await LedgerEntry.filter(
+            account_type=account_type, account_id=account_id, asset=asset, id__gt=after_id,
+        ).annotate(total=Sum("amount")).first().values_list("total", flat=True)
+        return Decimal(str(total or 0))
+
+    @staticmethod
+    async def _lock_snapshot(account_type: str, account_id: int, asset: str) -> BalanceSnapshot:
+        """取得（必要时以期初余额创建）账户快照行并加行锁"""
+        key = {"account_type": account_type, "account_id": account_id, "asset": asset}
+        if not await BalanceSnapshot.exists(**key):
+            model, _ = _ACCOUNTS[account_type]
+            opening = await model.filter(id=account_id).first().values_list(asset, flat=True)
+            await BalanceSnapshot.get_or_create(
+                defaults={"amount": Decimal(str(opening or 0)), "last_entry_id": 0}, **key,
+            )
+        return await BalanceSnapshot.filter(**key).select_for_update().get()
+
+    @staticmethod
+    async def take_snapshots() -> int:
+        """
+        把上次快照之后、SNAPSHOT_LAG 之前的流水按账户汇总滚入快照，并回写账户表余额列
+        返回更新的账户资产数
+        """
+        cutoff = datetime.utcnow() - SNAPSHOT_LAG
+        upper = await LedgerEntry.filter(created_at__lt=cutoff).annotate(m=Max("id")).first().values_list("m", flat=True)
+        lower = await BalanceSnapshot.annotate(m=Max("last_entry_id")).first().values_list("m", flat=True) or 0
+        if not upper or upper <= lower:
+            return 0
+
+        deltas = await (
+            LedgerEntry.filter(id__gt=lower, id__lte=upper)
+            .annotate(total=Sum("amount"))
+            .group_by("account_type", "account_id", "asset")
+            .values_list("account_type", "account_id", "asset", "total")
+        )
+        by_type: dict[str, dict[int, dict[str, Decimal]]] = {}
+        for account_type, account_id, asset, total in deltas:
+            by_type.setdefault(account_type, {}).setdefault(account_id, {})[asset] = Decimal(str(total or 0))
+
+        async with in_transaction():
+            for account_type, accounts in by_type.items():
+                model, _ = _ACCOUNTS[account_type]
+                existing = {
+                    (account_id, asset): amount
+                    for account_id, asset, amount in await BalanceSnapshot.filter(
+                        account_type=account_type, account_id__in=list(accounts),
+                    ).select_for_update().values_list("account_id", "asset", "amount")
+                }
+                new_assets = {asset for changes in accounts.values() for asset in changes}
+                openings = {
+                    row["id"]: row
+                    for row in await model.filter(id__in=list(accounts)).values("id", *new_assets)
+                }
+                created = []
+                for account_id, changes in accounts.items():
+                    materialized = {}
+                    for asset, delta in changes.items():
+                        if (account_id, asset) in existing:
+                            amount = existing[(account_id, asset)] + delta
+                            await BalanceSnapshot.filter(
+                                account_type=account_type, account_id=account_id, asset=asset,
+                            ).update(amount=F("amount") + delta, last_entry_id=upper)
+                        else:
+                            opening = Decimal(str(openings.get(account_id, {}).get(asset) or 0))
+                            amount = opening + delta
+                            created.append(BalanceSnapshot(
+                                account_type=account_type, account_id=account_id, asset=asset,
+                                amount=amount, last_entry_id=upper,
+                            ))
+                        materialized[asset] = int(amount) if asset == "points" else amount
+                    await model.filter(id=account_id).update(**materialized)
+                await BalanceSnapshot.bulk_create(created)
+        return len(deltas)
@@ -3,7 +3,10 @@ from datetime import date, timedelta
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
+from tortoise.signals import post_delete, post_save
 
+from app.common.cache import ResponseCache
+from app.common.transactions import after_commit
 from app.modules.admin.dependencies import require_admin
 
 from .model import Material, MaterialHistory
@@ -66,5 +69,17 @@ async def delete_material(material_id: int):
 
 
 @router.get("/materials", response_model=List[Material_Pydantic])
+@ResponseCache.cached(ttl=300, tags=("materials",))
 async def get_materials(limit: int = 100, offset: int = 0):
     return await Material_Pydantic.from_queryset(Material.all().limit(limit).offset(offset))
+
+
+# 物料既可经本路由修改，也可经 fastapi-admin 后台修改；统一由模型信号在提交后清除缓存
+@post_save(Material)
+async def _on_material_saved(sender, instance: Material, created, using_db, update_fields) -> None:
+    await after_commit(ResponseCache.invalidate, "materials")
+
+
+@post_delete(Material)
+async def _on_material_deleted(sender, instance: Material, using_db) -> None:
+    await after_commit(ResponseCache.invalidate, "materials")
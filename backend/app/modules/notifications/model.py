@@ -18,3 +18,37 @@ class Notification(models.Model):
     class Meta:
         table = "notifications"
         ordering = ["-created_at"]
+        indexes = [
+            # 用户通知列表（按时间倒序）与未读筛选
+            ("user_id", "is_read", "created_at"),
+        ]
+
+
+class NotificationCounter(models.Model):
+    """
+    用户未读通知计数 — 独立于 users 表，发送/已读时原子增减，不与余额等用户行更新争用行锁
+    无计数行的用户按通知表实时统计，首次增减时以实际未读数初始化
+    """
+    user_id = fields.IntField(pk=True, generated=False)
+    unread = fields.IntField(default=0)
+
+    class Meta:
+        table = "notification_counters"
+
+
+class BroadcastNotification(models.Model):
+    """
+    广播通知（系统公告/活动）— 全体只存一行，读取时合并进各用户的通知列表
+    已读状态以用户的已读水位 User.broadcast_read_id 表示: id 不大于水位的广播视为已读
+    """
+    id = fields.IntField(pk=True)
+    title = fields.CharField(max_length=100)
+    content = fields.TextField()
+    type = fields.CharField(max_length=20, default="system")
+    # 投放范围: all(全体用户), collectors(回收员)
+    audience = fields.CharField(max_length=20, default="all")
+    created_at = fields.DatetimeField(auto_now_add=True, index=True)
+
+    class Meta:
+        table = "broadcast_notifications"
+        ordering = ["-created_at"]
@@ -1,33 +1,36 @@
 """消息通知路由"""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
-from .model import Notification
-from .service import NotificationService
+from app.modules.admin.dependencies import require_admin
+
+from .model import BroadcastNotification, Notification
+from .schemas import CreateBroadcastSchema
+from .service import BroadcastService, NotificationService
+from .stream import NotificationHub
 
 router = APIRouter(tags=["notifications"])
 
 
 @router.get("/notifications")
 async def get_notifications(user_id: int, limit: int = 50, offset: int = 0):
-    """获取用户通知列表"""
-    notifications = (
-        await Notification.filter(user_id=user_id)
-        .order_by("-created_at")
-        .limit(limit).offset(offset)
+    """获取用户通知列表（个人通知与广播合并，broadcast 字段区分）"""
+    return await NotificationService.list_for_user(user_id, limit=limit, offset=offset)
+
+
+@router.get("/notifications/stream")
+async def stream_notifications(
+    request: Request, user_id: int, last_event_id: str | None = Header(None),
+):
+    """
+    通知实时推送（SSE），替代客户端轮询未读数与列表
+    断线重连时浏览器自动携带 Last-Event-ID，服务端补发期间错过的通知
+    """
+    return StreamingResponse(
+        NotificationHub.stream(user_id, last_event_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    return [
-        {
-            "id": n.id,
-            "title": n.title,
-            "content": n.content,
-            "type": n.type,
-            "is_read": n.is_read,
-            "related_entity_type": n.related_entity_type,
-            "related_entity_id": n.related_entity_id,
-            "created_at": n.created_at.strftime("%Y-%m-%d %H:%M:%S"),
-        }
-        for n in notifications
-    ]
 
 
 @router.get("/notifications/unread-count")
@@ -38,15 +41,23 @@ async def get_unread_count(user_id: int):
 
 
 @router.put("/notifications/{notification_id}/read")
-async def mark_read(notification_id: int, user_id: int):
-    """标记单条消息已读"""
-    n = await Notification.get_or_none(id=notification_id)
-    if not n:
+async def mark_read(notification_id: int, user_id: int, broadcast: bool = False):
+    """
+    标记单条消息已读
+    个人通知与广播 id 各自独立编号，列表项 broadcast=true 时需带上 broadcast 参数，按广播推进已读水位
+    """
+    if broadcast:
+        if not await BroadcastNotification.exists(id=notification_id):
+            raise HTTPException(status_code=404, detail="通知不存在")
+        await BroadcastService.mark_read(user_id, notification_id)
+        return {"message": "已读"}
+
+    owner_id = await Notification.filter(id=notification_id).first().values_list("user_id", flat=True)
+    if owner_id is None:
         raise HTTPException(status_code=404, detail="通知不存在")
-    if n.user_id != user_id:
+    if owner_id != user_id:
         raise HTTPException(status_code=403, detail="无权操作")
-    n.is_read = True
-    await n.save()
+    await NotificationService.mark_read(notification_id, user_id)
     return {"message": "已读"}
 
 
@@ -55,3 +66,17 @@ async def mark_all_read(user_id: int):
     """标记全部已读"""
     count = await NotificationService.mark_all_read(user_id)
     return {"message": f"已标记 {count} 条为已读"}
+
+
+@router.put("/notifications/broadcasts/{broadcast_id}/read")
+async def mark_broadcast_read(broadcast_id: int, user_id: int):
+    """标记广播已读（推进已读水位，更早的广播一并视为已读）"""
+    await BroadcastService.mark_read(user_id, broadcast_id)
+    return {"message": "已读"}
+
+
+@router.post("/admin/broadcasts", dependencies=[Depends(require_admin)])
+async def create_broadcast(data: CreateBroadcastSchema):
+    """管理员发布广播通知（全体用户/全体回收员），只写入一行"""
+    b = await BroadcastService.publish(data.title, data.content, type=data.type, audience=data.audience)
+    return {"id": b.id, "message": "广播已发布"}
@@ -10,3 +10,11 @@ class CreateNotificationSchema(BaseModel):
     type: str = Field("system", pattern=r"^(order|withdrawal|system|promotion)$")
     related_entity_type: str | None = None
     related_entity_id: int | None = None
+
+
+class CreateBroadcastSchema(BaseModel):
+    """管理员发布广播通知"""
+    title: str = Field(..., min_length=1, max_length=100)
+    content: str = Field(..., min_length=1)
+    type: str = Field("system", pattern=r"^(system|promotion)$")
+    audience: str = Field("all", pattern=r"^(all|collectors)$")
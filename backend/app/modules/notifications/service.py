@@ -1,9 +1,61 @@
-"""消息通知服务 — 统一发送入口，供其他模块调用"""
-from .model import Notification
+"""
+消息通知服务 — 统一发送入口，供其他模块调用
+未读数冗余在独立的 notification_counters 表（不锁 users 行），发送/已读时原子增减，读取为单行主键查询
+发送后经 NotificationHub 实时推送给在线连接（SSE），推送推迟到最外层事务提交之后，回滚的通知不会送达
+广播通知（BroadcastService）全体只写一行，读取时按投放范围与用户已读水位合并
+"""
+from collections import Counter
+from datetime import datetime
+
+from tortoise.expressions import Case, F, Q, RawSQL, When
+from tortoise.functions import Count
+
+from app.common.transactions import after_commit, in_transaction
+from app.modules.collectors.model import Collector
+from app.modules.users.model import User
+
+from .model import BroadcastNotification, Notification, NotificationCounter
+from .stream import NotificationHub
 
 
 class NotificationService:
 
+    @staticmethod
+    def to_dict(n: Notification) -> dict:
+        """通知列表/推送共用的响应格式"""
+        return {
+            "id": n.id,
+            "title": n.title,
+            "content": n.content,
+            "type": n.type,
+            "is_read": n.is_read,
+            "related_entity_type": n.related_entity_type,
+            "related_entity_id": n.related_entity_id,
+            "created_at": n.created_at.strftime("%Y-%m-%d %H:%M:%S") if n.created_at else None,
+        }
+
+    @staticmethod
+    def to_event(n: Notification) -> dict:
+        return {"user_id": n.user_id, **NotificationService.to_dict(n)}
+
+    @staticmethod
+    async def list_for_user(user_id: int, limit: int = 50, offset: int = 0) -> list[dict]:
+        """个人通知与可见广播按时间倒序合并分页（两路各取前 offset+limit 条再归并）"""
+        user = await User.filter(id=user_id).first().values("broadcast_read_id", "created_at")
+        if not user:
+            return []
+        window = offset + limit
+        personal = await Notification.filter(user_id=user_id).order_by("-created_at").limit(window)
+        broadcasts = await (
+            BroadcastService.visible(user["created_at"], await BroadcastService.audiences_for(user_id))
+            .order_by("-created_at")
+            .limit(window)
+        )
+        items = [(n.created_at, {**NotificationService.to_dict(n), "broadcast": False}) for n in personal]
+        items += [(b.created_at, BroadcastService.to_dict(b, user["broadcast_read_id"])) for b in broadcasts]
+        items.sort(key=lambda item: item[0], reverse=True)
+        return [data for _, data in items[offset:window]]
+
     @staticmethod
     async def send(
         user_id: int,
@@ -14,22 +66,237 @@ class NotificationService:
         related_entity_id: int | None = None,
     ) -> Notification:
         """创建一条通知"""
-        return await Notification.create(
-            user_id=user_id,
-            title=title,
-            content=content,
-            type=type,
-            related_entity_type=related_entity_type,
-            related_entity_id=related_entity_id,
+        async with in_transaction():
+            notification = await Notification.create(
+                user_id=user_id,
+                title=title,
+                content=content,
+                type=type,
+                related_entity_type=related_entity_type,
+                related_entity_id=related_entity_id,
+            )
+            await NotificationService._add_unread({user_id: 1})
+        await after_commit(NotificationHub.publish, [NotificationService.to_event(notification)])
+        return notification
+
+    @staticmethod
+    async def send_many(items: list[dict]) -> None:
+        """批量创建通知（一条 INSERT），items 字段同 send 的参数"""
+        if not items:
+            return
+        notifications = [Notification(**item) for item in items]
+        async with in_transaction():
+            await Notification.bulk_create(notifications)
+            await NotificationService._add_unread(Counter(item["user_id"] for item in items))
+        await after_commit(NotificationHub.publish, [NotificationService.to_event(n) for n in notifications])
+
+    @staticmethod
+    async def _add_unread(deltas: dict[int, int]) -> None:
+        """
+        按用户批量调整未读数，一条 UPDATE ... SET unread = CASE WHEN user_id=? THEN unread + ? ... END
+        需在写通知表之后、同一事务内调用: 还没有计数行的用户以通知表实际未读数（已含本次变更）建行
+        """
+        deltas = {uid: d for uid, d in deltas.items() if d}
+        if not deltas:
+            return
+        existing = set(
+            await NotificationCounter.filter(user_id__in=list(deltas)).values_list("user_id", flat=True)
+        )
+        for uid in deltas.keys() - existing:
+            actual = await Notification.filter(user_id=uid, is_read=False).count()
+            _, created = await NotificationCounter.get_or_create(defaults={"unread": actual}, user_id=uid)
+            if not created:
+                # 并发下他人已先建行，改为累加
+                existing.add(uid)
+        if not existing:
+            return
+        await NotificationCounter.filter(user_id__in=list(existing)).update(
+            unread=Case(
+                *[When(user_id=uid, then=F("unread") + deltas[uid]) for uid in existing],
+                default=F("unread"),
+            )
         )
 
     @staticmethod
     async def get_unread_count(user_id: int) -> int:
-        """获取未读消息数"""
-        return await Notification.filter(user_id=user_id, is_read=False).count()
+        """获取未读消息数: 个人通知读冗余计数，广播只统计水位之后的少量新公告"""
+        user = await User.filter(id=user_id).first().values("broadcast_read_id", "created_at")
+        if not user:
+            return 0
+        unread = await NotificationCounter.filter(user_id=user_id).first().values_list("unread", flat=True)
+        if unread is None:
+            # 尚无计数行（从未收到过通知或计数表上线前的老用户），按通知表实时统计
+            unread = await Notification.filter(user_id=user_id, is_read=False).count()
+        broadcasts = await (
+            BroadcastService.visible(user["created_at"], await BroadcastService.audiences_for(user_id))
+            .filter(id__gt=user["broadcast_read_id"])
+            .count()
+        )
+        return max(unread, 0) + broadcasts
+
+    @staticmethod
+    async def mark_read(notification_id: int, user_id: int) -> bool:
+        """标记单条已读，已读过的不重复扣减未读数；返回本次是否由未读变为已读"""
+        async with in_transaction():
+            changed = await Notification.filter(id=notification_id, user_id=user_id, is_read=False).update(is_read=True)
+            if changed:
+                await NotificationService._add_unread({user_id: -1})
+        return bool(changed)
+
+    @staticmethod
+    async def mark_all_read(user_id: int) -> int:
+        """标记全部已读（含广播），返回更新条数"""
+        async with in_transaction():
+            count = await Notification.filter(user_id=user_id, is_read=False).update(is_read=True)
+            # 按实际翻转条数扣减，而不是直接置 0，避免吞掉并发新到的通知
+            if count:
+                await NotificationService._add_unread({user_id: -count})
+        return count + await BroadcastService.mark_all_read(user_id)
+
+    @staticmethod
+    async def purge_read_before(cutoff: datetime, batch_size: int) -> int:
+        """
+        分批删除 cutoff 之前的已读通知，返回删除条数
+        每批按 created_at 取一批 id 再按主键删除，单条语句只锁少量行
+        """
+        total = 0
+        while True:
+            ids = await (
+                Notification.filter(is_read=True, created_at__lt=cutoff)
+                .order_by("created_at")
+                .limit(batch_size)
+                .values_list("id", flat=True)
+            )
+            if not ids:
+                return total
+            total += await Notification.filter(id__in=ids).delete()
+            if len(ids) < batch_size:
+                return total
+
+    @staticmethod
+    async def purge_over_cap(max_per_user: int, batch_size: int) -> int:
+        """
+        每个用户只保留最新的 max_per_user 条通知，超出部分从最旧的开始分批删除
+        被删除的未读通知同步扣减未读计数，返回删除条数
+        """
+        over = await (
+            Notification.annotate(n=Count("id"))
+            .group_by("user_id")
+            .filter(n__gt=max_per_user)
+            .values_list("user_id", "n")
+        )
+        total = 0
+        for user_id, n in over:
+            # 第 max_per_user 条（从新到旧）的时间即保留边界
+            boundary = await (
+                Notification.filter(user_id=user_id)
+                .order_by("-created_at", "-id")
+                .offset(max_per_user)
+                .first()
+                .values("created_at", "id")
+            )
+            if not boundary:
+                continue
+            # 排序键 (created_at, id) 不大于边界的记录
+            older = Notification.filter(
+                Q(created_at__lt=boundary["created_at"])
+                | Q(created_at=boundary["created_at"], id__lte=boundary["id"]),
+                user_id=user_id,
+            )
+            while True:
+                rows = await older.order_by("created_at", "id").limit(batch_size).values_list("id", "is_read")
+                if not rows:
+                    break
+                async with in_transaction():
+                    deleted = await Notification.filter(id__in=[i for i, _ in rows]).delete()
+                    unread = sum(1 for _, is_read in rows if not is_read)
+                    if unread:
+                        await NotificationService._add_unread({user_id: -unread})
+                total += deleted
+                if len(rows) < batch_size:
+                    break
+        return total
+
+    @staticmethod
+    async def rebuild_unread_counts() -> int:
+        """
+        按通知表校准所有用户的未读计数，返回修正的用户数
+        一条 UPDATE notification_counters SET unread = (SELECT COUNT(*) ...) WHERE unread <> (SELECT COUNT(*) ...)
+        读取与写入在同一语句内完成，校准期间新到的通知不会被当作偏差扣掉；没有计数行的用户本就按通知表实时统计
+        """
+        actual = RawSQL(
+            '(SELECT COUNT(*) FROM "notifications" n'
+            ' WHERE n."user_id" = "notification_counters"."user_id" AND NOT n."is_read")'
+        )
+        return await (
+            NotificationCounter.annotate(actual=actual)
+            .filter(unread__not=F("actual"))
+            .update(unread=F("actual"))
+        )
+
+
+class BroadcastService:
+    """广播通知: 发布只写一行（与用户数无关），读取时按投放范围与已读水位计算"""
+
+    @staticmethod
+    def to_dict(b: BroadcastNotification, read_watermark: int) -> dict:
+        return {
+            "id": b.id,
+            "title": b.title,
+            "content": b.content,
+            "type": b.type,
+            "is_read": b.id <= read_watermark,
+            "related_entity_type": None,
+            "related_entity_id": None,
+            "created_at": b.created_at.strftime("%Y-%m-%d %H:%M:%S") if b.created_at else None,
+            "broadcast": True,
+        }
+
+    @staticmethod
+    async def publish(title: str, content: str, type: str = "system", audience: str = "all") -> BroadcastNotification:
+        """发布广播，并推送给在线连接中属于该投放范围的用户"""
+        b = await BroadcastNotification.create(title=title, content=content, type=type, audience=audience)
+        await after_commit(NotificationHub.publish, [{
+            "user_id": None, "audience": audience, **BroadcastService.to_dict(b, read_watermark=0),
+        }])
+        return b
+
+    @staticmethod
+    async def audiences_for(user_id: int) -> list[str]:
+        """用户所属的投放范围"""
+        audiences = ["all"]
+        if await Collector.filter(user_id=user_id).exists():
+            audiences.append("collectors")
+        return audiences
+
+    @staticmethod
+    def visible(user_created_at, audiences: list[str]):
+        """用户可见的广播: 投放范围匹配，且发布于用户注册之后（新用户不收历史公告）"""
+        return BroadcastNotification.filter(audience__in=audiences, created_at__gte=user_created_at)
+
+    @staticmethod
+    async def mark_read(user_id: int, broadcast_id: int) -> bool:
+        """
+        已读水位推进到该广播（水位只增不减）
+        水位语义下，早于该广播的公告一并视为已读
+        """
+        if not await BroadcastNotification.exists(id=broadcast_id):
+            return False
+        return bool(await User.filter(id=user_id, broadcast_read_id__lt=broadcast_id).update(
+            broadcast_read_id=broadcast_id,
+        ))
 
     @staticmethod
     async def mark_all_read(user_id: int) -> int:
-        """标记全部已读，返回更新条数"""
-        count = await Notification.filter(user_id=user_id, is_read=False).update(is_read=True)
+        """水位推进到最新广播，返回本次由未读变为已读的广播数"""
+        user = await User.filter(id=user_id).first().values("broadcast_read_id", "created_at")
+        if not user:
+            return 0
+        unread = BroadcastService.visible(
+            user["created_at"], await BroadcastService.audiences_for(user_id),
+        ).filter(id__gt=user["broadcast_read_id"])
+        count = await unread.count()
+        latest = await BroadcastNotification.all().order_by("-id").first().values_list("id", flat=True)
+        if latest:
+            await User.filter(id=user_id, broadcast_read_id__lt=latest).update(broadcast_read_id=latest)
         return count
@@ -0,0 +1,178 @@
+"""
+通知实时推送（Server-Sent Events）
+技术方案:
+- 发送通知后发布到 Redis 频道，每个进程只订阅一次，再按 user_id 分发到本进程的连接队列
+  任意 worker 写入的通知都能送达任意 worker 上的连接
+- 每个连接仅占用一个协程和一个有界队列，空闲连接只有心跳开销
+- 广播通知（user_id 为空）按投放范围分发给本进程所有匹配的连接
+- 断线重连携带 Last-Event-ID（通知 id），从通知表补发之后的个人通知
+- 连接积压超过队列上限时主动断开，客户端重连后按 Last-Event-ID 补齐
+Redis 未初始化时退化为进程内直接分发（单进程/开发环境）
+"""
+import asyncio
+import json
+import logging
+
+from .model import Notification
+
+logger = logging.getLogger("notifications.stream")
+
+
+class NotificationHub:
+    """进程内 SSE 连接管理与跨进程通知分发"""
+
+    CHANNEL = "notifications"
+    HEARTBEAT = 15        # 心跳间隔（秒），防止代理/网关断开空闲连接
+    QUEUE_SIZE = 100      # 单连接待发送事件上限
+    REPLAY_LIMIT = 100    # 断线重连时最多补发条数
+    RETRY_MS = 3000       # 建议客户端重连间隔
+
+    _redis = None
+    _listener: asyncio.Task | None = None
+    _subscribers: dict[int, set[asyncio.Queue]] = {}
+    _audiences: dict[asyncio.Queue, list[str]] = {}
+
+    @classmethod
+    def init(cls, redis) -> None:
+        """仅初始化发布端（独立调度进程等不持有连接的进程使用）"""
+        cls._redis = redis
+
+    @classmethod
+    async def start(cls, redis) -> None:
+        """初始化并订阅通知频道（API 进程使用）"""
+        cls.init(redis)
+        cls._listener = asyncio.create_task(cls._listen())
+
+    @classmethod
+    async def stop(cls) -> None:
+        if cls._listener is not None:
+            cls._listener.cancel()
+            await asyncio.gather(cls._listener, return_exceptions=True)
+            cls._listener = None
+        cls._redis = None
+        cls._subscribers.clear()
+        cls._audiences.clear()
+
+    @classmethod
+    async def publish(cls, events: list[dict]) -> None:
+        """发布通知事件，每个事件需包含 user_id（广播为 None，并带 audience）"""
+        if not events:
+            return
+        if cls._redis is None:
+            for event in events:
+                cls._deliver(event)
+            return
+        try:
+            await cls._redis.publish(cls.CHANNEL, json.dumps(events, ensure_ascii=False))
+        except Exception as e:
+            # 推送失败不影响通知入库，客户端重连时按 Last-Event-ID 补发
+            logger.warning(f"通知推送失败: {e}")
+
+    @classmethod
+    async def _listen(cls) -> None:
+        """订阅通知频道并分发到本进程连接，Redis 断开后自动重新订阅"""
+        while True:
+            try:
+                pubsub = cls._redis.pubsub()
+                await pubsub.subscribe(cls.CHANNEL)
+                try:
+                    while True:
+                        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if message is None:
+                            continue
+                        for event in json.loads(message["data"]):
+                            cls._deliver(event)
+                finally:
+                    await pubsub.close()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning(f"通知频道订阅中断，1 秒后重试: {e}")
+                await asyncio.sleep(1)
+
+    @classmethod
+    def _deliver(cls, event: dict) -> None:
+        if event["user_id"] is None:
+            queues = [q for q, audiences in cls._audiences.items() if event["audience"] in audiences]
+        else:
+            queues = list(cls._subscribers.get(event["user_id"], ()))
+        for queue in queues:
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # 消费过慢: 清空并放入断开标记，由客户端重连补发
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    @classmethod
+    def subscribe(cls, user_id: int, audiences: list[str] = ("all",)) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=cls.QUEUE_SIZE)
+        cls._subscribers.setdefault(user_id, set()).add(queue)
+        cls._audiences[queue] = list(audiences)
+        return queue
+
+    @classmethod
+    def unsubscribe(cls, user_id: int, queue: asyncio.Queue) -> None:
+        cls._audiences.pop(queue, None)
+        queues = cls._subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del cls._subscribers[user_id]
+
+    @staticmethod
+    def format_event(data: dict) -> str:
+        lines = []
+        # 广播与个人通知 id 不同源，不参与 Last-Event-ID 续传
+        if data.get("id") is not None and not data.get("broadcast"):
+            lines.append(f"id: {data['id']}")
+        lines.append("event: notification")
+        lines.append(f"data: {json.dumps(data, ensure_ascii=False)}")
+        return "\n".join(lines) + "\n\n"
+
+    @classmethod
+    async def stream(cls, user_id: int, last_event_id: str | None, is_disconnected):
+        """
+        单个 SSE 连接的事件流
+        先订阅再补发，补发与实时推送之间不会漏消息；按通知 id 去重
+        :param is_disconnected: 检测客户端是否已断开的协程函数（request.is_disconnected）
+        """
+        from .service import BroadcastService, NotificationService
+
+        queue = cls.subscribe(user_id, await BroadcastService.audiences_for(user_id))
+        try:
+            yield f"retry: {cls.RETRY_MS}\n\n"
+
+            last_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+            if last_id is not None:
+                missed = (
+                    await Notification.filter(user_id=user_id, id__gt=last_id)
+                    .order_by("id")
+                    .limit(cls.REPLAY_LIMIT)
+                )
+                for n in missed:
+                    yield cls.format_event(NotificationService.to_event(n))
+                    last_id = n.id
+
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=cls.HEARTBEAT)
+                except asyncio.TimeoutError:
+                    if await is_disconnected():
+                        break
+                    yield ": ping\n\n"
+                    continue
+                if event is None:
+                    break
+                if event.get("broadcast"):
+                    yield cls.format_event(event)
+                    continue
+                if event.get("id") is not None and last_id is not None and event["id"] <= last_id:
+                    continue
+                yield cls.format_event(event)
+                if event.get("id") is not None:
+                    last_id = event["id"]
+        finally:
+            cls.unsubscribe(user_id, queue)
@@ -0,0 +1,173 @@
+"""
+自动派单 Service
+职责: 周期性地将待接订单批量指派给附近仍有接单余量的回收员
+技术方案:
+- 仅位置在有效期内的回收员参与派单，避免按过期位置派远单
+- NumPy 向量化计算 订单 × 回收员 球面距离矩阵
+- 代价 = 距离 + 在手订单数 × 负载惩罚（公里当量），超出派单半径视为不可达
+- 贪心分配: 按各订单最小代价升序逐单取最优回收员，分配后更新该回收员负载与余量
+- 事务内锁定仍为 pending 的计划订单，按回收员分组批量 UPDATE，只对本轮实际指派的订单批量写审计日志与通知
+"""
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+from tortoise.functions import Count
+
+from app.common.audit_log import AuditLog
+from app.common.geohash import EARTH_RADIUS_KM
+from app.common.scheduler import ORDER_EXPIRY_QUEUE, DelayedQueue
+from app.common.transactions import in_transaction
+from app.core.config import settings
+from app.modules.collectors.model import Collector
+from app.modules.notifications.service import NotificationService
+
+from .model import Order
+
+logger = logging.getLogger("dispatch")
+
+
+def haversine_matrix(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """两组坐标两两之间的球面距离矩阵（公里），形状 (len(lat1), len(lat2))"""
+    lat1 = np.radians(np.asarray(lat1, dtype=np.float64))[:, None]
+    lon1 = np.radians(np.asarray(lon1, dtype=np.float64))[:, None]
+    lat2 = np.radians(np.asarray(lat2, dtype=np.float64))[None, :]
+    lon2 = np.radians(np.asarray(lon2, dtype=np.float64))[None, :]
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def plan_assignments(
+    order_coords: np.ndarray,
+    collector_coords: np.ndarray,
+    capacity: np.ndarray,
+    load: np.ndarray,
+    max_distance_km: float,
+    load_penalty_km: float,
+) -> np.ndarray:
+    """
+    计算派单方案
+    :param order_coords: (n, 2) 订单 [纬度, 经度]
+    :param collector_coords: (m, 2) 回收员 [纬度, 经度]
+    :param capacity: (m,) 各回收员本轮还可接的订单数
+    :param load: (m,) 各回收员当前在手订单数
+    :return: (n,) 每个订单分配到的回收员下标，无法分配为 -1
+    """
+    n, m = len(order_coords), len(collector_coords)
+    result = np.full(n, -1, dtype=np.int64)
+    if n == 0 or m == 0:
+        return result
+
+    dist = haversine_matrix(
+        order_coords[:, 0], order_coords[:, 1], collector_coords[:, 0], collector_coords[:, 1],
+    )
+    dist[dist > max_distance_km] = np.inf
+
+    remaining = capacity.astype(np.int64).copy()
+    penalty = load.astype(np.float64) * load_penalty_km
+    penalty[remaining <= 0] = np.inf
+
+    # 最近可达回收员越近的订单越先分配，减少远单抢占近单的资源
+    sequence = np.argsort((dist + penalty).min(axis=1), kind="stable")
+    for i in sequence:
+        cost = dist[i] + penalty
+        j = int(np.argmin(cost))
+        if not np.isfinite(cost[j]):
+            continue
+        result[i] = j
+        remaining[j] -= 1
+        penalty[j] = np.inf if remaining[j] <= 0 else penalty[j] + load_penalty_km
+    return result
+
+
+class DispatchService:
+
+    @staticmethod
+    async def run() -> int:
+        """执行一轮自动派单，返回成功指派的订单数"""
+        cutoff = datetime.utcnow() - timedelta(minutes=settings.DISPATCH_MIN_WAIT_MINUTES)
+        orders = await Order.filter(
+            status="pending", date__lt=cutoff,
+            latitude__isnull=False, longitude__isnull=False,
+        ).values_list("id", "latitude", "longitude")
+        if not orders:
+            return 0
+
+        fresh_since = datetime.utcnow() - timedelta(minutes=settings.DISPATCH_LOCATION_MAX_AGE_MINUTES)
+        collectors = await Collector.filter(
+            status="active", latitude__isnull=False, longitude__isnull=False,
+            location_updated_at__gte=fresh_since,
+        ).values_list("id", "latitude", "longitude", "capacity")
+        if not collectors:
+            return 0
+
+        # 各回收员在手（已接未完成）订单数，一次 GROUP BY
+        load_rows = await (
+            Order.filter(status="scheduled", collector_id__in=[c[0] for c in collectors])
+            .annotate(n=Count("id"))
+            .group_by("collector_id")
+            .values_list("collector_id", "n")
+        )
+        load_map = dict(load_rows)
+        load = np.array([load_map.get(c[0], 0) for c in collectors])
+        capacity = np.array([c[3] for c in collectors]) - load
+
+        plan = plan_assignments(
+            np.array([(o[1], o[2]) for o in orders]),
+            np.array([(c[1], c[2]) for c in collectors]),
+            capacity, load,
+            max_distance_km=settings.DISPATCH_MAX_DISTANCE_KM,
+            load_penalty_km=settings.DISPATCH_LOAD_PENALTY_KM,
+        )
+
+        by_collector: dict[int, list[int]] = {}
+        for (order_id, _, _), j in zip(orders, plan):
+            if j >= 0:
+                by_collector.setdefault(collectors[j][0], []).append(order_id)
+        if not by_collector:
+            return 0
+
+        return await DispatchService._apply(by_collector)
+
+    @staticmethod
+    async def _apply(by_collector: dict[int, list[int]]) -> int:
+        """按回收员分组批量写入指派结果，并批量写审计日志与用户通知"""
+        planned = {oid: cid for cid, oids in by_collector.items() for oid in oids}
+        async with in_transaction():
+            # 锁定仍待接的计划订单；本轮计算期间已被抢单（含计划回收员自己手动抢到）的不计入
+            # SKIP LOCKED: 正被抢单事务锁住的行视为已被抢
+            assigned = await (
+                Order.filter(id__in=list(planned), status="pending")
+                .select_for_update(skip_locked=True)
+                .values_list("id", "user_id")
+            )
+            targets: dict[int, list[int]] = {}
+            for oid, _ in assigned:
+                targets.setdefault(planned[oid], []).append(oid)
+            for collector_id, order_ids in targets.items():
+                await Order.filter(id__in=order_ids, status="pending").update(
+                    status="scheduled", collector_id=collector_id,
+                )
+            await AuditLog.bulk_create([
+                AuditLog(
+                    entity_type="order", entity_id=oid,
+                    action="assigned", new_value="scheduled",
+                    operator_type="system", operator_id=None,
+                )
+                for oid, _ in assigned
+            ])
+            await NotificationService.send_many([
+                {
+                    "user_id": uid,
+                    "title": "订单已接单",
+                    "content": "系统已为您的订单指派附近的回收员，将按预约时间上门回收。",
+                    "type": "order",
+                    "related_entity_type": "order",
+                    "related_entity_id": oid,
+                }
+                for oid, uid in assigned
+            ])
+        await DelayedQueue.cancel(ORDER_EXPIRY_QUEUE, *[oid for oid, _ in assigned])
+        logger.info("自动派单: 计划 %d 单，成功 %d 单", len(planned), len(assigned))
+        return len(assigned)
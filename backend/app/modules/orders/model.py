@@ -17,7 +17,37 @@ class Order(models.Model):
     appointment_time = fields.DatetimeField(null=True, index=True)
     contact_phone = fields.CharField(max_length=20, null=True)
     remark = fields.TextField(null=True)
+    # 上门地址坐标及 geohash（附近订单查询的空间索引）
+    latitude = fields.FloatField(null=True)
+    longitude = fields.FloatField(null=True)
+    geohash = fields.CharField(max_length=12, null=True)
     date = fields.DatetimeField(auto_now_add=True, index=True)
 
     class Meta:
         table = "orders"
+        # 覆盖 GET /orders 各过滤组合的 (…, date) 范围扫描，配合游标分页
+        indexes = [
+            ("status", "date"),
+            ("user_id", "date"),
+            ("collector_id", "status", "date"),
+            # 抢单大厅"附近订单": status='pending' 下按 geohash 前缀区间扫描
+            ("status", "geohash"),
+        ]
+
+
+class OrderDailyRollup(models.Model):
+    """
+    已完成订单日汇总 — 由 OrderService.settle_order 在结算事务内增量维护
+    统计口径与原先全表扫描一致: 按订单创建日期（Order.date）归属
+    """
+    id = fields.IntField(pk=True)
+    day = fields.DateField(index=True)
+    material_id = fields.IntField(default=0)  # 0 表示无物料
+    category = fields.CharField(max_length=50, default="Other")
+    order_count = fields.IntField(default=0)
+    total_weight = fields.DecimalField(max_digits=15, decimal_places=2, default=0)
+    total_amount = fields.DecimalField(max_digits=15, decimal_places=2, default=0)
+
+    class Meta:
+        table = "order_daily_rollups"
+        unique_together = (("day", "material_id", "category"),)
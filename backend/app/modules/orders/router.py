@@ -1,13 +1,20 @@
 """订单路由"""
+import heapq
+
 from fastapi import APIRouter, Depends, HTTPException
-from tortoise.transactions import atomic
+from tortoise.expressions import Q
 
+from app.common import geohash
 from app.common.audit_log import AuditLog
+from app.common.pagination import after_cursor
+from app.common.scheduler import ORDER_EXPIRE_AFTER, ORDER_EXPIRY_QUEUE, DelayedQueue
+from app.common.projection import Projection, fmt_datetime, json_response, to_float, to_str_or_none
+from app.common.transactions import atomic
 from app.modules.addresses.model import Address
 from app.modules.admin.dependencies import require_admin
 from app.modules.collectors.model import Collector
+from app.modules.geo.service import GeoService, haversine_km
 from app.modules.materials.model import Material
-from app.modules.notifications.service import NotificationService
 from app.modules.users.model import User
 
 from .model import Order
@@ -30,18 +37,47 @@ async def cancel_order(order_id: int):
         raise HTTPException(status_code=400, detail="Only pending orders can be cancelled")
     order.status = "cancelled"
     await order.save()
+    await DelayedQueue.cancel(ORDER_EXPIRY_QUEUE, order.id)
     return {"message": "Order cancelled"}
 
 
+# GET /orders 响应列: 单条 LEFT JOIN 取回用户名与物料类别，不实例化模型
+ORDER_LIST_COLUMNS = Projection(
+    id=("id", str),
+    user_id=("user_id", str),
+    user_name="user__full_name",
+    address="address",
+    contact_phone=("contact_phone", lambda v: v or ""),
+    status="status",
+    weight_actual=("weight_actual", to_float),
+    amount_final=("amount_final", to_float),
+    unit_price_snapshot=("unit_price_snapshot", to_float),
+    collector_id=("collector_id", to_str_or_none),
+    date=("date", fmt_datetime("%Y-%m-%d")),
+    category=("material__category", lambda v: v or "Other"),
+    appointment_time=("appointment_time", lambda v: v.isoformat() if v else None),
+    remark="remark",
+    latitude="latitude",
+    longitude="longitude",
+)
+
+
 @router.get("/orders")
 async def get_orders(
     user_id: int | None = None,
     collector_id: int | None = None,
     status: str | None = None,
     limit: int = 100, offset: int = 0,
+    cursor: str | None = None,
 ):
-    """支持按 user_id / collector_id / status 过滤"""
-    qs = Order.all().prefetch_related("user", "material")
+    """
+    支持按 user_id / collector_id / status 过滤
+    分页两种模式:
+    - 默认 limit/offset，返回订单数组（兼容旧客户端）
+    - 传入 cursor（首页传空串）启用游标分页，按 (date, id) 倒序，
+      返回 {"items": [...], "next_cursor": str | null}
+    """
+    qs = Order.all()
     if user_id is not None:
         qs = qs.filter(user_id=user_id)
     if collector_id is not None:
@@ -49,26 +85,50 @@ async def get_orders(
     if status is not None:
         qs = qs.filter(status=status)
 
-    orders = await qs.order_by("-date").limit(limit).offset(offset)
-    return [
-        {
-            "id": str(o.id),
-            "user_id": str(o.user_id),
-            "user_name": o.user.full_name if o.user else "未知用户",
-            "address": o.address,
-            "contact_phone": o.contact_phone or "",
-            "status": o.status,
-            "weight_actual": float(o.weight_actual) if o.weight_actual else 0,
-            "amount_final": float(o.amount_final) if o.amount_final else 0,
-            "unit_price_snapshot": float(o.unit_price_snapshot) if o.unit_price_snapshot else 0,
-            "collector_id": str(o.collector_id) if o.collector_id else None,
-            "date": o.date.strftime("%Y-%m-%d"),
-            "category": o.material.category if o.material else "Other",
-            "appointment_time": o.appointment_time.isoformat() if o.appointment_time else None,
-            "remark": o.remark,
-        }
-        for o in orders
-    ]
+    if cursor is not None:
+        if cursor:
+            qs = qs.filter(after_cursor("date", cursor))
+        rows = await ORDER_LIST_COLUMNS.fetch_raw(qs.order_by("-date", "-id").limit(limit))
+        return json_response({
+            "items": ORDER_LIST_COLUMNS.serialize(rows),
+            "next_cursor": ORDER_LIST_COLUMNS.next_cursor(rows, "date", limit),
+        })
+
+    rows = await ORDER_LIST_COLUMNS.fetch(qs.order_by("-date", "-id").limit(limit).offset(offset))
+    return json_response(rows)
+
+
+@router.get("/orders/nearby")
+async def get_nearby_orders(lat: float, lon: float, radius_km: float = 5.0, limit: int = 20):
+    """
+    抢单大厅"附近订单" — 返回半径内最近的 limit 个待接订单，按距离由近到远
+    geohash 前缀区间走 (status, geohash) 索引粗筛，再按球面距离精确过滤排序，
+    扫描量只与附近订单数相关
+    """
+    ranges = []
+    for cell in geohash.covering_cells(lat, lon, radius_km):
+        lower, upper = geohash.prefix_range(cell)
+        ranges.append(Q(geohash__gte=lower, geohash__lt=upper) if upper else Q(geohash__gte=lower))
+    rows = await ORDER_LIST_COLUMNS.fetch_raw(
+        Order.filter(Q(*ranges, join_type="OR"), status="pending")
+    )
+
+    candidates = []
+    for row in rows:
+        dist = haversine_km(
+            lat, lon,
+            ORDER_LIST_COLUMNS.value(row, "latitude"), ORDER_LIST_COLUMNS.value(row, "longitude"),
+        )
+        if dist <= radius_km:
+            candidates.append((dist, row))
+
+    result = []
+    for dist, row in heapq.nsmallest(limit, candidates, key=lambda c: c[0]):
+        item = ORDER_LIST_COLUMNS.serialize([row])[0]
+        item["distance"] = f"{dist:.1f}km" if dist >= 1 else f"{int(dist * 1000)}m"
+        item["distance_value"] = dist
+        result.append(item)
+    return json_response(result)
 
 
 @router.post("/orders", response_model=Order_Pydantic)
@@ -90,12 +150,22 @@ async def create_order(order_data: CreateOrderSchema):
         if any_addr:
             contact_phone = any_addr.receiver_phone
 
+    # 上门坐标: 优先使用客户端定位，否则按地址文本地理编码（失败时留空，不影响下单）
+    latitude, longitude = order_data.latitude, order_data.longitude
+    if latitude is None or longitude is None:
+        coords = await GeoService.geocode(order_data.address)
+        latitude, longitude = (coords["lat"], coords["lon"]) if coords else (None, None)
+
     order = await Order.create(
         user=user, material=material, address=order_data.address,
         status="pending", unit_price_snapshot=material.current_price,
         appointment_time=order_data.appointment_time, remark=order_data.remark,
         contact_phone=contact_phone,
+        latitude=latitude, longitude=longitude,
+        geohash=geohash.encode(latitude, longitude) if latitude is not None else None,
     )
+    # 登记超时取消时间，到期由调度器处理
+    await DelayedQueue.schedule(ORDER_EXPIRY_QUEUE, order.id, ORDER_EXPIRE_AFTER)
     return await Order_Pydantic.from_tortoise_orm(order)
 
 
@@ -112,6 +182,7 @@ async def assign_order(order_id: int, data: AssignOrderSchema):
     order.collector = collector
     order.status = "scheduled"
     await order.save()
+    await DelayedQueue.cancel(ORDER_EXPIRY_QUEUE, order.id)
     # F5修复: 分配回收员时写入审计日志，供时间线展示
     await AuditLog.create(
         entity_type="order", entity_id=order.id,
@@ -122,33 +193,12 @@ async def assign_order(order_id: int, data: AssignOrderSchema):
 
 
 @router.put("/orders/{order_id}/claim", response_model=Order_Pydantic)
-@atomic()
 async def claim_order(order_id: int, data: ClaimOrderSchema):
-    order = await Order.get_or_none(id=order_id)
-    if not order:
-        raise HTTPException(status_code=404, detail="Order not found")
-    if order.status != "pending":
-        raise HTTPException(status_code=400, detail="Order is already claimed or processed")
+    """抢单 — 条件 UPDATE 由 OrderService 完成，抢单失败返回 409"""
     collector = await Collector.get_or_none(id=data.collector_id)
     if not collector:
         raise HTTPException(status_code=404, detail="Collector not found")
-    order.collector = collector
-    order.status = "scheduled"
-    await order.save()
-    await AuditLog.create(
-        entity_type="order", entity_id=order.id,
-        action="claimed", new_value="scheduled",
-        operator_type="collector", operator_id=collector.id,
-    )
-    # 通知用户订单已被接单
-    await NotificationService.send(
-        user_id=order.user_id,
-        title="订单已接单",
-        content=f"回收员{collector.name}已接单，将按预约时间上门回收。",
-        type="order",
-        related_entity_type="order",
-        related_entity_id=order.id,
-    )
+    order = await OrderService.claim_order(order_id, collector)
     return await Order_Pydantic.from_tortoise_orm(order)
 
 
@@ -13,6 +13,9 @@ class CreateOrderSchema(BaseModel):
     estimated_weight: float = Field(0.0, ge=0.0)
     appointment_time: str | None = None
     remark: str | None = Field(None, max_length=500)
+    # 上门地址坐标（可选），未提供时按地址文本地理编码
+    latitude: float | None = Field(None, ge=-90.0, le=90.0)
+    longitude: float | None = Field(None, ge=-180.0, le=180.0)
 
 
 class AssignOrderSchema(BaseModel):
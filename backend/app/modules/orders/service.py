@@ -1,29 +1,82 @@
 """订单业务逻辑 Service"""
 import json
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 
+from fastapi import HTTPException
+from tortoise.expressions import F
+from tortoise.functions import Count, Max, Min, Sum
+
 from app.common.audit_log import AuditLog
+from app.common.cache import ResponseCache
+from app.common.scheduler import ORDER_EXPIRY_QUEUE, DelayedQueue
+from app.common.timeseries import bucket_key, day_bucket
+from app.common.transactions import after_commit, in_transaction
 from app.modules.collectors.model import Collector
+from app.modules.collectors.service import CollectorEarningsService, commission_for
 from app.modules.inventory.model import Inventory
+from app.modules.ledger.service import LedgerService
+from app.modules.materials.model import Material
 from app.modules.materials.service import PricingService
+from app.modules.users.model import UserStats
 from app.modules.notifications.service import NotificationService
-from app.modules.users.model import User
 
-from .model import Order
+from .model import Order, OrderDailyRollup
 
 
 class OrderService:
 
+    @staticmethod
+    async def claim_order(order_id: int, collector: Collector) -> Order:
+        """
+        回收员抢单 — 单条条件 UPDATE 保证只有一人成功:
+        UPDATE orders SET status='scheduled', collector_id=? WHERE id=? AND status='pending'
+        影响行数为 0 即已被他人抢走，直接返回 409，不做读-改-写，也不持有行锁等待
+        """
+        # 快速失败: 已被抢走的订单不进入写路径
+        status = await Order.filter(id=order_id).first().values_list("status", flat=True)
+        if status is None:
+            raise HTTPException(status_code=404, detail="Order not found")
+        if status != "pending":
+            raise HTTPException(status_code=409, detail="Order is already claimed or processed")
+
+        async with in_transaction():
+            claimed = await Order.filter(id=order_id, status="pending").update(
+                status="scheduled", collector_id=collector.id,
+            )
+            if not claimed:
+                raise HTTPException(status_code=409, detail="Order is already claimed or processed")
+
+            order = await Order.get(id=order_id)
+            await AuditLog.create(
+                entity_type="order", entity_id=order.id,
+                action="claimed", new_value="scheduled",
+                operator_type="collector", operator_id=collector.id,
+            )
+            # 通知用户订单已被接单
+            await NotificationService.send(
+                user_id=order.user_id,
+                title="订单已接单",
+                content=f"回收员{collector.name}已接单，将按预约时间上门回收。",
+                type="order",
+                related_entity_type="order",
+                related_entity_id=order.id,
+            )
+        await DelayedQueue.cancel(ORDER_EXPIRY_QUEUE, order.id)
+        return order
+
     @staticmethod
     async def settle_order(order: Order, actual_weight: float, impurity_percent: float) -> Order:
         """
         订单结算核心流程:
         1. 快照单价兜底
         2. 调用定价服务计算最终金额
-        3. 更新用户余额和积分
+        3. 记入用户余额和积分
         4. 计算回收员佣金（10%）
         5. 更新库存
-        6. 写入审计日志
+        6. 更新日汇总与用户统计
+        7. 写入审计日志
+        余额、积分、佣金写入账本流水（只 INSERT，不锁账户行），库存以 UPDATE ... SET x = x + ? 原子累加
         """
         # 1. 单价快照兜底
         if not order.unit_price_snapshot:
@@ -39,27 +92,39 @@ class OrderService:
         order.applied_bonus_amount = result["bonus_amount"]
         order.amount_final = result["final_amount"]
         order.status = "completed"
-        await order.save()
+        await order.save(update_fields=[
+            "unit_price_snapshot", "weight_actual", "impurity_deduction_percent",
+            "applied_bonus_amount", "amount_final", "status",
+        ])
 
-        # 4. 更新用户余额和积分
-        user = await User.get(id=order.user_id)
-        user.balance += result["final_amount"]
-        user.points += int(actual_weight * 10)
-        await user.save()
-
-        # 5. 回收员佣金（10%）
+        # 4. 用户余额和积分入账  5. 回收员佣金（10%），一次批量写入
+        entries = [
+            LedgerService.entry("user", order.user_id, "balance", result["final_amount"],
+                                "order", order.id, f"回收收益 - 订单#{order.id}"),
+            LedgerService.entry("user", order.user_id, "points", int(actual_weight * 10),
+                                "order", order.id, f"回收奖励 - 订单#{order.id}"),
+        ]
         if order.collector_id:
-            collector = await Collector.get(id=order.collector_id)
-            commission = (result["final_amount"] * Decimal("0.1")).quantize(Decimal("0.01"))
-            collector.balance += commission
-            await collector.save()
+            commission = commission_for(result["final_amount"])
+            entries.append(LedgerService.entry("collector", order.collector_id, "balance", commission,
+                                               "order", order.id, f"回收佣金 - 订单#{order.id}"))
+        await LedgerService.record(entries)
 
-        # 6. 库存入库
-        inv, _ = await Inventory.get_or_create(material_id=order.material_id)
-        inv.weight += Decimal(str(actual_weight))
-        await inv.save()
+        # 6. 库存入库（首次入库时才创建库存行）
+        weight = Decimal(str(actual_weight))
+        stocked = await Inventory.filter(material_id=order.material_id).update(weight=F("weight") + weight)
+        if not stocked:
+            await Inventory.create(material_id=order.material_id, weight=weight)
 
-        # 7. 审计日志
+        # 7. 日汇总与用户统计增量更新（供管理后台统计、用户首页读取）
+        await OrderRollupService.record(order, weight, result["final_amount"])
+        await UserStatsService.record(order.user_id, weight, result["final_amount"])
+        if order.collector_id:
+            await after_commit(CollectorEarningsService.invalidate, order.collector_id, order.date)
+        # 提交后再失效，避免并发未命中读到提交前的数据重新写入缓存
+        await after_commit(ResponseCache.invalidate, "orders")
+
+        # 8. 审计日志
         await AuditLog.create(
             entity_type="order", entity_id=order.id,
             action="completed",
@@ -67,7 +132,7 @@ class OrderService:
             operator_type="collector", operator_id=order.collector_id,
         )
 
-        # 8. 发送通知给用户
+        # 9. 发送通知给用户
         await NotificationService.send(
             user_id=order.user_id,
             title="订单已完成",
@@ -78,3 +143,147 @@ class OrderService:
         )
 
         return order
+
+
+class OrderRollupService:
+    """已完成订单日汇总维护: 结算时增量累加，历史数据可分段重建"""
+
+    @staticmethod
+    async def record(order: Order, weight: Decimal, amount: Decimal) -> None:
+        """将一笔已结算订单累加到所属 (日期, 物料, 类别) 汇总行"""
+        category = None
+        if order.material_id:
+            category = await Material.filter(id=order.material_id).first().values_list("category", flat=True)
+        key = {
+            "day": order.date.date(),
+            "material_id": order.material_id or 0,
+            "category": category or "Other",
+        }
+        increments = {
+            "order_count": F("order_count") + 1,
+            "total_weight": F("total_weight") + weight,
+            "total_amount": F("total_amount") + amount,
+        }
+        if await OrderDailyRollup.filter(**key).update(**increments):
+            return
+        _, created = await OrderDailyRollup.get_or_create(
+            defaults={"order_count": 1, "total_weight": weight, "total_amount": amount}, **key,
+        )
+        if not created:
+            # 并发下他人已先创建该行，改为累加
+            await OrderDailyRollup.filter(**key).update(**increments)
+
+    @staticmethod
+    async def rebuild(chunk_days: int = 30) -> int:
+        """
+        从订单历史重建日汇总表
+        按 chunk_days 天为一段做 GROUP BY，单段内存占用与订单总量无关
+        :return: 写入的汇总行数
+        """
+        bounds = await (
+            Order.filter(status="completed")
+            .annotate(first=Min("date"), last=Max("date"))
+            .first()
+            .values("first", "last")
+        )
+        count = 0
+        async with in_transaction():
+            await OrderDailyRollup.all().delete()
+            if not bounds or not bounds["first"]:
+                return 0
+
+            cursor = date.fromisoformat(bucket_key(bounds["first"]))
+            last_day = date.fromisoformat(bucket_key(bounds["last"]))
+            while cursor <= last_day:
+                chunk_end = cursor + timedelta(days=chunk_days)
+                rows = (
+                    await Order.filter(
+                        status="completed",
+                        date__gte=datetime.combine(cursor, datetime.min.time()),
+                        date__lt=datetime.combine(chunk_end, datetime.min.time()),
+                    )
+                    .annotate(
+                        day=day_bucket("date"),
+                        order_count=Count("id"),
+                        total_weight=Sum("weight_actual"),
+                        total_amount=Sum("amount_final"),
+                    )
+                    .group_by("day", "material_id", "material__category")
+                    .values("day", "material_id", "material__category", "order_count", "total_weight", "total_amount")
+                )
+                await OrderDailyRollup.bulk_create([
+                    OrderDailyRollup(
+                        day=date.fromisoformat(bucket_key(r["day"])),
+                        material_id=r["material_id"] or 0,
+                        category=r["material__category"] or "Other",
+                        order_count=r["order_count"],
+                        total_weight=r["total_weight"] or Decimal("0"),
+                        total_amount=r["total_amount"] or Decimal("0"),
+                    )
+                    for r in rows
+                ])
+                count += len(rows)
+                cursor = chunk_end
+        return count
+
+
+class UserStatsService:
+    """用户回收统计维护: 结算时增量累加，缺行时以订单历史聚合兜底，可逐个用户重建"""
+
+    @staticmethod
+    async def aggregate(user_id: int) -> tuple[int, Decimal, Decimal]:
+        """从订单表实时聚合单个用户的统计: (回收次数, 总重量, 总收益)"""
+        rows = await (
+            Order.filter(user_id=user_id, status="completed")
+            .annotate(recycle_count=Count("id"), total_weight=Sum("weight_actual"), total_earnings=Sum("amount_final"))
+            .group_by("user_id")
+            .values_list("recycle_count", "total_weight", "total_earnings")
+        )
+        if not rows:
+            return 0, Decimal("0"), Decimal("0")
+        count, weight, earnings = rows[0]
+        return count, Decimal(str(weight or 0)), Decimal(str(earnings or 0))
+
+    @staticmethod
+    async def record(user_id: int, weight: Decimal, amount: Decimal) -> None:
+        """将一笔已结算订单累加到用户统计行"""
+        increments = {
+            "recycle_count": F("recycle_count") + 1,
+            "total_weight": F("total_weight") + weight,
+            "total_earnings": F("total_earnings") + amount,
+        }
+        if await UserStats.filter(user_id=user_id).update(**increments):
+            return
+        # 首次建行以订单历史聚合为准（调用方已在同一事务内将本单置为 completed，聚合已包含本单），
+        # 统计表上线前的历史订单不会丢失
+        count, total_weight, total_earnings = await UserStatsService.aggregate(user_id)
+        _, created = await UserStats.get_or_create(
+            defaults={"recycle_count": count, "total_weight": total_weight, "total_earnings": total_earnings},
+            user_id=user_id,
+        )
+        if not created:
+            # 并发下他人已先创建该行，改为累加
+            await UserStats.filter(user_id=user_id).update(**increments)
+
+    @staticmethod
+    async def rebuild() -> int:
+        """
+        从订单历史重建用户统计表（逐个用户在事务内锁行后重新聚合并覆盖写入）
+        :return: 重建的统计行数
+        """
+        user_ids = set(
+            await Order.filter(status="completed").distinct().values_list("user_id", flat=True)
+        )
+        user_ids |= set(await UserStats.all().values_list("user_id", flat=True))
+        for user_id in sorted(user_ids):
+            await UserStatsService._rebuild_one(user_id)
+        return len(user_ids)
+
+    @staticmethod
+    async def _rebuild_one(user_id: int) -> None:
+        """锁定统计行后在同一事务内重新聚合该用户的已完成订单并覆盖写入，与并发结算按同一行锁串行"""
+        async with in_transaction():
+            await UserStats.get_or_create(user_id=user_id)
+            stats = await UserStats.filter(user_id=user_id).select_for_update().get()
+            stats.recycle_count, stats.total_weight, stats.total_earnings = await UserStatsService.aggregate(user_id)
+            await stats.save()
@@ -0,0 +1,173 @@
+"""
+回收点空间索引
+职责: 常驻内存的经纬度网格索引，提供"半径内最近 k 个回收点"查询
+技术方案:
+- 按固定经纬度步长（0.01°）分网格，网格 → 该格内回收点列表；查询从所在格向外逐圈扩展，
+  当前圈可能出现的最近距离已超过第 k 近结果时停止，只计算附近少量点的球面距离
+- 启动时全量加载；本进程内的增删改通过 Tortoise 信号即时更新，
+  其他进程的修改由定时全量重载（REFRESH_INTERVAL）兜底
+- 索引未加载完成时由调用方回退到数据库经纬度包围盒预过滤
+"""
+import asyncio
+import heapq
+import logging
+import math
+import time
+
+from tortoise.signals import post_delete, post_save
+
+from app.common import geohash
+from app.modules.geo.service import haversine_km
+
+from .model import RecyclePoint
+
+logger = logging.getLogger("recycle_points")
+
+
+def point_item(p: RecyclePoint | dict) -> dict:
+    """回收点 → 响应字典（不含距离）"""
+    get = p.get if isinstance(p, dict) else lambda k: getattr(p, k)
+    return {
+        "id": get("id"),
+        "name": get("name"),
+        "address": get("address"),
+        "phone": get("phone"),
+        "latitude": get("latitude"),
+        "longitude": get("longitude"),
+        "tags": [t.strip() for t in (get("tags") or "").split(",") if t.strip()],
+    }
+
+
+class PointGrid:
+    """经纬度网格，元素为 (纬度, 经度, id, 附带数据)"""
+
+    def __init__(self, cell_deg: float = 0.01):  # 约 1.1km（纬向）
+        self.cell_deg = cell_deg
+        self.cells: dict[tuple[int, int], dict[int, tuple]] = {}
+        self.positions: dict[int, tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def _cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg)
+
+    def add(self, lat: float, lon: float, point_id: int, data) -> None:
+        self.remove(point_id)
+        cell = self._cell(lat, lon)
+        self.cells.setdefault(cell, {})[point_id] = (lat, lon, point_id, data)
+        self.positions[point_id] = cell
+
+    def remove(self, point_id: int) -> None:
+        cell = self.positions.pop(point_id, None)
+        if cell is not None:
+            bucket = self.cells[cell]
+            bucket.pop(point_id, None)
+            if not bucket:
+                del self.cells[cell]
+
+    def nearest(self, lat: float, lon: float, radius_km: float, k: int) -> list[tuple[float, object]]:
+        """半径内最近的 k 个点，按距离升序返回 [(距离km, 附带数据)]"""
+        if k <= 0 or not self.cells:
+            return []
+        min_lat, max_lat, min_lon, max_lon = geohash.bounding_box(lat, lon, radius_km)
+        lo_i, lo_j = self._cell(min_lat, min_lon)
+        hi_i, hi_j = self._cell(max_lat, max_lon)
+        ci, cj = self._cell(lat, lon)
+        # 一圈网格对应的最小跨度（公里），取包围盒内纬度绝对值最大处的经度跨度
+        cos_lat = max(math.cos(math.radians(max(abs(min_lat), abs(max_lat)))), 1e-6)
+        ring_km = self.cell_deg * geohash.KM_PER_DEG_LAT * min(1.0, cos_lat)
+
+        best: list[tuple[float, int, object]] = []  # 大顶堆（距离取负），保留当前最近的 k 个
+        max_ring = max(ci - lo_i, hi_i - ci, cj - lo_j, hi_j - cj)
+        for r in range(max_ring + 1):
+            # 第 r 圈内的点距离至少为 (r - 1) 圈宽
+            if len(best) == k and (r - 1) * ring_km > -best[0][0]:
+                break
+            for i in range(max(ci - r, lo_i), min(ci + r, hi_i) + 1):
+                edge = i in (ci - r, ci + r)
+                cols = range(max(cj - r, lo_j), min(cj + r, hi_j) + 1) if edge else (cj - r, cj + r)
+                for j in cols:
+                    if not (lo_j <= j <= hi_j):
+                        continue
+                    bucket = self.cells.get((i, j))
+                    if not bucket:
+                        continue
+                    for p_lat, p_lon, point_id, data in bucket.values():
+                        dist = haversine_km(lat, lon, p_lat, p_lon)
+                        if dist > radius_km:
+                            continue
+                        if len(best) < k:
+                            heapq.heappush(best, (-dist, -point_id, data))
+                        elif dist < -best[0][0]:
+                            heapq.heapreplace(best, (-dist, -point_id, data))
+        return [(-d, data) for d, _, data in sorted(best, reverse=True)]
+
+
+class RecyclePointIndex:
+    """进程内回收点索引（仅包含 status='active' 的回收点）"""
+
+    REFRESH_INTERVAL = 300  # 全量重载间隔（秒），同步其他进程的修改
+
+    _grid: PointGrid | None = None
+    _loaded_at = 0.0
+    _reloading: asyncio.Task | None = None
+
+    @classmethod
+    def ready(cls) -> bool:
+        return cls._grid is not None
+
+    @classmethod
+    async def load(cls) -> int:
+        """从数据库全量构建索引，返回加载的回收点数"""
+        rows = await RecyclePoint.filter(status="active").values(
+            "id", "name", "address", "phone", "latitude", "longitude", "tags",
+        )
+        grid = PointGrid()
+        for row in rows:
+            grid.add(row["latitude"], row["longitude"], row["id"], point_item(row))
+        cls._grid, cls._loaded_at = grid, time.monotonic()
+        logger.info("回收点空间索引已加载: %d 个", len(grid))
+        return len(grid)
+
+    @classmethod
+    def clear(cls) -> None:
+        cls._grid, cls._loaded_at = None, 0.0
+
+    @classmethod
+    def nearest(cls, lat: float, lon: float, radius_km: float, k: int) -> list[tuple[float, dict]]:
+        """查询索引；距上次全量加载超过 REFRESH_INTERVAL 时在后台重载"""
+        if time.monotonic() - cls._loaded_at > cls.REFRESH_INTERVAL and (cls._reloading is None or cls._reloading.done()):
+            cls._reloading = asyncio.create_task(cls._reload())
+        return cls._grid.nearest(lat, lon, radius_km, k)
+
+    @classmethod
+    async def _reload(cls) -> None:
+        try:
+            await cls.load()
+        except Exception as e:
+            logger.warning("回收点空间索引重载失败: %s", e)
+
+    @classmethod
+    def upsert(cls, point: RecyclePoint) -> None:
+        if cls._grid is None:
+            return
+        if point.status == "active":
+            cls._grid.add(point.latitude, point.longitude, point.id, point_item(point))
+        else:
+            cls._grid.remove(point.id)
+
+    @classmethod
+    def remove(cls, point_id: int) -> None:
+        if cls._grid is not None:
+            cls._grid.remove(point_id)
+
+
+@post_save(RecyclePoint)
+async def _on_point_saved(sender, instance: RecyclePoint, created, using_db, update_fields) -> None:
+    RecyclePointIndex.upsert(instance)
+
+
+@post_delete(RecyclePoint)
+async def _on_point_deleted(sender, instance: RecyclePoint, using_db) -> None:
+    RecyclePointIndex.remove(instance.id)
@@ -16,6 +16,8 @@ class RecyclePoint(models.Model):
 
     class Meta:
         table = "recycle_points"
+        # 空间索引未加载时按经纬度包围盒范围过滤
+        indexes = [("status", "latitude", "longitude")]
 
     def __str__(self):
         return self.name
@@ -1,22 +1,39 @@
 """回收点路由"""
-import math
+import heapq
 
 from fastapi import APIRouter
 
+from app.common import geohash
+from app.modules.geo.service import haversine_km as _haversine_km
+
+from .index import RecyclePointIndex, point_item
 from .model import RecyclePoint
 
 router = APIRouter(tags=["recycle_points"])
 
 
-def _haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-    """计算两点间的球面距离（公里）"""
-    R = 6371.0
-    d_lat = math.radians(lat2 - lat1)
-    d_lon = math.radians(lon2 - lon1)
-    a = (math.sin(d_lat / 2) ** 2
-         + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2))
-         * math.sin(d_lon / 2) ** 2)
-    return R * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+def _format_distance(item: dict, dist: float) -> dict:
+    return {
+        **item,
+        "distance": f"{dist:.1f}km" if dist >= 1 else f"{int(dist * 1000)}m",
+        "distance_value": dist,
+    }
+
+
+async def _nearest_from_db(lat: float, lon: float, radius_km: float, limit: int) -> list[tuple[float, dict]]:
+    """冷路径（索引尚未加载）: 经纬度包围盒预过滤后精确计算距离"""
+    min_lat, max_lat, min_lon, max_lon = geohash.bounding_box(lat, lon, radius_km)
+    points = await RecyclePoint.filter(
+        status="active",
+        latitude__gte=min_lat, latitude__lte=max_lat,
+        longitude__gte=min_lon, longitude__lte=max_lon,
+    )
+    candidates = []
+    for p in points:
+        dist = _haversine_km(lat, lon, p.latitude, p.longitude)
+        if dist <= radius_km:
+            candidates.append((dist, p.id, point_item(p)))
+    return [(dist, item) for dist, _, item in heapq.nsmallest(limit, candidates, key=lambda c: (c[0], c[1]))]
 
 
 @router.get("/recycle_points")
@@ -26,30 +43,16 @@ async def get_recycle_points(
     radius_km: float = 10.0,
     limit: int = 50,
 ):
-    """获取回收点列表，支持按距离排序"""
-    points = await RecyclePoint.filter(status="active").limit(limit)
-
-    result = []
-    for p in points:
-        item = {
-            "id": p.id,
-            "name": p.name,
-            "address": p.address,
-            "phone": p.phone,
-            "latitude": p.latitude,
-            "longitude": p.longitude,
-            "tags": [t.strip() for t in p.tags.split(",") if t.strip()],
-        }
-        if lat is not None and lon is not None:
-            dist = _haversine_km(lat, lon, p.latitude, p.longitude)
-            if dist > radius_km:
-                continue
-            item["distance"] = f"{dist:.1f}km" if dist >= 1 else f"{int(dist * 1000)}m"
-            item["distance_value"] = dist
-        result.append(item)
-
-    # 按距离排序（如果有）
-    if lat is not None and lon is not None:
-        result.sort(key=lambda x: x.get("distance_value", 0))
-
-    return result
+    """
+    获取回收点列表
+    传入坐标时返回半径内最近的 limit 个回收点（由近到远），优先查询内存空间索引
+    """
+    if lat is None or lon is None:
+        points = await RecyclePoint.filter(status="active").order_by("id").limit(limit)
+        return [point_item(p) for p in points]
+
+    if RecyclePointIndex.ready():
+        nearest = RecyclePointIndex.nearest(lat, lon, radius_km, limit)
+    else:
+        nearest = await _nearest_from_db(lat, lon, radius_km, limit)
+    return [_format_distance(item, dist) for dist, item in nearest]
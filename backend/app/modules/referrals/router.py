@@ -8,8 +8,9 @@ import string
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from tortoise.transactions import atomic
 
+from app.common.transactions import atomic
+from app.modules.ledger.service import LedgerService
 from app.modules.users.model import User
 from app.modules.notifications.service import NotificationService
 
@@ -56,7 +57,7 @@ async def get_or_create_invite_code(user_id: int):
             exists = await User.filter(invite_code=code).exists()
             if not exists:
                 user.invite_code = code
-                await user.save()
+                await user.save(update_fields=["invite_code"])
                 break
         else:
             raise HTTPException(status_code=500, detail="邀请码生成失败，请重试")
@@ -90,14 +91,15 @@ async def bind_referral(req: BindReferralRequest):
 
     # 绑定推荐关系
     user.referred_by = referrer
-    await user.save()
+    await user.save(update_fields=["referred_by_id"])
 
     # 双方获得积分奖励
-    referrer.points += REFERRER_REWARD_POINTS
-    await referrer.save()
-
-    user.points += INVITEE_REWARD_POINTS
-    await user.save()
+    await LedgerService.record([
+        LedgerService.entry("user", referrer.id, "points", REFERRER_REWARD_POINTS,
+                            "referral", user.id, "邀请奖励"),
+        LedgerService.entry("user", user.id, "points", INVITEE_REWARD_POINTS,
+                            "referral", user.id, "邀请奖励"),
+    ])
 
     # 通知邀请人
     await NotificationService.send(
@@ -135,7 +137,7 @@ async def get_referral_info(user_id: int):
     if not user.invite_code:
         code = _generate_invite_code()
         user.invite_code = code
-        await user.save()
+        await user.save(update_fields=["invite_code"])
 
     # 统计推荐人数
     referral_count = await User.filter(referred_by_id=user_id).count()
@@ -16,3 +16,25 @@ class Review(models.Model):
 
     class Meta:
         table = "reviews"
+
+
+class CollectorReviewStats(models.Model):
+    """
+    回收员评价汇总 — 提交评价时在同一事务内增量维护，评价概览按主键读取一行
+    可由 ReviewStatsService.rebuild 从 reviews 表重建
+    """
+    collector_id = fields.IntField(pk=True, generated=False)
+    rating_sum = fields.IntField(default=0)
+    rating_count = fields.IntField(default=0)
+    # 各星级评价数
+    star_1 = fields.IntField(default=0)
+    star_2 = fields.IntField(default=0)
+    star_3 = fields.IntField(default=0)
+    star_4 = fields.IntField(default=0)
+    star_5 = fields.IntField(default=0)
+    # 标签出现次数 {标签: 次数}
+    tag_counts = fields.JSONField(default=dict)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "collector_review_stats"
@@ -1,15 +1,27 @@
 """订单评价路由"""
 from fastapi import APIRouter, HTTPException
-from tortoise.transactions import atomic
 
-from app.modules.collectors.model import Collector
+from app.common.projection import Projection, fmt_datetime, json_response
+from app.common.transactions import atomic
 from app.modules.orders.model import Order
 
-from .model import Review
+from .model import CollectorReviewStats, Review
 from .schemas import CreateReviewSchema
+from .service import ReviewStatsService
 
 router = APIRouter(tags=["reviews"])
 
+# 评价列表响应列: 单条 LEFT JOIN 取回用户名，不实例化模型
+REVIEW_LIST_COLUMNS = Projection(
+    id="id",
+    order_id="order_id",
+    user_name="user__full_name",
+    rating="rating",
+    content="content",
+    tags=("tags", lambda v: v.split(",") if v else []),
+    created_at=("created_at", fmt_datetime("%Y-%m-%d %H:%M")),
+)
+
 
 @router.post("/reviews")
 @atomic()
@@ -36,18 +48,9 @@ async def create_review(data: CreateReviewSchema):
         tags=data.tags,
     )
 
-    # 更新回收员评分（加权平均）
+    # 累加回收员评价汇总并同步评分（同一事务）
     if order.collector_id:
-        collector = await Collector.get(id=order.collector_id)
-        review_count = await Review.filter(collector_id=collector.id).count()
-        # 加权平均: (旧评分 * (n-1) + 新评分) / n
-        if review_count > 1:
-            collector.rating = round(
-                (collector.rating * (review_count - 1) + data.rating) / review_count, 1
-            )
-        else:
-            collector.rating = float(data.rating)
-        await collector.save()
+        await ReviewStatsService.record(order.collector_id, data.rating, data.tags)
 
     return {
         "id": review.id,
@@ -57,6 +60,13 @@ async def create_review(data: CreateReviewSchema):
     }
 
 
+@router.get("/collectors/{collector_id}/review-summary")
+async def get_review_summary(collector_id: int):
+    """回收员评价概览: 平均分、评价数、星级分布、标签频次（读取一行汇总）"""
+    stats = await CollectorReviewStats.get_or_none(collector_id=collector_id)
+    return {"collector_id": collector_id, **ReviewStatsService.summary(stats)}
+
+
 @router.get("/reviews")
 async def get_reviews(
     order_id: int | None = None,
@@ -66,7 +76,7 @@ async def get_reviews(
     offset: int = 0,
 ):
     """查询评价列表 — 支持按订单/回收员/用户过滤"""
-    qs = Review.all().prefetch_related("user", "order")
+    qs = Review.all()
     if order_id is not None:
         qs = qs.filter(order_id=order_id)
     if collector_id is not None:
@@ -74,16 +84,5 @@ async def get_reviews(
     if user_id is not None:
         qs = qs.filter(user_id=user_id)
 
-    reviews = await qs.order_by("-created_at").limit(limit).offset(offset)
-    return [
-        {
-            "id": r.id,
-            "order_id": r.order_id,
-            "user_name": r.user.full_name if r.user else "匿名",
-            "rating": r.rating,
-            "content": r.content,
-            "tags": r.tags.split(",") if r.tags else [],
-            "created_at": r.created_at.strftime("%Y-%m-%d %H:%M"),
-        }
-        for r in reviews
-    ]
+    rows = await REVIEW_LIST_COLUMNS.fetch(qs.order_by("-created_at").limit(limit).offset(offset))
+    return json_response(rows)
@@ -0,0 +1,123 @@
+"""
+评价汇总 Service
+职责: 维护回收员评分总和/次数、星级分布与标签频次，并同步 Collector.rating
+技术方案:
+- 提交评价时锁定该回收员的汇总行，在同一事务内累加，不再每次 COUNT 评价表
+- 评分 = 评分总和 / 评价次数（保留 1 位小数），不随评价次数累积舍入误差
+- 重建: 逐个回收员在一个事务内锁定汇总行后重新聚合（星级 GROUP BY rating，标签按主键分批计数）并覆盖写入，
+  与并发提交的评价按同一行锁串行，不会丢失重建期间的新评价
+"""
+from collections import Counter
+
+from tortoise.functions import Count
+
+from app.common.transactions import in_transaction
+from app.modules.collectors.model import Collector
+
+from .model import CollectorReviewStats, Review
+
+STARS = (1, 2, 3, 4, 5)
+
+
+def parse_tags(tags: str | None) -> list[str]:
+    """逗号分隔的标签串 → 去空白、去重后的标签列表"""
+    if not tags:
+        return []
+    return list(dict.fromkeys(t.strip() for t in tags.split(",") if t.strip()))
+
+
+def average_rating(rating_sum: int, rating_count: int) -> float:
+    return round(rating_sum / rating_count, 1) if rating_count else 5.0
+
+
+class ReviewStatsService:
+
+    @staticmethod
+    async def record(collector_id: int, rating: int, tags: str | None) -> CollectorReviewStats:
+        """累加一条评价（需在提交评价的事务内调用）"""
+        async with in_transaction():
+            await CollectorReviewStats.get_or_create(collector_id=collector_id)
+            stats = await CollectorReviewStats.filter(collector_id=collector_id).select_for_update().get()
+            stats.rating_sum += rating
+            stats.rating_count += 1
+            star = f"star_{rating}"
+            setattr(stats, star, getattr(stats, star) + 1)
+            counts = dict(stats.tag_counts or {})
+            for tag in parse_tags(tags):
+                counts[tag] = counts.get(tag, 0) + 1
+            stats.tag_counts = counts
+            await stats.save(update_fields=["rating_sum", "rating_count", star, "tag_counts", "updated_at"])
+            await Collector.filter(id=collector_id).update(
+                rating=average_rating(stats.rating_sum, stats.rating_count),
+            )
+        return stats
+
+    @staticmethod
+    def summary(stats: CollectorReviewStats | None) -> dict:
+        """汇总行 → 评价概览（评分、星级分布、标签按次数降序）"""
+        if stats is None:
+            return {
+                "rating": average_rating(0, 0), "rating_count": 0,
+                "distribution": {str(s): 0 for s in STARS}, "tags": [],
+            }
+        return {
+            "rating": average_rating(stats.rating_sum, stats.rating_count),
+            "rating_count": stats.rating_count,
+            "distribution": {str(s): getattr(stats, f"star_{s}") for s in STARS},
+            "tags": [
+                {"tag": tag, "count": count}
+                for tag, count in sorted((stats.tag_counts or {}).items(), key=lambda kv: (-kv[1], kv[0]))
+            ],
+        }
+
+    @staticmethod
+    async def rebuild(batch_size: int = 5000) -> int:
+        """
+        从 reviews 表重建全部评价汇总并同步 Collector.rating
+        :return: 重建的汇总行数
+        """
+        collector_ids = set(
+            await Review.filter(collector_id__isnull=False).distinct().values_list("collector_id", flat=True)
+        )
+        collector_ids |= set(await CollectorReviewStats.all().values_list("collector_id", flat=True))
+        for collector_id in sorted(collector_ids):
+            await ReviewStatsService._rebuild_one(collector_id, batch_size)
+        return len(collector_ids)
+
+    @staticmethod
+    async def _rebuild_one(collector_id: int, batch_size: int) -> None:
+        """锁定汇总行后在同一事务内重新聚合该回收员的评价并覆盖写入"""
+        async with in_transaction():
+            await CollectorReviewStats.get_or_create(collector_id=collector_id)
+            stats = await CollectorReviewStats.filter(collector_id=collector_id).select_for_update().get()
+
+            histogram = dict(
+                await Review.filter(collector_id=collector_id)
+                .annotate(n=Count("id"))
+                .group_by("rating")
+                .values_list("rating", "n")
+            )
+            tag_counts: Counter = Counter()
+            last_id = 0
+            while True:
+                rows = await (
+                    Review.filter(id__gt=last_id, collector_id=collector_id, tags__isnull=False)
+                    .order_by("id")
+                    .limit(batch_size)
+                    .values_list("id", "tags")
+                )
+                if not rows:
+                    break
+                for _, tags in rows:
+                    tag_counts.update(parse_tags(tags))
+                last_id = rows[-1][0]
+
+            stats.rating_sum = sum(star * n for star, n in histogram.items())
+            stats.rating_count = sum(histogram.values())
+            stats.tag_counts = dict(tag_counts)
+            for s in STARS:
+                setattr(stats, f"star_{s}", histogram.get(s, 0))
+            await stats.save()
+            await Collector.filter(id=collector_id).update(
+                rating=average_rating(stats.rating_sum, stats.rating_count),
+            )
@@ -6,8 +6,10 @@ import logging
 
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-from tortoise.transactions import atomic
 
+from app.common.cache import ResponseCache
+from app.common.transactions import after_commit, atomic
+from app.modules.ledger.service import LedgerService
 from app.modules.users.model import User
 from app.modules.notifications.service import NotificationService
 
@@ -48,6 +50,7 @@ class ExchangeResponse(BaseModel):
 # --- 接口 ---
 
 @router.get("/products")
+@ResponseCache.cached(ttl=300, tags=("shop",))
 async def get_products():
     """获取商城商品列表（仅上架商品）"""
     products = await ShopProduct.filter(is_active=True).order_by("-sort_order", "-created_at")
@@ -87,20 +90,18 @@ async def exchange_product(req: ExchangeRequest):
     if product.stock >= 0 and product.stock < 1:
         raise HTTPException(status_code=400, detail="商品库存不足")
 
-    if user.points < product.points_cost:
+    current_points = await LedgerService.balance("user", user.id, "points")
+    if current_points < product.points_cost:
         raise HTTPException(
             status_code=400,
-            detail=f"积分不足，需要{product.points_cost}积分，当前{user.points}积分",
+            detail=f"积分不足，需要{product.points_cost}积分，当前{int(current_points)}积分",
         )
 
-    # 扣减积分
-    user.points -= product.points_cost
-    await user.save()
-
     # 扣减库存（stock=-1 表示无限库存，不扣减）
     if product.stock > 0:
         product.stock -= 1
         await product.save()
+        await after_commit(ResponseCache.invalidate, "shop")
 
     # 创建兑换记录
     exchange = await PointsExchange.create(
@@ -110,6 +111,14 @@ async def exchange_product(req: ExchangeRequest):
         remark=req.remark,
     )
 
+    # 扣减积分（出账时再次校验余额，并发兑换不会扣成负数）
+    remaining = await LedgerService.debit(
+        "user", user.id, "points", product.points_cost,
+        "points_exchange", exchange.id, f"积分兑换 - {product.name}",
+    )
+    if remaining is None:
+        raise HTTPException(status_code=400, detail="积分不足")
+
     # 通知用户
     await NotificationService.send(
         user_id=user.id,
@@ -123,7 +132,7 @@ async def exchange_product(req: ExchangeRequest):
     return {
         "message": "兑换成功",
         "exchange_id": exchange.id,
-        "remaining_points": user.points,
+        "remaining_points": int(remaining),
     }
 
 
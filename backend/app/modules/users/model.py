@@ -15,6 +15,8 @@ class User(models.Model):
     # T2: 推荐奖励机制 — 邀请码和推荐关系
     invite_code = fields.CharField(max_length=8, unique=True, null=True, index=True)
     referred_by = fields.ForeignKeyField('models.User', related_name='referrals', null=True)
+    # 广播通知已读水位（已读的最大广播 id）
+    broadcast_read_id = fields.IntField(default=0)
     created_at = fields.DatetimeField(auto_now_add=True)
 
     class Meta:
@@ -22,3 +24,18 @@ class User(models.Model):
 
     def __str__(self):
         return self.full_name or self.username or str(self.id)
+
+
+class UserStats(models.Model):
+    """
+    用户回收统计 — 由 OrderService.settle_order 增量维护，首页统计按主键读取一行
+    口径: 该用户全部已完成订单
+    """
+    user_id = fields.IntField(pk=True, generated=False)
+    recycle_count = fields.IntField(default=0)
+    total_weight = fields.DecimalField(max_digits=15, decimal_places=2, default=0)
+    total_earnings = fields.DecimalField(max_digits=15, decimal_places=2, default=0)
+    updated_at = fields.DatetimeField(auto_now=True)
+
+    class Meta:
+        table = "user_stats"
@@ -1,61 +1,97 @@
 """用户路由"""
-from datetime import date
+from datetime import date, datetime
 from decimal import Decimal
 
 from fastapi import APIRouter, HTTPException
+from tortoise.functions import Sum
 
-from .model import User
+from .model import User, UserStats
 from .schemas import User_Pydantic
-from app.modules.orders.model import Order
+from app.common.pagination import after_cursor
+from app.common.projection import Projection, fmt_datetime, json_response, to_float
+from app.modules.ledger.model import LedgerEntry
+from app.modules.ledger.service import LedgerService
+from app.modules.orders.service import UserStatsService
 
 router = APIRouter(tags=["users"])
 
 
 @router.get("/users/{user_id}/points")
 async def get_user_points(user_id: int):
-    """积分以 User.points 为唯一权威来源"""
-    user = await User.get_or_none(id=user_id)
-    if not user:
+    """积分以账本为准: 当前积分取快照 + 增量，今日积分与明细直接读积分流水"""
+    if not await User.exists(id=user_id):
         raise HTTPException(status_code=404, detail="User not found")
 
-    total_points = user.points
-    completed_orders = await Order.filter(user_id=user_id, status="completed").order_by("-date").limit(10)
-
-    today_points = 0
-    for o in completed_orders:
-        if o.date.date() == date.today():
-            today_points += int((o.weight_actual or 0) * 10)
+    total_points = int(await LedgerService.balance("user", user_id, "points"))
+    entries = LedgerEntry.filter(account_type="user", account_id=user_id, asset="points")
+    today_points = await entries.filter(
+        amount__gt=0, created_at__gte=datetime.combine(date.today(), datetime.min.time()),
+    ).annotate(total=Sum("amount")).first().values_list("total", flat=True)
+    recent = await entries.order_by("-created_at", "-id").limit(5).values_list("memo", "created_at", "amount")
 
     return {
         "current_points": total_points,
-        "today_points": today_points,
+        "today_points": int(today_points or 0),
         "total_points": total_points,
         "history": [
             {
-                "reason": f"回收奖励 - 订单#{o.id}",
-                "date": o.date.strftime("%Y-%m-%d %H:%M"),
-                "amount": int((o.weight_actual or 0) * 10),
-                "type": "in",
+                "reason": memo,
+                "date": created_at.strftime("%Y-%m-%d %H:%M"),
+                "amount": abs(int(amount)),
+                "type": "in" if amount > 0 else "out",
             }
-            for o in completed_orders[:5]
+            for memo, created_at, amount in recent
         ],
     }
 
 
+# GET /users/{id}/ledger 响应列
+LEDGER_COLUMNS = Projection(
+    id="id",
+    asset="asset",
+    amount=("amount", to_float),
+    source_type="source_type",
+    source_id="source_id",
+    memo="memo",
+    created_at=("created_at", fmt_datetime("%Y-%m-%d %H:%M:%S")),
+)
+
+
+@router.get("/users/{user_id}/ledger")
+async def get_user_ledger(user_id: int, asset: str | None = None, limit: int = 20, cursor: str | None = None):
+    """
+    用户余额/积分流水，按 (created_at, id) 倒序游标分页
+    首页不传 cursor，返回 {"items": [...], "next_cursor": str | null}
+    """
+    qs = LedgerEntry.filter(account_type="user", account_id=user_id)
+    if asset is not None:
+        qs = qs.filter(asset=asset)
+    if cursor:
+        qs = qs.filter(after_cursor("created_at", cursor))
+    rows = await LEDGER_COLUMNS.fetch_raw(qs.order_by("-created_at", "-id").limit(limit))
+    return json_response({
+        "items": LEDGER_COLUMNS.serialize(rows),
+        "next_cursor": LEDGER_COLUMNS.next_cursor(rows, "created_at", limit),
+    })
+
+
 @router.get("/users/{user_id}", response_model=User_Pydantic)
 async def get_user(user_id: int):
     user = await User.get_or_none(id=user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    balances = await LedgerService.balances("user", user_id)
+    user.balance, user.points = balances["balance"], int(balances["points"])
     return await User_Pydantic.from_tortoise_orm(user)
 
 
 @router.get("/users/{user_id}/stats")
 async def get_user_stats(user_id: int):
-    completed_orders = await Order.filter(user_id=user_id, status="completed")
-    recycle_count = len(completed_orders)
-    total_weight = sum(o.weight_actual or Decimal("0") for o in completed_orders)
-    total_earnings = sum(o.amount_final or Decimal("0") for o in completed_orders)
+    """读取结算时增量维护的统计行（按主键一次查询）；尚无统计行时回退到订单实时聚合"""
+    stats = await UserStats.filter(user_id=user_id).first().values_list(
+        "recycle_count", "total_weight", "total_earnings",
+    )
+    recycle_count, total_weight, total_earnings = stats or await UserStatsService.aggregate(user_id)
 
     return {
         "carbon_offset": float(total_weight) * 2.5,
@@ -13,3 +13,7 @@ class Withdrawal(models.Model):
 
     class Meta:
         table = "withdrawals"
+        indexes = [
+            # 财务审核列表按状态筛选、按申请时间倒序翻页；超时扫描同样使用
+            ("status", "request_date"),
+        ]
@@ -1,58 +1,91 @@
 """提现路由 — 路由层只负责参数校验和调用 service"""
+from datetime import date, datetime, time, timedelta
+
 from fastapi import APIRouter, Body, Depends
-from tortoise.transactions import atomic
 
+from app.common.pagination import after_cursor
+from app.common.projection import Projection, fmt_datetime, json_response, to_str_or_none
+from app.common.transactions import atomic
 from app.modules.admin.dependencies import require_admin
 from app.modules.collectors.model import Collector
 
 from .model import Withdrawal
-from .schemas import CollectorWithdrawalSchema, CreateWithdrawalSchema, Withdrawal_Pydantic
+from .schemas import BatchReviewSchema, CollectorWithdrawalSchema, CreateWithdrawalSchema, Withdrawal_Pydantic
 from .service import WithdrawalService
 
 router = APIRouter(tags=["withdrawals"])
 
+# 提现列表响应列: 单条 LEFT JOIN 取回用户名，不实例化模型
+WITHDRAWAL_LIST_COLUMNS = Projection(
+    id=("id", str),
+    order_id=("order_id", to_str_or_none),
+    user_id=("user_id", str),
+    user_name=(
+        ("user__full_name", "user__username", "user_id"),
+        lambda full_name, username, uid: full_name or username or f"用户{uid}",
+    ),
+    amount=("amount", float),
+    status="status",
+    channel="channel",
+    request_date=("request_date", fmt_datetime("%Y-%m-%d %H:%M:%S")),
+)
+
 
 @router.get("/withdrawals")
 async def get_user_withdrawals(user_id: int, limit: int = 100, offset: int = 0):
     """用户查看自己的提现记录"""
-    withdrawals = (
-        await Withdrawal.filter(user_id=user_id)
-        .prefetch_related("user", "order")
+    rows = await WITHDRAWAL_LIST_COLUMNS.fetch(
+        Withdrawal.filter(user_id=user_id)
         .order_by("-request_date")
         .limit(limit).offset(offset)
     )
-    return [
-        {
-            "id": str(w.id),
-            "order_id": str(w.order_id) if w.order_id else None,
-            "user_id": str(w.user_id),
-            "user_name": w.user.full_name or w.user.username or f"用户{w.user_id}",
-            "amount": float(w.amount),
-            "status": w.status,
-            "channel": w.channel,
-            "request_date": w.request_date.strftime("%Y-%m-%d %H:%M:%S"),
-        }
-        for w in withdrawals
-    ]
+    return json_response(rows)
 
 
 @router.get("/admin/withdrawals", dependencies=[Depends(require_admin)])
-async def get_withdrawals():
-    """管理后台查看全部提现记录"""
-    withdrawals = await Withdrawal.all().prefetch_related("user").order_by("-request_date")
-    return [
-        {
-            "id": str(w.id),
-            "order_id": str(w.order_id) if w.order_id else None,
-            "user_id": str(w.user_id),
-            "user_name": w.user.full_name or w.user.username or f"用户{w.user_id}",
-            "amount": float(w.amount),
-            "status": w.status,
-            "channel": w.channel,
-            "request_date": w.request_date.strftime("%Y-%m-%d %H:%M:%S"),
+async def get_withdrawals(
+    status: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+    user_id: int | None = None,
+    channel: str | None = None,
+    limit: int = 100, offset: int = 0,
+    cursor: str | None = None,
+):
+    """
+    管理后台提现列表，支持按状态 / 申请日期区间（含首尾）/ 用户 / 渠道过滤
+    分页两种模式:
+    - 传入 cursor（首页传空串）启用游标分页，按 (request_date, id) 倒序，
+      返回 {"items": [...], "next_cursor": str | null}；
+      首页额外返回 "totals": 除状态外相同筛选条件下各状态的笔数与金额合计
+    - 不传 cursor 时按 limit/offset 返回提现数组（已弃用，仅兼容旧客户端，单页最多 limit 条）
+    """
+    qs = Withdrawal.all()
+    if start_date is not None:
+        qs = qs.filter(request_date__gte=datetime.combine(start_date, time.min))
+    if end_date is not None:
+        qs = qs.filter(request_date__lt=datetime.combine(end_date + timedelta(days=1), time.min))
+    if user_id is not None:
+        qs = qs.filter(user_id=user_id)
+    if channel is not None:
+        qs = qs.filter(channel=channel)
+    listed = qs.filter(status=status) if status is not None else qs
+
+    if cursor is not None:
+        page = listed.filter(after_cursor("request_date", cursor)) if cursor else listed
+        rows = await WITHDRAWAL_LIST_COLUMNS.fetch_raw(page.order_by("-request_date", "-id").limit(limit))
+        result = {
+            "items": WITHDRAWAL_LIST_COLUMNS.serialize(rows),
+            "next_cursor": WITHDRAWAL_LIST_COLUMNS.next_cursor(rows, "request_date", limit),
         }
-        for w in withdrawals
-    ]
+        if not cursor:
+            result["totals"] = await WithdrawalService.get_status_totals(qs)
+        return json_response(result)
+
+    rows = await WITHDRAWAL_LIST_COLUMNS.fetch(
+        listed.order_by("-request_date", "-id").limit(limit).offset(offset)
+    )
+    return json_response(rows)
 
 
 @router.post("/withdrawals", response_model=Withdrawal_Pydantic)
@@ -66,6 +99,12 @@ async def create_withdrawal(data: CreateWithdrawalSchema):
     return await Withdrawal_Pydantic.from_tortoise_orm(w)
 
 
+@router.post("/admin/withdrawals/batch", dependencies=[Depends(require_admin)])
+async def batch_review_withdrawals(data: BatchReviewSchema):
+    """管理员批量审批/拒绝提现，返回每条记录的处理结果"""
+    return await WithdrawalService.batch_review(data.ids, data.action, data.reason)
+
+
 @router.put("/admin/withdrawals/{withdrawal_id}/approve", dependencies=[Depends(require_admin)])
 @atomic()
 async def approve_withdrawal(withdrawal_id: int):
@@ -1,5 +1,5 @@
 """提现 Schema"""
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 from tortoise.contrib.pydantic import pydantic_model_creator
 from .model import Withdrawal
 
@@ -17,3 +17,16 @@ class CollectorWithdrawalSchema(BaseModel):
     collector_id: int = Field(..., gt=0)
     amount: float = Field(..., gt=0)
     channel: str = "wechat"
+
+
+class BatchReviewSchema(BaseModel):
+    """批量审核提现"""
+    ids: list[int] = Field(..., min_length=1, max_length=1000)
+    action: str = Field(..., pattern=r"^(approve|reject)$")
+    reason: str | None = None
+
+    @model_validator(mode="after")
+    def require_reason_for_reject(self):
+        if self.action == "reject" and not self.reason:
+            raise ValueError("批量拒绝需要填写原因")
+        return self
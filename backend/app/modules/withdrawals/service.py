@@ -1,11 +1,20 @@
-"""提现业务逻辑 Service"""
+"""
+提现业务逻辑 Service
+余额扣减经账本出账（锁快照行校验余额），退还写入账本入账流水；
+状态流转使用条件 UPDATE（WHERE status='pending'），并发请求不会超额扣款或重复退款
+"""
 from decimal import Decimal
 
 from fastapi import HTTPException
+from tortoise.functions import Count, Sum
+from tortoise.queryset import QuerySet
 
 from app.core.config import settings
 from app.common.audit_log import AuditLog
+from app.common.scheduler import WITHDRAWAL_EXPIRE_AFTER, WITHDRAWAL_EXPIRY_QUEUE, DelayedQueue
+from app.common.transactions import in_transaction
 from app.modules.collectors.model import Collector
+from app.modules.ledger.service import LedgerService
 from app.modules.notifications.service import NotificationService
 from app.modules.orders.model import Order
 from app.modules.users.model import User
@@ -23,8 +32,7 @@ class WithdrawalService:
         if amount > settings.MAX_WITHDRAWAL_AMOUNT:
             raise HTTPException(status_code=400, detail=f"单笔提现不能超过 {settings.MAX_WITHDRAWAL_AMOUNT} 元")
 
-        user = await User.get_or_none(id=user_id)
-        if not user or user.balance < Decimal(str(amount)):
+        if not await User.exists(id=user_id):
             raise HTTPException(status_code=400, detail="余额不足")
 
         # 订单关联校验（可选）
@@ -39,53 +47,146 @@ class WithdrawalService:
             if await Withdrawal.get_or_none(order_id=order.id):
                 raise HTTPException(status_code=400, detail="该订单已有提现记录")
 
-        # 扣减余额
-        user.balance -= Decimal(str(amount))
-        await user.save()
-
-        w = await Withdrawal.create(
-            user=user, order_id=order_id, amount=amount,
-            status="pending", channel=channel,
-        )
+        # 出账与提现记录同一事务: 余额不足时整体回滚，并发提现不会扣成负数
+        async with in_transaction():
+            w = await Withdrawal.create(
+                user_id=user_id, order_id=order_id, amount=amount,
+                status="pending", channel=channel,
+            )
+            remaining = await LedgerService.debit(
+                "user", user_id, "balance", amount, "withdrawal", w.id, "提现申请",
+            )
+            if remaining is None:
+                raise HTTPException(status_code=400, detail="余额不足")
         await AuditLog.create(
             entity_type="withdrawal", entity_id=w.id,
             action="created", new_value=str(amount),
-            operator_type="user", operator_id=user.id,
+            operator_type="user", operator_id=user_id,
         )
+        # 登记超时拒绝时间，到期由调度器自动退回
+        await DelayedQueue.schedule(WITHDRAWAL_EXPIRY_QUEUE, w.id, WITHDRAWAL_EXPIRE_AFTER)
         return w
 
     @staticmethod
     async def create_collector_withdrawal(
         collector_id: int, amount: float, channel: str
     ) -> dict:
-        """回收员佣金提现 — 从 Collector.balance 扣款，关联 User 创建 Withdrawal"""
+        """回收员佣金提现 — 从回收员账户出账，关联 User 创建 Withdrawal"""
         if amount > settings.MAX_WITHDRAWAL_AMOUNT:
             raise HTTPException(status_code=400, detail=f"单笔提现不能超过 {settings.MAX_WITHDRAWAL_AMOUNT} 元")
 
         collector = await Collector.get_or_none(id=collector_id)
         if not collector:
             raise HTTPException(status_code=404, detail="回收员不存在")
-        if collector.balance < Decimal(str(amount)):
-            raise HTTPException(status_code=400, detail="佣金余额不足")
         if not collector.user_id:
             raise HTTPException(status_code=400, detail="回收员未关联用户账号")
 
-        user = await User.get(id=collector.user_id)
-
-        collector.balance -= Decimal(str(amount))
-        await collector.save()
-
-        w = await Withdrawal.create(
-            user=user, order_id=None, amount=amount,
-            status="pending", channel=channel,
-        )
+        async with in_transaction():
+            w = await Withdrawal.create(
+                user_id=collector.user_id, order_id=None, amount=amount,
+                status="pending", channel=channel,
+            )
+            remaining = await LedgerService.debit(
+                "collector", collector_id, "balance", amount, "withdrawal", w.id, "提现申请",
+            )
+            if remaining is None:
+                raise HTTPException(status_code=400, detail="佣金余额不足")
         await AuditLog.create(
             entity_type="withdrawal", entity_id=w.id,
             action="created", new_value=f"回收员佣金提现 {amount}",
             operator_type="collector", operator_id=collector.id,
         )
+        await DelayedQueue.schedule(WITHDRAWAL_EXPIRY_QUEUE, w.id, WITHDRAWAL_EXPIRE_AFTER)
         return {"id": w.id, "amount": float(w.amount), "status": w.status}
 
+    @staticmethod
+    async def batch_review(ids: list[int], action: str, reason: str | None = None) -> dict:
+        """
+        批量审批/拒绝提现，一个事务内:
+        锁定仍为 pending 的记录 → 一条带状态条件的 UPDATE → （拒绝时）批量写入退款流水
+        → 批量写审计日志与通知；返回每个 id 的处理结果
+        """
+        ids = list(dict.fromkeys(ids))
+        new_status = "approved" if action == "approve" else "rejected"
+        async with in_transaction():
+            rows = await (
+                Withdrawal.filter(id__in=ids, status="pending")
+                .select_for_update()
+                .values_list("id", "user_id", "amount")
+            )
+            done = [wid for wid, _, _ in rows]
+            if rows:
+                await Withdrawal.filter(id__in=done, status="pending").update(status=new_status)
+                if new_status == "rejected":
+                    await WithdrawalService.refund_balances(rows)
+                await AuditLog.bulk_create([
+                    AuditLog(
+                        entity_type="withdrawal", entity_id=wid,
+                        action=new_status, new_value=reason if new_status == "rejected" else None,
+                        operator_type="admin",
+                    )
+                    for wid in done
+                ])
+                if new_status == "approved":
+                    notify = [
+                        ("提现已通过", f"您的提现申请（¥{float(amount):.2f}）已审批通过，请留意到账。")
+                        for _, _, amount in rows
+                    ]
+                else:
+                    notify = [
+                        ("提现被拒绝", f"您的提现申请（¥{float(amount):.2f}）未通过审核，原因：{reason}。金额已退回余额。")
+                        for _, _, amount in rows
+                    ]
+                await NotificationService.send_many([
+                    {
+                        "user_id": user_id,
+                        "title": title,
+                        "content": content,
+                        "type": "withdrawal",
+                        "related_entity_type": "withdrawal",
+                        "related_entity_id": wid,
+                    }
+                    for (wid, user_id, _), (title, content) in zip(rows, notify)
+                ])
+        await DelayedQueue.cancel(WITHDRAWAL_EXPIRY_QUEUE, *done)
+
+        processed = set(done)
+        missing = set(ids) - processed
+        existing = set(await Withdrawal.filter(id__in=list(missing)).values_list("id", flat=True)) if missing else set()
+        results = []
+        for wid in ids:
+            if wid in processed:
+                results.append({"id": wid, "ok": True, "status": new_status})
+            elif wid in existing:
+                results.append({"id": wid, "ok": False, "detail": "该提现已处理"})
+            else:
+                results.append({"id": wid, "ok": False, "detail": "提现记录不存在"})
+        return {"processed": len(done), "results": results}
+
+    @staticmethod
+    async def get_status_totals(qs: QuerySet) -> dict:
+        """按状态汇总笔数与金额（一条 GROUP BY），缺失的状态补 0"""
+        rows = await (
+            qs.annotate(count=Count("id"), amount=Sum("amount"))
+            .group_by("status")
+            .values_list("status", "count", "amount")
+        )
+        totals = {s: {"count": 0, "amount": 0.0} for s in ("pending", "approved", "rejected")}
+        for status, count, amount in rows:
+            totals[status] = {"count": count, "amount": float(amount or 0)}
+        return totals
+
+    @staticmethod
+    async def refund_balances(rows: list[tuple[int, int, Decimal]]) -> None:
+        """
+        批量退还余额 — 每笔提现一条入账流水，一条 INSERT 写入
+        :param rows: [(提现 id, 用户 id, 金额)]
+        """
+        await LedgerService.record([
+            LedgerService.entry("user", user_id, "balance", amount, "withdrawal", wid, "提现退回")
+            for wid, user_id, amount in rows
+        ])
+
     @staticmethod
     async def approve_withdrawal(withdrawal_id: int) -> dict:
         """管理员审批通过提现"""
@@ -95,8 +196,9 @@ class WithdrawalService:
         if w.status != "pending":
             raise HTTPException(status_code=400, detail="该提现已处理")
 
-        w.status = "approved"
-        await w.save()
+        if not await Withdrawal.filter(id=withdrawal_id, status="pending").update(status="approved"):
+            raise HTTPException(status_code=400, detail="该提现已处理")
+        await DelayedQueue.cancel(WITHDRAWAL_EXPIRY_QUEUE, w.id)
         await AuditLog.create(
             entity_type="withdrawal", entity_id=w.id,
             action="approved", operator_type="admin",
@@ -115,17 +217,17 @@ class WithdrawalService:
     @staticmethod
     async def reject_withdrawal(withdrawal_id: int, reason: str) -> dict:
         """管理员拒绝提现 — 退还余额"""
-        w = await Withdrawal.get_or_none(id=withdrawal_id).prefetch_related("user")
+        w = await Withdrawal.get_or_none(id=withdrawal_id)
         if not w:
             raise HTTPException(status_code=404, detail="提现记录不存在")
         if w.status != "pending":
             raise HTTPException(status_code=400, detail="该提现已处理")
 
-        w.status = "rejected"
-        await w.save()
-
-        w.user.balance += w.amount
-        await w.user.save()
+        # 状态条件保证只退款一次
+        if not await Withdrawal.filter(id=withdrawal_id, status="pending").update(status="rejected"):
+            raise HTTPException(status_code=400, detail="该提现已处理")
+        await WithdrawalService.refund_balances([(w.id, w.user_id, w.amount)])
+        await DelayedQueue.cancel(WITHDRAWAL_EXPIRY_QUEUE, w.id)
 
         await AuditLog.create(
             entity_type="withdrawal", entity_id=w.id,
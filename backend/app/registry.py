@@ -21,6 +21,7 @@ from app.modules.reviews.router import router as reviews_router
 from app.modules.referrals.router import router as referrals_router
 from app.modules.shop.router import router as shop_router
 from app.modules.feedback.router import router as feedback_router
+from app.modules.bootstrap.router import router as bootstrap_router
 
 router = APIRouter()
 
@@ -41,3 +42,4 @@ router.include_router(reviews_router)
 router.include_router(referrals_router)
 router.include_router(shop_router)
 router.include_router(feedback_router)
+router.include_router(bootstrap_router)
@@ -0,0 +1,53 @@
+"""
+独立调度进程入口
+用法: python -m app.scheduler
+API 进程配置 SCHEDULER_ENABLED=false 后不再运行定时任务，由本进程负责；
+可部署多个副本做热备，通过 Redis 租约保证同一时刻只有一个副本执行
+"""
+import asyncio
+import logging
+import signal
+
+import aioredis
+from tortoise import Tortoise
+
+from app.common.cache import ResponseCache
+from app.common.scheduler import DelayedQueue, SchedulerService
+from app.core.config import settings
+from app.modules.notifications.stream import NotificationHub
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(name)s] %(levelname)s: %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+
+
+async def main() -> None:
+    await Tortoise.init(db_url=settings.DATABASE_URL, modules={"models": ["app.models"]})
+    redis = aioredis.from_url(settings.REDIS_URL, encoding="utf8", decode_responses=True)
+    # 任务中的写操作同样需要失效响应缓存
+    ResponseCache.init(redis)
+    DelayedQueue.init(redis)
+    # 任务发出的通知经 Redis 推送给 API 进程上的 SSE 连接
+    NotificationHub.init(redis)
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    await SchedulerService.start(redis)
+    try:
+        await stopping.wait()
+    finally:
+        await SchedulerService.stop()
+        ResponseCache.close()
+        DelayedQueue.close()
+        await NotificationHub.stop()
+        await redis.close()
+        await Tortoise.close_connections()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
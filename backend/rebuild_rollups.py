@@ -0,0 +1,30 @@
+"""
+重建订单日汇总表 order_daily_rollups 与用户统计表 user_stats
+用法: python rebuild_rollups.py [chunk_days]
+上线汇总表后执行一次回填；统计口径出现偏差时也可随时重建
+"""
+import asyncio
+import sys
+
+from tortoise import Tortoise
+
+from app.core.config import settings
+from app.modules.orders.service import OrderRollupService, UserStatsService
+
+
+async def run(chunk_days: int):
+    await Tortoise.init(
+        db_url=settings.DATABASE_URL,
+        modules={"models": ["app.models"]}
+    )
+    await Tortoise.generate_schemas(safe=True)
+
+    count = await OrderRollupService.rebuild(chunk_days=chunk_days)
+    print(f"Rebuilt {count} rollup rows.")
+    count = await UserStatsService.rebuild()
+    print(f"Rebuilt {count} user stats rows.")
+
+    await Tortoise.close_connections()
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 30))
@@ -0,0 +1,101 @@
+"""
+管理后台统计测试
+覆盖: 概览条件聚合、按天趋势 GROUP BY 与补零、日汇总增量维护与重建
+"""
+import pytest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+from app.modules.admin.service import AdminStatsService
+from app.modules.materials.model import Material
+from app.modules.orders.model import Order, OrderDailyRollup
+from app.modules.orders.service import OrderRollupService
+from app.modules.users.model import User
+from app.modules.withdrawals.model import Withdrawal
+
+
+async def _make_order(user, mat, status, amount, weight, when):
+    order = await Order.create(
+        user=user, material=mat, address="测试地址", status=status,
+        amount_final=amount, weight_actual=weight,
+    )
+    await Order.filter(id=order.id).update(date=when)
+    return order
+
+
+@pytest.mark.asyncio
+async def test_overview_counters():
+    """概览指标一次查询返回全部计数"""
+    user = await User.create(openid="s_u1", full_name="统计用户", password="x")
+    mat = await Material.create(
+        name="废纸", category="Paper",
+        current_price=Decimal("1.00"), market_price=Decimal("1.00"), unit="kg",
+    )
+    now = datetime.now()
+    await _make_order(user, mat, "completed", Decimal("10.00"), Decimal("5.00"), now)
+    await _make_order(user, mat, "completed", Decimal("6.00"), Decimal("3.00"), now)
+    await _make_order(user, mat, "pending", None, None, now)
+    await Withdrawal.create(user=user, amount=Decimal("1.00"), channel="wechat")
+    await OrderRollupService.rebuild()
+
+    overview = await AdminStatsService.get_overview(new_user_since=now - timedelta(days=7))
+
+    assert overview["total_users"] == 1
+    assert overview["total_collectors"] == 0
+    assert overview["total_orders"] == 3
+    assert overview["completed_orders"] == 2
+    assert overview["pending_orders"] == 1
+    assert overview["pending_withdrawals"] == 1
+    assert overview["total_revenue"] == 16.0
+    assert overview["total_weight"] == 8.0
+    assert overview["new_users_7d"] == 1
+
+
+@pytest.mark.asyncio
+async def test_order_trend_zero_filled():
+    """按天趋势: 有数据的日期聚合正确，无数据的日期补 0"""
+    user = await User.create(openid="s_u2", full_name="趋势用户", password="x")
+    mat = await Material.create(
+        name="塑料", category="Plastic",
+        current_price=Decimal("2.00"), market_price=Decimal("2.00"), unit="kg",
+    )
+    start = date.today() - timedelta(days=4)
+    day1 = datetime.combine(start + timedelta(days=1), datetime.min.time()) + timedelta(hours=9)
+    await _make_order(user, mat, "completed", Decimal("4.00"), Decimal("2.00"), day1)
+    await _make_order(user, mat, "pending", None, None, day1)
+    # 窗口外的订单不计入
+    await _make_order(user, mat, "completed", Decimal("99.00"), Decimal("1.00"), day1 - timedelta(days=10))
+    await OrderRollupService.rebuild(chunk_days=3)
+
+    trend = await AdminStatsService.get_order_trend(start=start, days=5)
+
+    assert [t["date"] for t in trend] == [(start + timedelta(days=i)).isoformat() for i in range(5)]
+    assert trend[0] == {"date": start.isoformat(), "total": 0, "completed": 0, "revenue": 0}
+    assert trend[1]["total"] == 2
+    assert trend[1]["completed"] == 1
+    assert float(trend[1]["revenue"]) == 4.0
+
+
+@pytest.mark.asyncio
+async def test_rollup_record_matches_rebuild():
+    """结算时增量累加的日汇总与从历史重建的结果一致"""
+    user = await User.create(openid="s_u3", full_name="汇总用户", password="x")
+    mat = await Material.create(
+        name="金属", category="Metal",
+        current_price=Decimal("5.00"), market_price=Decimal("5.00"), unit="kg",
+    )
+    for amount, weight in [(Decimal("10.00"), Decimal("2.00")), (Decimal("5.50"), Decimal("1.10"))]:
+        order = await _make_order(user, mat, "completed", amount, weight, datetime.now())
+        order = await Order.get(id=order.id)
+        await OrderRollupService.record(order, weight, amount)
+
+    rows = await OrderDailyRollup.all().values("material_id", "category", "order_count", "total_weight", "total_amount")
+    assert len(rows) == 1
+    assert rows[0]["category"] == "Metal"
+    assert rows[0]["order_count"] == 2
+    assert rows[0]["total_weight"] == Decimal("3.10")
+    assert rows[0]["total_amount"] == Decimal("15.50")
+
+    assert await OrderRollupService.rebuild() == 1
+    rebuilt = await OrderDailyRollup.all().values("material_id", "category", "order_count", "total_weight", "total_amount")
+    assert rebuilt == rows
@@ -0,0 +1,115 @@
+"""
+管理后台提现列表测试
+覆盖: 多条件过滤、游标翻页不重不漏、首页按状态汇总、无游标的数组模式按 limit 截断、批量审批/拒绝的逐条结果与汇总退款
+"""
+import json
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from pydantic import ValidationError
+
+from app.common.audit_log import AuditLog
+from app.modules.ledger.service import LedgerService
+from app.modules.notifications.model import Notification
+from app.modules.users.model import User
+from app.modules.withdrawals.model import Withdrawal
+from app.modules.withdrawals.router import get_withdrawals
+from app.modules.withdrawals.schemas import BatchReviewSchema
+from app.modules.withdrawals.service import WithdrawalService
+
+
+@pytest.mark.asyncio
+async def test_admin_withdrawals_filters_pages_and_totals():
+    u1 = await User.create(openid="aw_u1", full_name="财务用户1", password="x")
+    u2 = await User.create(openid="aw_u2", full_name="财务用户2", password="x")
+    base = datetime(2026, 3, 10, 12, 0, 0)
+    specs = [
+        (u1, "10.00", "pending", "wechat", 0),
+        (u1, "20.00", "pending", "alipay", 1),
+        (u1, "5.50", "approved", "wechat", 2),
+        (u2, "7.00", "rejected", "wechat", 3),
+        (u2, "100.00", "pending", "wechat", 20),  # 超出日期区间
+    ]
+    for user, amount, status, channel, days in specs:
+        w = await Withdrawal.create(user=user, amount=Decimal(amount), status=status, channel=channel)
+        await Withdrawal.filter(id=w.id).update(request_date=base + timedelta(days=days))
+
+    window = {"start_date": date(2026, 3, 10), "end_date": date(2026, 3, 13)}
+
+    # 游标翻页: 每页 2 条，覆盖区间内 4 条且不重复
+    seen, cursor = [], ""
+    while True:
+        page = json.loads((await get_withdrawals(**window, limit=2, cursor=cursor)).body)
+        if cursor == "":
+            assert page["totals"] == {
+                "pending": {"count": 2, "amount": 30.0},
+                "approved": {"count": 1, "amount": 5.5},
+                "rejected": {"count": 1, "amount": 7.0},
+            }
+        else:
+            assert "totals" not in page
+        seen += [item["amount"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [7.0, 5.5, 20.0, 10.0]
+
+    # 状态过滤只影响列表，汇总仍覆盖全部状态
+    page = json.loads((await get_withdrawals(**window, status="pending", cursor="")).body)
+    assert [i["amount"] for i in page["items"]] == [20.0, 10.0]
+    assert page["totals"]["approved"]["count"] == 1
+
+    rows = json.loads((await get_withdrawals(user_id=u1.id, channel="wechat")).body)
+    assert [r["amount"] for r in rows] == [5.5, 10.0]
+
+
+@pytest.mark.asyncio
+async def test_admin_withdrawals_array_mode_is_bounded():
+    user = await User.create(openid="aw_all", full_name="全量用户", password="x")
+    await Withdrawal.bulk_create([
+        Withdrawal(user=user, amount=Decimal("1.00"), channel="wechat") for _ in range(120)
+    ])
+    # 旧数组模式不再一次返回全部历史；待审核合计由游标首页的 totals 提供
+    rows = json.loads((await get_withdrawals()).body)
+    assert len(rows) == 100
+    page = json.loads((await get_withdrawals(cursor="")).body)
+    assert page["totals"]["pending"] == {"count": 120, "amount": 120.0}
+    rows = json.loads((await get_withdrawals(limit=50, offset=100)).body)
+    assert len(rows) == 20
+
+
+@pytest.mark.asyncio
+async def test_batch_review_reports_per_id_outcomes():
+    u1 = await User.create(openid="aw_b1", full_name="批量用户1", password="x", balance=Decimal("0"))
+    u2 = await User.create(openid="aw_b2", full_name="批量用户2", password="x", balance=Decimal("0"))
+    a = await Withdrawal.create(user=u1, amount=Decimal("10.00"), channel="wechat")
+    b = await Withdrawal.create(user=u1, amount=Decimal("2.50"), channel="wechat")
+    c = await Withdrawal.create(user=u2, amount=Decimal("4.00"), channel="alipay")
+    done = await Withdrawal.create(user=u2, amount=Decimal("9.00"), channel="alipay", status="approved")
+
+    result = await WithdrawalService.batch_review([a.id, b.id, c.id, done.id, 999999, a.id], "reject", "信息有误")
+
+    assert result["processed"] == 3
+    assert result["results"] == [
+        {"id": a.id, "ok": True, "status": "rejected"},
+        {"id": b.id, "ok": True, "status": "rejected"},
+        {"id": c.id, "ok": True, "status": "rejected"},
+        {"id": done.id, "ok": False, "detail": "该提现已处理"},
+        {"id": 999999, "ok": False, "detail": "提现记录不存在"},
+    ]
+    assert await LedgerService.balance("user", u1.id, "balance") == Decimal("12.50")
+    assert await LedgerService.balance("user", u2.id, "balance") == Decimal("4.00")
+    assert await AuditLog.filter(entity_type="withdrawal", action="rejected").count() == 3
+    assert await Notification.filter(type="withdrawal", title="提现被拒绝").count() == 3
+
+    # 已拒绝的记录再次批量审批不会重复处理
+    again = await WithdrawalService.batch_review([a.id], "approve")
+    assert again == {"processed": 0, "results": [{"id": a.id, "ok": False, "detail": "该提现已处理"}]}
+    assert (await Withdrawal.get(id=done.id)).status == "approved"
+
+
+def test_batch_review_schema_requires_reason_for_reject():
+    with pytest.raises(ValidationError):
+        BatchReviewSchema(ids=[1], action="reject")
+    assert BatchReviewSchema(ids=[1], action="approve").reason is None
@@ -0,0 +1,45 @@
+"""
+启动聚合接口测试
+覆盖: 用户端各分区并发取回、按分区 ETag 跳过未变化的数据、全部未变化时返回 304
+"""
+import json
+from decimal import Decimal
+
+import pytest
+
+from app.modules.bootstrap.router import bootstrap_user
+from app.modules.ledger.service import LedgerService
+from app.modules.materials.model import Material
+from app.modules.users.model import User
+
+
+@pytest.mark.asyncio
+async def test_bootstrap_user_sections_and_etags():
+    user = await User.create(openid="bs_u1", full_name="启动用户", password="x", points=10)
+    await Material.create(
+        name="废纸", category="Paper",
+        current_price=Decimal("1.00"), market_price=Decimal("1.00"), unit="kg",
+    )
+
+    resp = await bootstrap_user(user.id, if_none_match=None)
+    sections = json.loads(resp.body)["sections"]
+    assert set(sections) == {"user", "stats", "points", "unread_count", "home_config", "materials"}
+    assert sections["user"]["data"]["full_name"] == "启动用户"
+    assert sections["points"]["data"]["current_points"] == 10
+    assert sections["unread_count"]["data"] == {"count": 0}
+    assert [m["name"] for m in sections["materials"]["data"]] == ["废纸"]
+
+    # 只有积分变化: 客户端带上全部旧 ETag，只返回含积分的分区数据
+    await LedgerService.record([LedgerService.entry("user", user.id, "points", 5, "referral", 1)])
+    known = ", ".join(s["etag"] for s in sections.values())
+    resp = await bootstrap_user(user.id, if_none_match=known)
+    updated = json.loads(resp.body)["sections"]
+    assert [name for name, s in updated.items() if "data" in s] == ["user", "points"]
+    assert updated["points"]["data"]["current_points"] == 15
+    assert updated["materials"] == {"etag": sections["materials"]["etag"], "not_modified": True}
+
+    # 全部未变化: 304
+    known = ", ".join(s["etag"] for s in updated.values())
+    resp = await bootstrap_user(user.id, if_none_match=known)
+    assert resp.status_code == 304
+    assert (await bootstrap_user(user.id, if_none_match=resp.headers["ETag"])).status_code == 304
@@ -0,0 +1,140 @@
+"""
+回收员收入统计测试
+覆盖: 日/周/月分桶与补零、佣金计算（逐单舍入，与结算入账一致）、已结束周期缓存与结算后失效、本月接单数区间查询
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app.modules.bootstrap.router import bootstrap_collector
+from app.modules.collectors.model import Collector
+from app.modules.collectors.router import get_collector_earnings, get_collector_stats
+from app.modules.collectors.service import CollectorEarningsService, commission_for
+from app.modules.orders.model import Order
+from app.modules.users.model import User
+
+
+class _FakeRedis:
+    """内存版 Redis，仅实现哈希相关命令"""
+
+    def __init__(self):
+        self.data: dict[str, dict] = {}
+
+    async def hmget(self, key, *fields):
+        return [self.data.get(key, {}).get(f) for f in fields]
+
+    async def hset(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+
+    async def hdel(self, key, *fields):
+        for f in fields:
+            self.data.get(key, {}).pop(f, None)
+
+    async def expire(self, key, seconds):
+        return True
+
+
+@pytest.fixture
+def fake_redis():
+    redis = _FakeRedis()
+    CollectorEarningsService.init(redis)
+    yield redis
+    CollectorEarningsService.close()
+
+
+async def _completed(user, collector, amount: str, weight: str, when: datetime, status="completed"):
+    order = await Order.create(
+        user=user, collector=collector, address="测试地址", status=status,
+        amount_final=Decimal(amount), weight_actual=Decimal(weight),
+    )
+    await Order.filter(id=order.id).update(date=when)
+    return order
+
+
+async def _setup():
+    user = await User.create(openid="ce_u1", full_name="下单用户", password="x")
+    collector = await Collector.create(name="统计回收员", phone="13800000003")
+    other = await Collector.create(name="其他回收员", phone="13800000004")
+    await _completed(user, collector, "10.00", "5.00", datetime(2026, 1, 5, 9))
+    await _completed(user, collector, "20.00", "8.00", datetime(2026, 1, 5, 15))
+    await _completed(user, collector, "30.00", "12.00", datetime(2026, 1, 14, 10))
+    await _completed(user, collector, "50.00", "20.00", datetime(2026, 3, 2, 10))
+    await _completed(user, collector, "99.00", "1.00", datetime(2026, 1, 6, 10), status="scheduled")
+    await _completed(user, other, "99.00", "1.00", datetime(2026, 1, 6, 10))
+    return user, collector
+
+
+@pytest.mark.asyncio
+async def test_earnings_series_by_granularity():
+    _, collector = await _setup()
+
+    day = await get_collector_earnings(collector.id, "day", date(2026, 1, 5), date(2026, 1, 7))
+    assert day["series"] == [
+        {"period": "2026-01-05", "orders": 2, "weight": 13.0, "income": 3.0},
+        {"period": "2026-01-06", "orders": 0, "weight": 0.0, "income": 0.0},
+        {"period": "2026-01-07", "orders": 0, "weight": 0.0, "income": 0.0},
+    ]
+
+    week = await get_collector_earnings(collector.id, "week", date(2026, 1, 7), date(2026, 1, 18))
+    assert (week["from"], week["to"]) == ("2026-01-05", "2026-01-18")
+    assert [(s["period"], s["orders"], s["income"]) for s in week["series"]] == [
+        ("2026-01-05", 2, 3.0), ("2026-01-12", 1, 3.0),
+    ]
+
+    month = await get_collector_earnings(collector.id, "month", date(2026, 1, 1), date(2026, 3, 31))
+    assert [(s["period"], s["orders"]) for s in month["series"]] == [("2026-01", 3), ("2026-02", 0), ("2026-03", 1)]
+    assert month["total"] == {"orders": 4, "weight": 45.0, "income": 11.0}
+
+    with pytest.raises(HTTPException):
+        await get_collector_earnings(collector.id, "year", None, None)
+
+
+@pytest.mark.asyncio
+async def test_income_sums_per_order_commission():
+    user = await User.create(openid="ce_u3", full_name="下单用户", password="x")
+    collector = await Collector.create(name="舍入回收员", phone="13800000006")
+    for _ in range(2):
+        await _completed(user, collector, "0.15", "1.00", datetime(2026, 1, 5, 9))
+
+    # 每单佣金 0.015 按结算口径舍入为 0.02，合计 0.04（先求和再舍入会得到 0.03）
+    assert commission_for(Decimal("0.15")) == Decimal("0.02")
+    day = await get_collector_earnings(collector.id, "day", date(2026, 1, 5), date(2026, 1, 5))
+    assert day["series"][0]["income"] == 0.04
+
+
+@pytest.mark.asyncio
+async def test_closed_periods_are_cached_until_invalidated(fake_redis):
+    user, collector = await _setup()
+    args = (collector.id, "month", date(2026, 1, 1), date(2026, 3, 31))
+
+    first = await get_collector_earnings(*args)
+    assert len(fake_redis.data[f"earnings:{collector.id}"]) == 3
+
+    # 已缓存的周期不再查询: 直接写库不会反映到结果中
+    late = await _completed(user, collector, "40.00", "4.00", datetime(2026, 2, 10, 10))
+    assert await get_collector_earnings(*args) == first
+
+    # 结算时清除该订单所属周期的缓存后重新计算
+    await CollectorEarningsService.invalidate(collector.id, (await Order.get(id=late.id)).date)
+    refreshed = await get_collector_earnings(*args)
+    assert refreshed["series"][1] == {"period": "2026-02", "orders": 1, "weight": 4.0, "income": 4.0}
+
+
+@pytest.mark.asyncio
+async def test_month_count_and_collector_bootstrap():
+    user = await User.create(openid="ce_u2", full_name="下单用户", password="x")
+    collector = await Collector.create(name="本月回收员", phone="13800000005")
+    await _completed(user, collector, "10.00", "1.00", datetime.now())
+    await _completed(user, collector, "10.00", "1.00", datetime(2025, 1, 1))
+    await Order.create(user=user, address="测试地址", status="pending")
+
+    assert (await get_collector_stats(collector.id))["month_count"] == 1
+
+    resp = await bootstrap_collector(collector.id, if_none_match=None)
+    sections = json.loads(resp.body)["sections"]
+    assert sections["stats"]["data"]["month_count"] == 1
+    assert [o["status"] for o in sections["pending_orders"]["data"]] == ["pending"]
+    assert sections["home_config"]["data"]["tabs"][0]["id"] == "new"
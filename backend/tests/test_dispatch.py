@@ -0,0 +1,103 @@
+"""
+自动派单测试
+覆盖: 派单方案的距离与容量约束、批量写入指派结果/审计日志/通知、已被抢单的订单不被覆盖、位置过期的回收员不参与派单
+"""
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from app.common.audit_log import AuditLog
+from app.modules.collectors.model import Collector
+from app.modules.notifications.model import Notification
+from app.modules.orders.dispatch import DispatchService, plan_assignments
+from app.modules.orders.model import Order
+from app.modules.users.model import User
+
+
+def test_plan_respects_distance_and_capacity():
+    orders = np.array([
+        [39.9050, 116.4080],
+        [39.9060, 116.4090],
+        [39.9070, 116.4070],
+        [31.2304, 121.4737],  # 上海，超出派单半径
+    ])
+    collectors = np.array([
+        [39.9042, 116.4074],
+        [39.9300, 116.4074],  # 约 2.9km 外
+    ])
+    plan = plan_assignments(
+        orders, collectors,
+        capacity=np.array([2, 5]), load=np.array([0, 0]),
+        max_distance_km=10.0, load_penalty_km=1.0,
+    )
+    assert plan[3] == -1
+    assert (plan[:3] == 0).sum() == 2  # 最近的回收员容量已满，剩余订单派给次近的
+    assert (plan[:3] == 1).sum() == 1
+
+
+def test_plan_skips_full_collectors():
+    plan = plan_assignments(
+        np.array([[39.9050, 116.4080]]), np.array([[39.9042, 116.4074]]),
+        capacity=np.array([0]), load=np.array([5]),
+        max_distance_km=10.0, load_penalty_km=1.0,
+    )
+    assert plan.tolist() == [-1]
+
+
+@pytest.mark.asyncio
+async def test_dispatch_run_assigns_waiting_orders():
+    user = await User.create(openid="dispatch_u1", full_name="派单用户", password="x")
+    now = datetime.utcnow()
+    collector = await Collector.create(
+        name="派单回收员", phone="13900000001", latitude=39.9042, longitude=116.4074,
+        location_updated_at=now,
+    )
+    await Collector.create(name="未上报位置", phone="13900000002")
+    # 离订单更近但位置已过期
+    await Collector.create(
+        name="位置过期", phone="13900000005", latitude=39.9050, longitude=116.4080,
+        location_updated_at=now - timedelta(days=2),
+    )
+
+    old = datetime.utcnow() - timedelta(hours=1)
+    waiting = await Order.create(user=user, address="A", latitude=39.9050, longitude=116.4080)
+    fresh = await Order.create(user=user, address="B", latitude=39.9051, longitude=116.4081)
+    far = await Order.create(user=user, address="C", latitude=31.2304, longitude=121.4737)
+    await Order.filter(id__in=[waiting.id, far.id]).update(date=old)
+
+    assert await DispatchService.run() == 1
+
+    waiting = await Order.get(id=waiting.id)
+    assert waiting.status == "scheduled" and waiting.collector_id == collector.id
+    assert (await Order.get(id=fresh.id)).status == "pending"  # 未超过最短等待时间
+    assert (await Order.get(id=far.id)).status == "pending"
+    assert await AuditLog.filter(entity_id=waiting.id, action="assigned").count() == 1
+    assert await Notification.filter(user_id=user.id, related_entity_id=waiting.id).count() == 1
+
+    # 已指派的订单不会重复派出
+    assert await DispatchService.run() == 0
+
+
+@pytest.mark.asyncio
+async def test_dispatch_apply_keeps_concurrently_claimed_orders():
+    user = await User.create(openid="dispatch_u2", full_name="派单用户2", password="x")
+    planned = await Collector.create(name="计划回收员", phone="13900000003")
+    claimer = await Collector.create(name="抢单回收员", phone="13900000004")
+    order = await Order.create(user=user, address="D", status="scheduled", collector=claimer)
+
+    assert await DispatchService._apply({planned.id: [order.id]}) == 0
+    assert (await Order.get(id=order.id)).collector_id == claimer.id
+    assert await AuditLog.filter(entity_id=order.id, action="assigned").count() == 0
+
+
+@pytest.mark.asyncio
+async def test_dispatch_apply_skips_orders_claimed_by_planned_collector():
+    user = await User.create(openid="dispatch_u3", full_name="派单用户3", password="x")
+    collector = await Collector.create(name="手动抢单", phone="13900000006")
+    order = await Order.create(user=user, address="E", status="scheduled", collector=collector)
+
+    # 计划回收员在本轮计算期间已手动抢到该单，不重复写审计日志与通知
+    assert await DispatchService._apply({collector.id: [order.id]}) == 0
+    assert await AuditLog.filter(entity_id=order.id, action="assigned").count() == 0
+    assert await Notification.filter(user_id=user.id).count() == 0
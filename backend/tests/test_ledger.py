@@ -0,0 +1,113 @@
+"""
+余额账本测试
+覆盖: 期初余额 + 流水、快照滚入与回写、快照后继续累加、出账防透支、流水分页接口、积分兑换
+"""
+import json
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app.modules.collectors.model import Collector
+from app.modules.ledger.model import BalanceSnapshot, LedgerEntry
+from app.modules.ledger.service import LedgerService
+from app.modules.shop.model import ShopProduct
+from app.modules.shop.router import ExchangeRequest, exchange_product
+from app.modules.users.model import User
+from app.modules.users.router import get_user_ledger, get_user_points
+
+
+async def _age_entries(minutes: int = 5):
+    """把已有流水的时间前移，越过快照的延迟窗口"""
+    await LedgerEntry.all().update(created_at=datetime.utcnow() - timedelta(minutes=minutes))
+
+
+@pytest.mark.asyncio
+async def test_balance_is_opening_plus_entries():
+    user = await User.create(openid="lg_u1", full_name="账本用户", password="x", balance=Decimal("10.00"), points=5)
+    await LedgerService.record([
+        LedgerService.entry("user", user.id, "balance", Decimal("2.50"), "order", 1),
+        LedgerService.entry("user", user.id, "balance", Decimal("1.25"), "order", 2),
+        LedgerService.entry("user", user.id, "points", 30, "order", 1),
+    ])
+    assert await LedgerService.balances("user", user.id) == {"balance": Decimal("13.75"), "points": Decimal("35")}
+
+
+@pytest.mark.asyncio
+async def test_snapshot_rolls_up_entries_and_materializes_columns():
+    user = await User.create(openid="lg_u2", full_name="快照用户", password="x", balance=Decimal("1.00"))
+    collector = await Collector.create(name="快照回收员", phone="13800000001")
+    await LedgerService.record([
+        LedgerService.entry("user", user.id, "balance", Decimal("4.00"), "order", 1),
+        LedgerService.entry("user", user.id, "points", 40, "order", 1),
+        LedgerService.entry("collector", collector.id, "balance", Decimal("0.40"), "order", 1),
+    ])
+    await _age_entries()
+    assert await LedgerService.take_snapshots() == 3
+    # 没有新流水时不重复滚入
+    assert await LedgerService.take_snapshots() == 0
+
+    user = await User.get(id=user.id)
+    assert (user.balance, user.points) == (Decimal("5.00"), 40)
+    assert (await Collector.get(id=collector.id)).balance == Decimal("0.40")
+    snapshot = await BalanceSnapshot.get(account_type="user", account_id=user.id, asset="balance")
+    assert snapshot.amount == Decimal("5.00")
+
+    # 快照之后的流水叠加在快照上；未过延迟窗口的流水留到下一轮
+    await LedgerService.record([LedgerService.entry("user", user.id, "balance", Decimal("2.00"), "order", 2)])
+    assert await LedgerService.take_snapshots() == 0
+    assert await LedgerService.balance("user", user.id, "balance") == Decimal("7.00")
+    await _age_entries()
+    assert await LedgerService.take_snapshots() == 1
+    assert await LedgerService.balance("user", user.id, "balance") == Decimal("7.00")
+    assert (await User.get(id=user.id)).balance == Decimal("7.00")
+
+
+@pytest.mark.asyncio
+async def test_debit_rejects_overdraft():
+    user = await User.create(openid="lg_u3", full_name="出账用户", password="x", balance=Decimal("10.00"))
+    assert await LedgerService.debit("user", user.id, "balance", Decimal("6.00"), "withdrawal", 1) == Decimal("4.00")
+    assert await LedgerService.debit("user", user.id, "balance", Decimal("6.00"), "withdrawal", 2) is None
+    assert await LedgerService.balance("user", user.id, "balance") == Decimal("4.00")
+    assert await LedgerEntry.filter(account_id=user.id).count() == 1
+
+
+@pytest.mark.asyncio
+async def test_ledger_endpoint_pages_entries_and_points_summary():
+    user = await User.create(openid="lg_u4", full_name="流水用户", password="x")
+    for i in range(5):
+        await LedgerService.record([
+            LedgerService.entry("user", user.id, "points", 10 * (i + 1), "order", i, f"回收奖励 - 订单#{i}"),
+        ])
+    await LedgerService.record([LedgerService.entry("user", user.id, "balance", Decimal("3.00"), "order", 9)])
+
+    seen, cursor = [], None
+    while True:
+        page = json.loads((await get_user_ledger(user.id, asset="points", limit=2, cursor=cursor)).body)
+        seen += [item["amount"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert seen == [50.0, 40.0, 30.0, 20.0, 10.0]
+
+    points = await get_user_points(user.id)
+    assert points["current_points"] == 150
+    assert points["today_points"] == 150
+    assert points["history"][0] == {
+        "reason": "回收奖励 - 订单#4", "date": points["history"][0]["date"], "amount": 50, "type": "in",
+    }
+
+
+@pytest.mark.asyncio
+async def test_exchange_debits_points():
+    user = await User.create(openid="lg_u5", full_name="兑换用户", password="x", points=100)
+    product = await ShopProduct.create(name="环保袋", points_cost=80, stock=-1)
+
+    result = await exchange_product(ExchangeRequest(user_id=user.id, product_id=product.id))
+    assert result["remaining_points"] == 20
+
+    with pytest.raises(HTTPException) as exc:
+        await exchange_product(ExchangeRequest(user_id=user.id, product_id=product.id))
+    assert exc.value.detail == "积分不足，需要80积分，当前20积分"
+    assert await LedgerService.balance("user", user.id, "points") == 20
@@ -0,0 +1,83 @@
+"""
+列表接口投影查询测试
+覆盖: 订单/提现/评价列表经单条 JOIN 取数后的字段与格式
+"""
+import json
+
+import pytest
+from decimal import Decimal
+
+from app.modules.collectors.model import Collector
+from app.modules.materials.model import Material
+from app.modules.orders.model import Order
+from app.modules.orders.router import get_orders
+from app.modules.reviews.model import Review
+from app.modules.reviews.router import get_reviews
+from app.modules.users.model import User
+from app.modules.withdrawals.model import Withdrawal
+from app.modules.withdrawals.router import get_user_withdrawals
+
+
+@pytest.mark.asyncio
+async def test_order_list_fields():
+    user = await User.create(openid="pj_u1", full_name="投影用户", password="x")
+    mat = await Material.create(
+        name="废纸", category="Paper",
+        current_price=Decimal("1.00"), market_price=Decimal("1.00"), unit="kg",
+    )
+    collector = await Collector.create(name="回收员P", phone="13800000009")
+    order = await Order.create(
+        user=user, material=mat, address="测试地址", status="completed",
+        weight_actual=Decimal("2.50"), amount_final=Decimal("3.75"),
+        collector=collector, remark="备注",
+    )
+    bare = await Order.create(user=user, address="无物料地址", status="pending")
+
+    rows = json.loads((await get_orders(user_id=user.id)).body)
+    by_id = {r["id"]: r for r in rows}
+
+    done = by_id[str(order.id)]
+    assert done["user_name"] == "投影用户"
+    assert done["category"] == "Paper"
+    assert done["weight_actual"] == 2.5
+    assert done["amount_final"] == 3.75
+    assert done["unit_price_snapshot"] == 0
+    assert done["collector_id"] == str(collector.id)
+    assert done["contact_phone"] == ""
+    assert done["date"] == order.date.strftime("%Y-%m-%d")
+    assert done["remark"] == "备注"
+
+    pending = by_id[str(bare.id)]
+    assert pending["category"] == "Other"
+    assert pending["collector_id"] is None
+    assert pending["appointment_time"] is None
+
+
+@pytest.mark.asyncio
+async def test_withdrawal_and_review_lists():
+    user = await User.create(openid="pj_u2", username="nick", password="x")
+    mat = await Material.create(
+        name="塑料", category="Plastic",
+        current_price=Decimal("1.00"), market_price=Decimal("1.00"), unit="kg",
+    )
+    order = await Order.create(user=user, material=mat, address="测试地址", status="completed")
+    w = await Withdrawal.create(user=user, amount=Decimal("12.30"), channel="wechat")
+    await Review.create(order=order, user=user, rating=4, tags="准时,态度好")
+
+    withdrawals = json.loads((await get_user_withdrawals(user_id=user.id)).body)
+    assert withdrawals == [{
+        "id": str(w.id),
+        "order_id": None,
+        "user_id": str(user.id),
+        "user_name": "nick",
+        "amount": 12.3,
+        "status": "pending",
+        "channel": "wechat",
+        "request_date": w.request_date.strftime("%Y-%m-%d %H:%M:%S"),
+    }]
+
+    reviews = json.loads((await get_reviews(user_id=user.id)).body)
+    assert reviews[0]["order_id"] == order.id
+    assert reviews[0]["user_name"] is None
+    assert reviews[0]["rating"] == 4
+    assert reviews[0]["tags"] == ["准时", "态度好"]
@@ -0,0 +1,62 @@
+"""
+附近订单测试
+覆盖: geohash 编码与前缀区间、包围盒与球面距离口径一致、附近待接订单的半径过滤与距离排序
+"""
+import json
+
+import pytest
+
+from app.common import geohash
+from app.modules.geo.service import haversine_km
+from app.modules.orders.model import Order
+from app.modules.orders.router import get_nearby_orders
+from app.modules.users.model import User
+
+
+def test_geohash_encode_and_prefix_range():
+    assert geohash.encode(57.64911, 10.40744, 11) == "u4pruydqqvj"
+    assert geohash.prefix_range("wx4g") == ("wx4g", "wx4h")
+    assert geohash.prefix_range("wx4z") == ("wx4z", "wx5")
+    assert geohash.prefix_range("zz") == ("zz", None)
+
+
+def test_bounding_box_keeps_points_inside_radius():
+    # 正北方向约 9.996km 的点在半径内，包围盒必须与 haversine 使用同一地球半径才不会把它滤掉
+    lat = 30.0899
+    assert haversine_km(30.0, 120.0, lat, 120.0) < 10.0
+    min_lat, max_lat, _, _ = geohash.bounding_box(30.0, 120.0, 10.0)
+    assert min_lat <= lat <= max_lat
+
+
+def test_covering_cells_contains_center():
+    cells = geohash.covering_cells(39.9042, 116.4074, 3.0)
+    center = geohash.encode(39.9042, 116.4074)
+    assert any(center.startswith(c) for c in cells)
+    assert len(cells) <= 16
+
+
+@pytest.mark.asyncio
+async def test_nearby_pending_orders_sorted_by_distance():
+    user = await User.create(openid="geo_u1", full_name="附近用户", password="x")
+    center = (39.9042, 116.4074)  # 北京天安门附近
+
+    async def make(lat, lon, status="pending"):
+        return await Order.create(
+            user=user, address="测试地址", status=status,
+            latitude=lat, longitude=lon, geohash=geohash.encode(lat, lon),
+        )
+
+    near = await make(39.9050, 116.4080)      # 约 100m
+    mid = await make(39.9200, 116.4074)       # 约 1.8km
+    await make(39.9043, 116.4075, status="scheduled")  # 已被接单
+    await make(31.2304, 121.4737)             # 上海，远超半径
+    await Order.create(user=user, address="无坐标", status="pending")
+
+    rows = json.loads((await get_nearby_orders(lat=center[0], lon=center[1], radius_km=3.0)).body)
+
+    assert [r["id"] for r in rows] == [str(near.id), str(mid.id)]
+    assert rows[0]["distance_value"] < rows[1]["distance_value"] <= 3.0
+    assert rows[0]["distance"].endswith("m")
+
+    limited = json.loads((await get_nearby_orders(lat=center[0], lon=center[1], radius_km=3.0, limit=1)).body)
+    assert [r["id"] for r in limited] == [str(near.id)]
@@ -0,0 +1,147 @@
+"""
+通知服务测试
+覆盖: 未读计数随发送/单条已读/全部已读增减、重复已读不重复扣减、按通知表校准计数、无计数行时实时统计并按实际未读数建行、
+     广播通知的投放范围、已读水位与列表合并、单条已读接口区分广播与个人通知、保留策略分批清理
+"""
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.common.scheduler import SchedulerService
+from app.core.config import settings
+from app.modules.collectors.model import Collector
+from app.modules.notifications.model import BroadcastNotification, Notification, NotificationCounter
+from app.modules.notifications.router import mark_read
+from app.modules.notifications.service import BroadcastService, NotificationService
+from app.modules.users.model import User
+
+
+@pytest.mark.asyncio
+async def test_unread_counter_tracks_send_and_read():
+    u1 = await User.create(openid="notif_u1", full_name="通知用户1", password="x")
+    u2 = await User.create(openid="notif_u2", full_name="通知用户2", password="x")
+
+    first = await NotificationService.send(user_id=u1.id, title="t1", content="c1")
+    await NotificationService.send_many([
+        {"user_id": u1.id, "title": "t2", "content": "c2"},
+        {"user_id": u1.id, "title": "t3", "content": "c3"},
+        {"user_id": u2.id, "title": "t4", "content": "c4"},
+    ])
+    assert await NotificationService.get_unread_count(u1.id) == 3
+    assert await NotificationService.get_unread_count(u2.id) == 1
+
+    assert await NotificationService.mark_read(first.id, u1.id) is True
+    assert await NotificationService.mark_read(first.id, u1.id) is False  # 重复已读不扣减
+    assert await NotificationService.mark_read(first.id, u2.id) is False  # 非本人通知不生效
+    assert await NotificationService.get_unread_count(u1.id) == 2
+
+    assert await NotificationService.mark_all_read(u1.id) == 2
+    assert await NotificationService.get_unread_count(u1.id) == 0
+    assert await NotificationService.get_unread_count(u2.id) == 1
+
+
+@pytest.mark.asyncio
+async def test_rebuild_unread_counts_repairs_drift():
+    u1 = await User.create(openid="notif_u3", full_name="通知用户3", password="x")
+    u2 = await User.create(openid="notif_u4", full_name="通知用户4", password="x")
+    await NotificationCounter.create(user_id=u1.id, unread=7)
+    await NotificationCounter.create(user_id=u2.id, unread=0)
+    await Notification.create(user=u2, title="t", content="c")  # 绕过服务写入，计数未更新
+    await Notification.create(user=u2, title="t", content="c", is_read=True)
+
+    assert await NotificationService.rebuild_unread_counts() == 2
+    assert await NotificationService.get_unread_count(u1.id) == 0
+    assert await NotificationService.get_unread_count(u2.id) == 1
+    assert await NotificationService.rebuild_unread_counts() == 0
+
+
+@pytest.mark.asyncio
+async def test_counter_row_seeded_from_existing_notifications():
+    user = await User.create(openid="notif_u5", full_name="老用户", password="x")
+    # 计数表上线前已有的通知: 没有计数行时按通知表实时统计
+    old = await Notification.create(user=user, title="t1", content="c")
+    await Notification.create(user=user, title="t2", content="c")
+    assert await NotificationService.get_unread_count(user.id) == 2
+
+    # 首次增减时以实际未读数建行，而不是从 0 开始扣成负数
+    assert await NotificationService.mark_read(old.id, user.id) is True
+    assert (await NotificationCounter.get(user_id=user.id)).unread == 1
+    await NotificationService.send(user_id=user.id, title="t3", content="c")
+    assert await NotificationService.get_unread_count(user.id) == 2
+
+
+@pytest.mark.asyncio
+async def test_broadcasts_merge_into_list_and_unread_count():
+    user = await User.create(openid="notif_b1", full_name="广播用户", password="x")
+    collector_user = await User.create(openid="notif_b2", full_name="回收员账号", password="x")
+    await Collector.create(user=collector_user, name="回收员", phone="13800009999")
+
+    await NotificationService.send(user_id=user.id, title="个人", content="c")
+    notice = await BroadcastService.publish("系统公告", "全体可见")
+    promo = await BroadcastService.publish("回收员活动", "仅回收员可见", type="promotion", audience="collectors")
+    late = await User.create(openid="notif_b3", full_name="新用户", password="x")
+
+    assert await BroadcastNotification.all().count() == 2  # 发布只写一行
+    assert await NotificationService.get_unread_count(user.id) == 2
+    assert await NotificationService.get_unread_count(collector_user.id) == 2
+    assert await NotificationService.get_unread_count(late.id) == 0  # 注册前的公告不可见
+
+    items = await NotificationService.list_for_user(user.id)
+    assert [(i["title"], i["broadcast"]) for i in items] == [("系统公告", True), ("个人", False)]
+    assert [i["title"] for i in await NotificationService.list_for_user(user.id, limit=1, offset=1)] == ["个人"]
+
+    assert await BroadcastService.mark_read(user.id, notice.id) is True
+    assert await NotificationService.get_unread_count(user.id) == 1
+    assert (await NotificationService.list_for_user(user.id))[0]["is_read"] is True
+
+    # 全部已读: 个人通知 1 条 + 广播 2 条（水位推进到最新广播）
+    assert await NotificationService.mark_all_read(collector_user.id) == 2
+    assert await NotificationService.get_unread_count(collector_user.id) == 0
+    assert (await User.get(id=collector_user.id)).broadcast_read_id == promo.id
+
+
+@pytest.mark.asyncio
+async def test_mark_read_endpoint_separates_broadcast_ids():
+    user = await User.create(openid="notif_b4", full_name="编号用户", password="x")
+    personal = await NotificationService.send(user_id=user.id, title="个人", content="c")
+    notice = await BroadcastService.publish("公告", "c")
+    assert personal.id == notice.id  # 两张表各自编号
+
+    broadcast_item = next(i for i in await NotificationService.list_for_user(user.id) if i["broadcast"])
+    await mark_read(broadcast_item["id"], user.id, broadcast=True)
+    assert (await User.get(id=user.id)).broadcast_read_id == notice.id
+    assert (await Notification.get(id=personal.id)).is_read is False  # 同号个人通知不受影响
+    assert await NotificationService.get_unread_count(user.id) == 1
+
+    await mark_read(personal.id, user.id)
+    assert await NotificationService.get_unread_count(user.id) == 0
+
+
+@pytest.mark.asyncio
+async def test_purge_notifications_applies_retention_and_cap(monkeypatch):
+    monkeypatch.setattr(settings, "NOTIFICATION_RETENTION_DAYS", 30)
+    monkeypatch.setattr(settings, "NOTIFICATION_MAX_PER_USER", 3)
+    u1 = await User.create(openid="notif_p1", full_name="清理用户1", password="x")
+    u2 = await User.create(openid="notif_p2", full_name="清理用户2", password="x")
+
+    old = datetime.utcnow() - timedelta(days=40)
+    old_read = await Notification.create(user=u1, title="旧已读", content="c", is_read=True)
+    old_unread = await NotificationService.send(user_id=u1.id, title="旧未读", content="c")
+    await Notification.filter(id__in=[old_read.id, old_unread.id]).update(created_at=old)
+
+    # u2 共 5 条，其中最旧的 2 条（1 条未读）超出上限
+    for i in range(5):
+        n = await NotificationService.send(user_id=u2.id, title=f"n{i}", content="c")
+        await Notification.filter(id=n.id).update(created_at=datetime.utcnow() - timedelta(minutes=10 - i))
+    first_two = await Notification.filter(user_id=u2.id).order_by("created_at").limit(2).values_list("id", flat=True)
+    await Notification.filter(id=first_two[1]).update(is_read=True)
+    await NotificationCounter.filter(user_id=u2.id).update(unread=4)
+
+    assert await SchedulerService.purge_notifications(batch_size=1) == 3
+
+    assert await Notification.filter(id=old_read.id).count() == 0
+    assert await Notification.filter(id=old_unread.id).count() == 1  # 未读通知不按天数清理
+    assert await Notification.filter(user_id=u2.id).count() == 3
+    assert not await Notification.filter(id__in=first_two).exists()
+    assert await NotificationService.get_unread_count(u2.id) == 3
+    assert await SchedulerService.purge_notifications() == 0
@@ -0,0 +1,126 @@
+"""
+通知实时推送测试
+覆盖: Last-Event-ID 断线补发、实时推送与去重、心跳、连接关闭后取消订阅、广播按投放范围推送、
+     日志中间件不缓冲流式响应、外层事务提交后才推送
+"""
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+from app.common.logging_middleware import RequestLoggingMiddleware
+from app.common.transactions import in_transaction
+from app.modules.collectors.model import Collector
+from app.modules.notifications.service import BroadcastService, NotificationService
+from app.modules.notifications.stream import NotificationHub
+from app.modules.users.model import User
+
+
+async def _connected():
+    return False
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_then_pushes_live(monkeypatch):
+    user = await User.create(openid="sse_u1", full_name="推送用户", password="x")
+    seen = await NotificationService.send(user_id=user.id, title="已读过", content="c0")
+    missed = await NotificationService.send(user_id=user.id, title="断线期间", content="c1")
+
+    stream = NotificationHub.stream(user.id, str(seen.id), _connected)
+    assert (await anext(stream)).startswith("retry:")
+    replayed = await anext(stream)
+    assert f"id: {missed.id}\n" in replayed and "断线期间" in replayed
+
+    live = await NotificationService.send(user_id=user.id, title="实时", content="c2")
+    pushed = await anext(stream)
+    assert f"id: {live.id}\n" in pushed and "实时" in pushed
+
+    # 其他用户的通知不会推送到本连接；空闲时发送心跳
+    other = await User.create(openid="sse_u2", full_name="其他用户", password="x")
+    await NotificationService.send(user_id=other.id, title="别人的", content="c3")
+    monkeypatch.setattr(NotificationHub, "HEARTBEAT", 0.01)
+    assert await anext(stream) == ": ping\n\n"
+
+    await stream.aclose()
+    assert user.id not in NotificationHub._subscribers
+
+
+@pytest.mark.asyncio
+async def test_broadcast_pushed_to_matching_audience(monkeypatch):
+    user = await User.create(openid="sse_b1", full_name="普通用户", password="x")
+    collector_user = await User.create(openid="sse_b2", full_name="回收员账号", password="x")
+    await Collector.create(user=collector_user, name="回收员", phone="13800008888")
+
+    user_stream = NotificationHub.stream(user.id, None, _connected)
+    collector_stream = NotificationHub.stream(collector_user.id, None, _connected)
+    await anext(user_stream)
+    await anext(collector_stream)
+
+    await BroadcastService.publish("回收员活动", "仅回收员", type="promotion", audience="collectors")
+    event = await anext(collector_stream)
+    assert "回收员活动" in event and not event.startswith("id:")  # 广播不参与 Last-Event-ID
+
+    monkeypatch.setattr(NotificationHub, "HEARTBEAT", 0.01)
+    assert await anext(user_stream) == ": ping\n\n"
+    await user_stream.aclose()
+    await collector_stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_push_deferred_until_outer_commit(monkeypatch):
+    user = await User.create(openid="sse_t1", full_name="事务用户", password="x")
+    published = []
+
+    async def fake_publish(events):
+        published.extend(e["title"] for e in events)
+
+    monkeypatch.setattr(NotificationHub, "publish", fake_publish)
+
+    async with in_transaction():
+        await NotificationService.send(user_id=user.id, title="单条", content="c")
+        await NotificationService.send_many([{"user_id": user.id, "title": "批量", "content": "c"}])
+        assert published == []
+    assert published == ["单条", "批量"]
+
+    with pytest.raises(RuntimeError):
+        async with in_transaction():
+            await NotificationService.send(user_id=user.id, title="回滚", content="c")
+            raise RuntimeError
+    assert published == ["单条", "批量"]
+
+
+@pytest.mark.asyncio
+async def test_logging_middleware_streams_without_buffering():
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.get("/events")
+    async def events():
+        async def gen():
+            yield "data: first\n\n"
+            await release.wait()
+            yield "data: second\n\n"
+        return StreamingResponse(gen(), media_type="text/event-stream")
+
+    sent: asyncio.Queue = asyncio.Queue()
+
+    async def receive():
+        await asyncio.Event().wait()  # 客户端保持连接
+
+    scope = {
+        "type": "http", "method": "GET", "path": "/events", "raw_path": b"/events",
+        "query_string": b"", "headers": [], "scheme": "http", "http_version": "1.1",
+        "server": ("test", 80), "client": ("test", 1234), "root_path": "",
+    }
+    task = asyncio.create_task(RequestLoggingMiddleware(app)(scope, receive, sent.put))
+
+    start = await asyncio.wait_for(sent.get(), timeout=1)
+    assert start["type"] == "http.response.start" and start["status"] == 200
+    # 首个事件在生成器继续之前就已发出，说明中间件没有缓冲响应体
+    first = await asyncio.wait_for(sent.get(), timeout=1)
+    assert first["body"] == b"data: first\n\n"
+    release.set()
+    second = await asyncio.wait_for(sent.get(), timeout=1)
+    assert second["body"] == b"data: second\n\n"
+    await asyncio.wait_for(task, timeout=1)
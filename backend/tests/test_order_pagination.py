@@ -0,0 +1,57 @@
+"""
+订单列表游标分页测试
+覆盖: 游标逐页遍历无重复无遗漏、同一时间戳按 id 区分、offset 模式兼容
+"""
+import json
+
+import pytest
+from datetime import datetime
+from decimal import Decimal
+
+from fastapi import HTTPException
+
+from app.modules.materials.model import Material
+from app.modules.orders.model import Order
+from app.modules.orders.router import get_orders
+from app.modules.users.model import User
+
+
+async def _seed(n: int):
+    user = await User.create(openid="pg_u1", full_name="分页用户", password="x")
+    mat = await Material.create(
+        name="废纸", category="Paper",
+        current_price=Decimal("1.00"), market_price=Decimal("1.00"), unit="kg",
+    )
+    same_time = datetime(2026, 1, 1, 12, 0, 0)
+    ids = []
+    for i in range(n):
+        order = await Order.create(user=user, material=mat, address="测试地址", status="pending")
+        # 一半订单时间戳相同，验证 id 作为次排序键
+        await Order.filter(id=order.id).update(date=same_time if i % 2 else datetime(2026, 1, 2, i))
+        ids.append(order.id)
+    return user, ids
+
+
+@pytest.mark.asyncio
+async def test_cursor_pagination_walks_all_rows():
+    user, ids = await _seed(7)
+
+    seen, cursor = [], ""
+    while cursor is not None:
+        page = json.loads((await get_orders(user_id=user.id, status="pending", limit=3, cursor=cursor)).body)
+        seen.extend(int(o["id"]) for o in page["items"])
+        cursor = page["next_cursor"]
+
+    assert sorted(seen) == sorted(ids)
+    assert len(seen) == len(set(seen))
+
+    # 与 offset 模式的顺序一致
+    legacy = json.loads((await get_orders(user_id=user.id, status="pending", limit=100, offset=0)).body)
+    assert [int(o["id"]) for o in legacy] == seen
+
+
+@pytest.mark.asyncio
+async def test_invalid_cursor_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        await get_orders(cursor="not-a-cursor")
+    assert exc_info.value.status_code == 400
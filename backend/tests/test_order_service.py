@@ -1,16 +1,22 @@
 """
 订单结算核心业务逻辑测试
-覆盖: OrderService.settle_order 全流程
+覆盖: OrderService.settle_order 全流程、OrderService.claim_order 并发抢单
 """
+import asyncio
+
 import pytest
 from decimal import Decimal
 
-from app.modules.users.model import User
+from fastapi import HTTPException
+
+from app.modules.users.model import User, UserStats
+from app.modules.users.router import get_user_stats
 from app.modules.materials.model import Material, PricingRule
 from app.modules.collectors.model import Collector
 from app.modules.orders.model import Order
-from app.modules.orders.service import OrderService
+from app.modules.orders.service import OrderService, UserStatsService
 from app.modules.inventory.model import Inventory
+from app.modules.ledger.service import LedgerService
 
 
 @pytest.mark.asyncio
@@ -36,13 +42,12 @@ async def test_settle_order_basic():
     assert result.amount_final == Decimal("15.00")
 
     # 验证用户余额和积分
-    user = await User.get(id=user.id)
-    assert user.balance == Decimal("15.00")
-    assert user.points == 100  # 10kg * 10
+    balances = await LedgerService.balances("user", user.id)
+    assert balances["balance"] == Decimal("15.00")
+    assert balances["points"] == 100  # 10kg * 10
 
     # 验证回收员佣金 (10%)
-    collector = await Collector.get(id=collector.id)
-    assert collector.balance == Decimal("1.50")
+    assert await LedgerService.balance("collector", collector.id, "balance") == Decimal("1.50")
 
     # 验证库存入库
     inv = await Inventory.get(material_id=mat.id)
@@ -97,3 +102,88 @@ async def test_settle_order_with_bonus():
     # 最终: 75.00 + 3.75 = 78.75
     assert result.amount_final == Decimal("78.75")
     assert result.applied_bonus_amount == Decimal("3.75")
+
+
+@pytest.mark.asyncio
+async def test_claim_order_single_winner():
+    """并发抢单只有一人成功，其余返回 409"""
+    user = await User.create(openid="test_u4", full_name="测试用户4", password="x")
+    order = await Order.create(user=user, address="测试地址", status="pending")
+    collectors = [
+        await Collector.create(name=f"抢单员{i}", phone=f"1390000000{i}") for i in range(5)
+    ]
+
+    async def claim(c):
+        try:
+            await OrderService.claim_order(order.id, c)
+            return "won"
+        except HTTPException as e:
+            return e.status_code
+
+    results = await asyncio.gather(*[claim(c) for c in collectors])
+
+    assert results.count("won") == 1
+    assert results.count(409) == 4
+    order = await Order.get(id=order.id)
+    assert order.status == "scheduled"
+    assert order.collector_id == collectors[results.index("won")].id
+
+    with pytest.raises(HTTPException) as exc_info:
+        await OrderService.claim_order(999999, collectors[0])
+    assert exc_info.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_settle_order_maintains_user_stats():
+    """结算增量维护用户统计，与从订单历史重建的结果一致"""
+    user = await User.create(openid="test_stats", full_name="统计用户", password="x")
+    mat = await Material.create(
+        name="纸箱", category="Paper",
+        current_price=Decimal("2.00"), market_price=Decimal("2.00"), unit="kg",
+    )
+    assert await get_user_stats(user.id) == {"carbon_offset": 0.0, "recycle_count": 0, "total_earnings": 0.0}
+
+    for weight in (3.0, 4.5):
+        order = await Order.create(
+            user=user, material=mat, address="测试地址",
+            status="scheduled", unit_price_snapshot=Decimal("2.00"),
+        )
+        await OrderService.settle_order(order, actual_weight=weight, impurity_percent=0.0)
+
+    stats = await get_user_stats(user.id)
+    assert stats == {"carbon_offset": 18.75, "recycle_count": 2, "total_earnings": 15.0}
+
+    before = await UserStats.filter(user_id=user.id).values("recycle_count", "total_weight", "total_earnings")
+    assert await UserStatsService.rebuild() == 1
+    assert await UserStats.filter(user_id=user.id).values("recycle_count", "total_weight", "total_earnings") == before
+
+
+@pytest.mark.asyncio
+async def test_user_stats_fall_back_to_order_history():
+    """统计表上线前的历史订单: 缺行时读接口回退实时聚合，首次结算以历史聚合建行"""
+    user = await User.create(openid="test_stats_legacy", full_name="老用户", password="x")
+    mat = await Material.create(
+        name="旧报纸", category="Paper",
+        current_price=Decimal("1.00"), market_price=Decimal("1.00"), unit="kg",
+    )
+    await Order.create(
+        user=user, material=mat, address="测试地址", status="completed",
+        weight_actual=Decimal("2.00"), amount_final=Decimal("2.00"),
+    )
+    assert not await UserStats.filter(user_id=user.id).exists()
+    assert await get_user_stats(user.id) == {"carbon_offset": 5.0, "recycle_count": 1, "total_earnings": 2.0}
+
+    order = await Order.create(
+        user=user, material=mat, address="测试地址",
+        status="scheduled", unit_price_snapshot=Decimal("1.00"),
+    )
+    await OrderService.settle_order(order, actual_weight=4.0, impurity_percent=0.0)
+    stats = await UserStats.get(user_id=user.id)
+    assert (stats.recycle_count, stats.total_weight, stats.total_earnings) == (2, Decimal("6.00"), Decimal("6.00"))
+
+    # 统计行被破坏后重建按行覆盖，没有已完成订单的用户被重置
+    await UserStats.filter(user_id=user.id).update(recycle_count=99)
+    await UserStats.create(user_id=user.id + 1000, recycle_count=5)
+    await UserStatsService.rebuild()
+    assert (await UserStats.get(user_id=user.id)).recycle_count == 2
+    assert (await UserStats.get(user_id=user.id + 1000)).recycle_count == 0
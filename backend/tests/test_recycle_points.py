@@ -0,0 +1,90 @@
+"""
+回收点附近查询测试
+覆盖: 网格索引与全量计算结果一致、冷路径包围盒预过滤、索引随回收点增删改更新
+"""
+import heapq
+import random
+
+import pytest
+
+from app.modules.geo.service import haversine_km
+from app.modules.recycle_points.index import PointGrid, RecyclePointIndex
+from app.modules.recycle_points.model import RecyclePoint
+from app.modules.recycle_points.router import get_recycle_points
+
+LAT, LON = 31.2304, 121.4737
+
+
+@pytest.fixture(autouse=True)
+def reset_index():
+    RecyclePointIndex.clear()
+    yield
+    RecyclePointIndex.clear()
+
+
+def test_grid_matches_brute_force():
+    rng = random.Random(7)
+    points = [(LAT + rng.uniform(-0.3, 0.3), LON + rng.uniform(-0.3, 0.3)) for _ in range(3000)]
+    grid = PointGrid()
+    for i, (lat, lon) in enumerate(points):
+        grid.add(lat, lon, i, i)
+
+    for _ in range(50):
+        lat, lon = LAT + rng.uniform(-0.35, 0.35), LON + rng.uniform(-0.35, 0.35)
+        radius, k = rng.choice([0.5, 2.0, 10.0]), rng.choice([1, 5, 30])
+        expected = heapq.nsmallest(k, (
+            (haversine_km(lat, lon, p_lat, p_lon), i) for i, (p_lat, p_lon) in enumerate(points)
+        ))
+        expected = [i for d, i in expected if d <= radius]
+        assert [i for _, i in grid.nearest(lat, lon, radius, k)] == expected
+
+    grid.remove(0)
+    assert len(grid) == 2999
+    assert all(i != 0 for _, i in grid.nearest(*points[0], 1.0, 5))
+
+
+def test_grid_ring_pruning_does_not_skip_closer_point():
+    """第 2 圈的点比第 1 圈已找到的点更近时不能被剪枝（圈宽须与 haversine 使用同一地球半径）"""
+    grid = PointGrid()
+    lat = 0.009999                      # 位于网格 0 的上边缘
+    grid.add(lat - 0.010008, 0.005, 1, "ring1")  # 第 1 圈，约 1.1128km
+    grid.add(0.02, 0.005, 2, "ring2")            # 第 2 圈，约 1.1121km
+    assert [data for _, data in grid.nearest(lat, 0.005, 5.0, 1)] == ["ring2"]
+
+
+async def _make_points():
+    # 前 60 个点都在 8km 外，最近的点最后插入
+    for i in range(60):
+        await RecyclePoint.create(
+            name=f"远点{i}", address="远处", latitude=LAT + 0.08, longitude=LON + 0.001 * i, tags="塑料, 金属",
+        )
+    return await RecyclePoint.create(name="最近点", address="附近", latitude=LAT + 0.001, longitude=LON)
+
+
+@pytest.mark.asyncio
+async def test_cold_path_finds_true_nearest():
+    near = await _make_points()
+    result = await get_recycle_points(lat=LAT, lon=LON, radius_km=10.0, limit=3)
+    assert [r["id"] for r in result][0] == near.id
+    assert result[0]["distance"] == "111m"
+    assert result[1]["tags"] == ["塑料", "金属"]
+    assert await get_recycle_points(lat=LAT, lon=LON, radius_km=1.0, limit=3) == result[:1]
+
+
+@pytest.mark.asyncio
+async def test_index_follows_point_changes():
+    near = await _make_points()
+    assert await RecyclePointIndex.load() == 61
+    indexed = RecyclePointIndex.nearest(LAT, LON, 10.0, 5)
+
+    result = await get_recycle_points(lat=LAT, lon=LON, radius_km=10.0, limit=5)
+    assert [r["id"] for r in result] == [item["id"] for _, item in indexed]
+    assert result[0]["id"] == near.id
+
+    closer = await RecyclePoint.create(name="新点", address="更近", latitude=LAT, longitude=LON)
+    assert (await get_recycle_points(lat=LAT, lon=LON, radius_km=1.0, limit=5))[0]["id"] == closer.id
+
+    closer.status = "inactive"
+    await closer.save()
+    await near.delete()
+    assert await get_recycle_points(lat=LAT, lon=LON, radius_km=1.0, limit=5) == []
@@ -0,0 +1,146 @@
+"""
+响应缓存测试
+覆盖: 命中/未命中、按标签失效、并发未命中合并、Redis 未初始化时直通、事务提交后失效、
+     配置与物料经模型信号失效（覆盖 fastapi-admin 后台修改）
+"""
+import asyncio
+
+import pytest
+
+from app.common.cache import ResponseCache
+from app.common.transactions import after_commit, in_transaction
+from app.modules.config.model import SystemConfig
+from app.modules.config.router import get_config
+from app.modules.materials.model import Material
+from app.modules.materials.router import get_materials
+
+
+class _FakeRedis:
+    """内存版 Redis，仅实现缓存用到的命令"""
+
+    def __init__(self):
+        self.data: dict = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None, px=None, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(members)
+
+    async def smembers(self, key):
+        return set(self.data.get(key, set()))
+
+    async def expire(self, key, seconds):
+        return True
+
+    async def delete(self, *keys):
+        for k in keys:
+            self.data.pop(k, None)
+
+
+@pytest.fixture
+def fake_redis():
+    redis = _FakeRedis()
+    ResponseCache.init(redis)
+    yield redis
+    ResponseCache.close()
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_and_tag_invalidation(fake_redis):
+    calls = []
+
+    @ResponseCache.cached(ttl=60, tags=("materials",))
+    async def list_items(limit: int = 10):
+        calls.append(limit)
+        return [{"id": len(calls), "limit": limit}]
+
+    assert await list_items(limit=5) == [{"id": 1, "limit": 5}]
+    assert await list_items(limit=5) == [{"id": 1, "limit": 5}]
+    assert calls == [5]
+
+    # 不同查询参数是不同的缓存键
+    await list_items(limit=6)
+    assert calls == [5, 6]
+
+    await ResponseCache.invalidate("materials")
+    assert await list_items(limit=5) == [{"id": 3, "limit": 5}]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_coalesced(fake_redis):
+    calls = 0
+
+    @ResponseCache.cached(ttl=60)
+    async def slow():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"value": 42}
+
+    results = await asyncio.gather(*[slow() for _ in range(10)])
+    assert calls == 1
+    assert all(r == {"value": 42} for r in results)
+
+
+@pytest.mark.asyncio
+async def test_passthrough_without_redis():
+    calls = 0
+
+    @ResponseCache.cached(ttl=60)
+    async def plain():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await plain() == 1
+    assert await plain() == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidation_deferred_until_commit(fake_redis):
+    calls = 0
+
+    @ResponseCache.cached(ttl=60, tags=("shop",))
+    async def products():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await products() == 1
+    async with in_transaction():
+        async with in_transaction():
+            await after_commit(ResponseCache.invalidate, "shop")
+        # 事务未提交，缓存仍有效
+        assert await products() == 1
+    assert await products() == 2
+
+    # 回滚的事务不触发失效
+    with pytest.raises(RuntimeError):
+        async with in_transaction():
+            await after_commit(ResponseCache.invalidate, "shop")
+            raise RuntimeError
+    assert await products() == 2
+
+
+@pytest.mark.asyncio
+async def test_model_signals_invalidate_config_and_materials(fake_redis):
+    # 模拟后台直接写模型（不经过路由层）
+    config = await SystemConfig.create(key="home_page", value={"v": 1})
+    assert await get_config(key="home_page") == {"v": 1}
+    config.value = {"v": 2}
+    await config.save()
+    assert await get_config(key="home_page") == {"v": 2}
+    await config.delete()
+    assert "banners" in await get_config(key="home_page")  # 回落到默认配置
+
+    material = await Material.create(name="纸板", category="Paper", current_price=1.2, market_price=1.5)
+    assert [m["name"] for m in await get_materials(limit=100, offset=0)] == ["纸板"]
+    await material.delete()
+    assert await get_materials(limit=100, offset=0) == []
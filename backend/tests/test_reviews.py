@@ -0,0 +1,48 @@
+"""
+评价汇总测试
+覆盖: 提交评价时增量维护评分/星级分布/标签频次、评价概览接口、从评价表逐个回收员重建
+"""
+import pytest
+
+from app.modules.collectors.model import Collector
+from app.modules.orders.model import Order
+from app.modules.reviews.model import CollectorReviewStats
+from app.modules.reviews.router import create_review, get_review_summary
+from app.modules.reviews.schemas import CreateReviewSchema
+from app.modules.reviews.service import ReviewStatsService
+from app.modules.users.model import User
+
+
+@pytest.mark.asyncio
+async def test_review_summary_is_maintained_and_rebuildable():
+    user = await User.create(openid="rv_u1", full_name="评价用户", password="x")
+    collector = await Collector.create(name="评价回收员", phone="13800000006")
+
+    empty = await get_review_summary(collector.id)
+    assert empty["rating_count"] == 0 and empty["tags"] == []
+
+    for rating, tags in [(5, "准时,态度好"), (4, "准时, 分类专业,准时"), (2, None)]:
+        order = await Order.create(user=user, collector=collector, address="测试地址", status="completed")
+        await create_review(CreateReviewSchema(order_id=order.id, user_id=user.id, rating=rating, tags=tags))
+
+    summary = await get_review_summary(collector.id)
+    assert summary == {
+        "collector_id": collector.id,
+        "rating": 3.7,
+        "rating_count": 3,
+        "distribution": {"1": 0, "2": 1, "3": 0, "4": 1, "5": 1},
+        "tags": [{"tag": "准时", "count": 2}, {"tag": "分类专业", "count": 1}, {"tag": "态度好", "count": 1}],
+    }
+    assert (await Collector.get(id=collector.id)).rating == 3.7
+
+    # 汇总被破坏后可从评价表完整重建
+    await CollectorReviewStats.filter(collector_id=collector.id).update(rating_sum=0, star_5=0, tag_counts={})
+    await Collector.filter(id=collector.id).update(rating=1.0)
+    # 没有任何评价的汇总行被重置，而不是保留脏数据
+    stale = await Collector.create(name="无评价回收员", phone="13800000007", rating=1.0)
+    await CollectorReviewStats.create(collector_id=stale.id, rating_sum=9, rating_count=3, star_3=3)
+    assert await ReviewStatsService.rebuild() == 2
+    assert await get_review_summary(collector.id) == summary
+    assert (await Collector.get(id=collector.id)).rating == 3.7
+    assert (await get_review_summary(stale.id))["rating_count"] == 0
+    assert (await Collector.get(id=stale.id)).rating == 5.0
@@ -0,0 +1,176 @@
+"""
+定时任务测试
+覆盖: 超时订单分批取消与批量通知、超时提现分批拒绝与按用户汇总退款、
+     调度主节点租约的互斥与故障接管、延时队列按到期时间处理与撤销
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.common.audit_log import AuditLog
+from app.common.scheduler import (
+    ORDER_EXPIRY_QUEUE, WITHDRAWAL_EXPIRY_QUEUE, DelayedQueue, LeaderLease, SchedulerService,
+)
+from app.modules.ledger.service import LedgerService
+from app.modules.notifications.model import Notification
+from app.modules.orders.model import Order
+from app.modules.users.model import User
+from app.modules.withdrawals.model import Withdrawal
+from app.modules.withdrawals.service import WithdrawalService
+
+
+@pytest.mark.asyncio
+async def test_cancel_expired_orders_in_batches():
+    user = await User.create(openid="sched_u1", full_name="定时任务用户", password="x")
+    expired = [await Order.create(user=user, address=f"过期{i}") for i in range(5)]
+    fresh = await Order.create(user=user, address="未过期")
+    claimed = await Order.create(user=user, address="已接单", status="scheduled")
+    old = datetime.utcnow() - timedelta(hours=25)
+    await Order.filter(id__in=[o.id for o in expired] + [claimed.id]).update(date=old)
+
+    assert await SchedulerService.cancel_expired_orders(batch_size=2) == 5
+
+    assert await Order.filter(status="cancelled").count() == 5
+    assert (await Order.get(id=fresh.id)).status == "pending"
+    assert (await Order.get(id=claimed.id)).status == "scheduled"
+    notified = await Notification.filter(user_id=user.id, type="order").values_list("related_entity_id", flat=True)
+    assert sorted(notified) == sorted(o.id for o in expired)
+
+    # 再次执行无可处理记录
+    assert await SchedulerService.cancel_expired_orders(batch_size=2) == 0
+
+
+@pytest.mark.asyncio
+async def test_reject_expired_withdrawals_refunds_per_user():
+    u1 = await User.create(openid="sched_w1", full_name="提现用户1", password="x", balance=Decimal("0"))
+    u2 = await User.create(openid="sched_w2", full_name="提现用户2", password="x", balance=Decimal("1.00"))
+    expired = [
+        await Withdrawal.create(user=u1, amount=Decimal("10.00"), channel="wechat"),
+        await Withdrawal.create(user=u1, amount=Decimal("5.50"), channel="wechat"),
+        await Withdrawal.create(user=u2, amount=Decimal("3.25"), channel="alipay"),
+    ]
+    fresh = await Withdrawal.create(user=u2, amount=Decimal("100.00"), channel="alipay")
+    approved = await Withdrawal.create(user=u2, amount=Decimal("7.00"), channel="alipay", status="approved")
+    old = datetime.utcnow() - timedelta(hours=73)
+    await Withdrawal.filter(id__in=[w.id for w in expired] + [approved.id]).update(request_date=old)
+
+    assert await SchedulerService.reject_expired_withdrawals(batch_size=2) == 3
+
+    assert await LedgerService.balance("user", u1.id, "balance") == Decimal("15.50")
+    assert await LedgerService.balance("user", u2.id, "balance") == Decimal("4.25")
+    assert (await Withdrawal.get(id=fresh.id)).status == "pending"
+    assert (await Withdrawal.get(id=approved.id)).status == "approved"
+    assert await AuditLog.filter(entity_type="withdrawal", action="rejected", operator_type="system").count() == 3
+    assert await Notification.filter(type="withdrawal").count() == 3
+
+    # 已拒绝的提现不会重复退款
+    assert await SchedulerService.reject_expired_withdrawals() == 0
+    assert await LedgerService.balance("user", u1.id, "balance") == Decimal("15.50")
+
+
+class _LeaseRedis:
+    """内存版 Redis，仅实现租约用到的 SET NX PX 与比较后续约/释放脚本"""
+
+    def __init__(self):
+        self.data: dict = {}
+
+    async def set(self, key, value, nx=False, px=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def eval(self, script, numkeys, key, owner, *args):
+        if self.data.get(key) != owner:
+            return 0
+        if script == LeaderLease._RELEASE_SCRIPT:
+            del self.data[key]
+        return 1
+
+    def expire_now(self, key):
+        """模拟主节点失联后租约到期"""
+        self.data.pop(key, None)
+
+
+@pytest.mark.asyncio
+async def test_leader_lease_single_holder_and_failover():
+    redis = _LeaseRedis()
+    a, b = LeaderLease(redis, ttl=30), LeaderLease(redis, ttl=30)
+
+    assert await a.refresh() is True
+    assert await b.refresh() is False
+    assert await a.refresh() is True  # 续约
+
+    # 主节点失联，租约过期后由备节点接管，原主节点续约失败
+    redis.expire_now(LeaderLease.KEY)
+    assert await b.refresh() is True
+    assert await a.refresh() is False
+
+    # 非持有者释放不影响当前主节点
+    await a.release()
+    assert redis.data[LeaderLease.KEY] == b.owner
+    await b.release()
+    assert LeaderLease.KEY not in redis.data
+    assert await a.refresh() is True
+
+
+class _ZSetRedis:
+    """内存版 Redis，仅实现延时队列用到的有序集合命令与出队脚本"""
+
+    def __init__(self):
+        self.zsets: dict[str, dict[str, float]] = {}
+
+    async def zadd(self, key, mapping):
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrem(self, key, *members):
+        for m in members:
+            self.zsets.get(key, {}).pop(m, None)
+
+    async def zrange(self, key, start, stop, withscores=False):
+        items = sorted(self.zsets.get(key, {}).items(), key=lambda kv: kv[1])
+        return items[start:stop + 1]
+
+    async def eval(self, script, numkeys, key, max_score, limit):
+        assert script == DelayedQueue._POP_SCRIPT
+        zset = self.zsets.get(key, {})
+        due = [m for m, s in sorted(zset.items(), key=lambda kv: kv[1]) if s <= max_score][:limit]
+        for m in due:
+            del zset[m]
+        return due
+
+
+@pytest.fixture
+def delayed_queue():
+    redis = _ZSetRedis()
+    DelayedQueue.init(redis)
+    yield redis
+    DelayedQueue.close()
+
+
+@pytest.mark.asyncio
+async def test_delayed_queue_expires_only_due_items(delayed_queue):
+    user = await User.create(openid="sched_d1", full_name="延时队列用户", password="x", balance=Decimal("50"))
+    due = await Order.create(user=user, address="到期")
+    cancelled = await Order.create(user=user, address="已撤销")
+    future = await Order.create(user=user, address="未到期")
+    old = datetime.utcnow() - timedelta(hours=25)
+    await Order.filter(id__in=[due.id, cancelled.id]).update(date=old)
+
+    await DelayedQueue.schedule(ORDER_EXPIRY_QUEUE, due.id, timedelta(0))
+    await DelayedQueue.schedule(ORDER_EXPIRY_QUEUE, cancelled.id, timedelta(0))
+    await DelayedQueue.schedule(ORDER_EXPIRY_QUEUE, future.id, timedelta(hours=24))
+    await DelayedQueue.cancel(ORDER_EXPIRY_QUEUE, cancelled.id)
+
+    assert await SchedulerService.run_delayed_jobs() == 1
+    assert (await Order.get(id=due.id)).status == "cancelled"
+    assert (await Order.get(id=cancelled.id)).status == "pending"  # 已撤销的任务不会触发
+    assert (await Order.get(id=future.id)).status == "pending"
+    assert 0 < await DelayedQueue.seconds_until_next(*SchedulerService.DELAYED_JOBS) <= 24 * 3600
+
+    # 提现: 创建时入队，审批后撤销
+    w = await WithdrawalService.create_user_withdrawal(user.id, 10.0, "wechat")
+    assert str(w.id) in delayed_queue.zsets[f"{DelayedQueue.PREFIX}{WITHDRAWAL_EXPIRY_QUEUE}"]
+    await WithdrawalService.approve_withdrawal(w.id)
+    assert str(w.id) not in delayed_queue.zsets[f"{DelayedQueue.PREFIX}{WITHDRAWAL_EXPIRY_QUEUE}"]
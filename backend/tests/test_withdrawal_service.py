@@ -1,13 +1,16 @@
 """
 提现业务逻辑测试
-覆盖: 余额校验、重复提现、审批/拒绝退款
+覆盖: 余额校验、重复提现、审批/拒绝退款、并发扣款与重复退款
 """
+import asyncio
+
 import pytest
 from decimal import Decimal
 
 from fastapi import HTTPException
 
 from app.modules.users.model import User
+from app.modules.ledger.service import LedgerService
 from app.modules.materials.model import Material
 from app.modules.orders.model import Order
 from app.modules.withdrawals.model import Withdrawal
@@ -38,8 +41,7 @@ async def test_create_withdrawal_success():
     assert w.status == "pending"
 
     # 验证余额已扣减
-    user = await User.get(id=user.id)
-    assert user.balance == Decimal("50.00")
+    assert await LedgerService.balance("user", user.id, "balance") == Decimal("50.00")
 
 
 @pytest.mark.asyncio
@@ -117,12 +119,51 @@ async def test_reject_withdrawal_refund():
     )
 
     # 提现后余额 40
-    user = await User.get(id=user.id)
-    assert user.balance == Decimal("40.00")
+    assert await LedgerService.balance("user", user.id, "balance") == Decimal("40.00")
 
     result = await WithdrawalService.reject_withdrawal(w.id, "测试拒绝")
     assert result["message"] == "已拒绝，余额已退还"
 
     # 余额应恢复到 100
-    user = await User.get(id=user.id)
-    assert user.balance == Decimal("100.00")
+    assert await LedgerService.balance("user", user.id, "balance") == Decimal("100.00")
+
+
+@pytest.mark.asyncio
+async def test_concurrent_withdrawals_cannot_overdraw():
+    """并发提现由条件 UPDATE 兜底，余额不会扣成负数"""
+    user = await User.create(
+        openid="w_test6", full_name="并发用户", password="x",
+        balance=Decimal("100.00"),
+    )
+
+    async def withdraw():
+        try:
+            await WithdrawalService.create_user_withdrawal(
+                user_id=user.id, amount=60.0, channel="wechat",
+            )
+            return True
+        except HTTPException:
+            return False
+
+    results = await asyncio.gather(withdraw(), withdraw(), withdraw())
+    assert results.count(True) == 1
+
+    assert await LedgerService.balance("user", user.id, "balance") == Decimal("40.00")
+
+
+@pytest.mark.asyncio
+async def test_reject_twice_refunds_once():
+    """重复拒绝只退款一次"""
+    user = await User.create(
+        openid="w_test7", full_name="重复拒绝", password="x",
+        balance=Decimal("100.00"),
+    )
+    w = await WithdrawalService.create_user_withdrawal(
+        user_id=user.id, amount=30.0, channel="wechat",
+    )
+
+    await WithdrawalService.reject_withdrawal(w.id, "第一次")
+    with pytest.raises(HTTPException):
+        await WithdrawalService.reject_withdrawal(w.id, "第二次")
+
+    assert await LedgerService.balance("user", user.id, "balance") == Decimal("100.00")
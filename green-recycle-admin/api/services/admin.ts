@@ -1,4 +1,4 @@
-import type { Withdrawal, AuditLog } from '../../types'
+import type { Withdrawal, WithdrawalStatus, AuditLog } from '../../types'
 import { apiRequest } from '../client'
 
 export type AdminStats = {
@@ -49,8 +49,22 @@ export const getDashboardData = async () => {
   return apiRequest<DashboardData>('/api/v1/admin/dashboard')
 }
 
-export const getAdminWithdrawals = async () => {
-  return apiRequest<Withdrawal[]>('/api/v1/admin/withdrawals')
+/** 各状态笔数与金额合计（除状态外相同筛选条件） */
+export type WithdrawalTotals = Record<WithdrawalStatus, { count: number; amount: number }>
+
+/** 提现游标分页响应，首页（cursor 为空串）额外返回 totals */
+export type WithdrawalPage = {
+  items: Withdrawal[]
+  next_cursor: string | null
+  totals?: WithdrawalTotals
+}
+
+export const getAdminWithdrawals = async (
+  params: { cursor?: string; status?: WithdrawalStatus; limit?: number } = {},
+) => {
+  return apiRequest<WithdrawalPage>('/api/v1/admin/withdrawals', {
+    query: { cursor: params.cursor ?? '', status: params.status, limit: params.limit },
+  })
 }
 
 export const approveWithdrawal = async (id: string) => {
@@ -5,7 +5,10 @@ import { getChannelLabel } from '../formatters';
 
 // P3规范化: searchTerm/statusFilter 已移入 useFinance hook
 const FinanceManagement: React.FC = () => {
-  const { filteredWithdrawals, handleAction, pendingTotal, searchTerm, setSearchTerm, statusFilter, setStatusFilter } = useFinance();
+  const {
+    filteredWithdrawals, handleAction, pendingTotal, searchTerm, setSearchTerm, statusFilter, setStatusFilter,
+    hasMore, loadMore, loadingMore,
+  } = useFinance();
 
   return (
     <div className="space-y-6">
@@ -134,6 +137,17 @@ const FinanceManagement: React.FC = () => {
             </tbody>
           </table>
         </div>
+        {hasMore && (
+          <div className="border-t border-slate-100 px-6 py-3 text-center">
+            <button
+              onClick={loadMore}
+              disabled={loadingMore}
+              className="text-xs font-semibold text-emerald-600 hover:text-emerald-700 disabled:opacity-50"
+            >
+              {loadingMore ? '加载中...' : '加载更多'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
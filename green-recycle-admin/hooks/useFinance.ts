@@ -1,18 +1,35 @@
 import { useEffect, useState } from 'react';
-import type { Withdrawal } from '../types';
-import { approveWithdrawal, getAdminWithdrawals, rejectWithdrawal } from '../api/services/admin';
+import type { Withdrawal, WithdrawalStatus } from '../types';
+import {
+  approveWithdrawal,
+  getAdminWithdrawals,
+  rejectWithdrawal,
+  type WithdrawalTotals,
+} from '../api/services/admin';
+
+const PAGE_SIZE = 50;
 
 // P3规范化: 将搜索和筛选状态统一收入 hook，与 OrderManagement 模式一致
+// 列表按游标分页加载，状态筛选与待审核合计由服务端完成，不再拉取全部提现历史
 export const useFinance = () => {
   const [withdrawals, setWithdrawals] = useState<Withdrawal[]>([]);
+  const [totals, setTotals] = useState<WithdrawalTotals | null>(null);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(false);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
-  const [statusFilter, setStatusFilter] = useState('all');
+  const [statusFilter, setStatusFilter] = useState<WithdrawalStatus | 'all'>('all');
+
+  const status = statusFilter === 'all' ? undefined : statusFilter;
 
+  /** 重新加载首页（含汇总） */
   const fetchWithdrawals = async () => {
     setLoading(true);
     try {
-      setWithdrawals(await getAdminWithdrawals());
+      const page = await getAdminWithdrawals({ status, limit: PAGE_SIZE });
+      setWithdrawals(page.items);
+      setNextCursor(page.next_cursor);
+      setTotals(page.totals ?? null);
     } catch (e) {
       console.error('Failed to fetch withdrawals', e);
     } finally {
@@ -20,9 +37,24 @@ export const useFinance = () => {
     }
   };
 
+  /** 按游标加载下一页 */
+  const loadMore = async () => {
+    if (!nextCursor || loadingMore) return;
+    setLoadingMore(true);
+    try {
+      const page = await getAdminWithdrawals({ cursor: nextCursor, status, limit: PAGE_SIZE });
+      setWithdrawals(prev => [...prev, ...page.items]);
+      setNextCursor(page.next_cursor);
+    } catch (e) {
+      console.error('Failed to load more withdrawals', e);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
     fetchWithdrawals();
-  }, []);
+  }, [statusFilter]);
 
   const handleAction = async (id: string, action: 'approve' | 'reject') => {
     try {
@@ -37,18 +69,15 @@ export const useFinance = () => {
     }
   };
 
-  const pendingTotal = withdrawals
-    .filter(w => w.status === 'pending')
-    .reduce((sum, w) => sum + w.amount, 0);
+  // 服务端按全部提现汇总，不受已加载页数影响
+  const pendingTotal = totals?.pending.amount ?? 0;
 
-  // 过滤后的提现列表
-  const filteredWithdrawals = withdrawals.filter(item => {
-    const matchesSearch = item.id.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         item.user_name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         (item.order_id || '').toLowerCase().includes(searchTerm.toLowerCase());
-    const matchesStatus = statusFilter === 'all' || item.status === statusFilter;
-    return matchesSearch && matchesStatus;
-  });
+  // 已加载记录内按关键词过滤（状态已由服务端筛选）
+  const filteredWithdrawals = withdrawals.filter(item =>
+    item.id.toLowerCase().includes(searchTerm.toLowerCase()) ||
+    item.user_name.toLowerCase().includes(searchTerm.toLowerCase()) ||
+    (item.order_id || '').toLowerCase().includes(searchTerm.toLowerCase())
+  );
 
   return {
     withdrawals,
@@ -56,6 +85,9 @@ export const useFinance = () => {
     handleAction,
     pendingTotal,
     loading,
+    hasMore: nextCursor !== null,
+    loadMore,
+    loadingMore,
     searchTerm,
     setSearchTerm,
     statusFilter,
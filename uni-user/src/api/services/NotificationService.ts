@@ -15,6 +15,8 @@ export interface NotificationItem {
   related_entity_type: string | null
   related_entity_id: number | null
   created_at: string
+  /** 广播通知（id 与个人通知独立编号） */
+  broadcast: boolean
 }
 
 export class NotificationService {
@@ -36,13 +38,13 @@ export class NotificationService {
     })
   }
 
-  /** 标记单条已读 */
-  public static markRead(notificationId: number, userId: number): CancelablePromise<{ message: string }> {
+  /** 标记单条已读（广播需带 broadcast，按广播推进已读水位） */
+  public static markRead(notificationId: number, userId: number, broadcast = false): CancelablePromise<{ message: string }> {
     return __request(OpenAPI, {
       method: 'PUT',
       url: '/api/v1/notifications/{notification_id}/read',
       path: { notification_id: notificationId },
-      query: { user_id: userId },
+      query: { user_id: userId, broadcast },
     })
   }
 
@@ -43,7 +43,15 @@ export function useMessages() {
   const markRead = async (item: NotificationItem) => {
     if (item.is_read || !userStore.userId) return
     try {
-      await NotificationService.markRead(item.id, userStore.userId)
+      await NotificationService.markRead(item.id, userStore.userId, item.broadcast)
+      if (item.broadcast) {
+        // 广播按水位已读: 更早的广播一并视为已读
+        messages.value.forEach(m => {
+          if (m.broadcast && m.id <= item.id) m.is_read = true
+        })
+        await fetchUnreadCount()
+        return
+      }
       item.is_read = true
       unreadCount.value = Math.max(0, unreadCount.value - 1)
     } catch (e) {